@@ -0,0 +1,337 @@
+import os
+import sys
+import glob
+import json
+import time
+import tempfile
+import statistics
+import subprocess
+
+from git_resolver import git_supports
+from fsmonitor_hook import FsmonitorJournal
+
+FEATURE_UNTRACKED_CACHE = "untracked_cache"
+FEATURE_FSMONITOR = "fsmonitor"
+FEATURE_INDEX_V4 = "index_v4"
+FEATURE_SPLIT_INDEX = "split_index"
+
+FEATURE_NAMES = {
+    FEATURE_UNTRACKED_CACHE: "未跟踪文件缓存",
+    FEATURE_FSMONITOR: "文件系统监视 (fsmonitor)",
+    FEATURE_INDEX_V4: "索引版本 4",
+    FEATURE_SPLIT_INDEX: "拆分索引",
+}
+
+STATE_NAMES = {
+    "ok": "正常",
+    "off": "未开启",
+    "inactive": "已开启但未生效",
+    "watcher_stopped": "已开启，打开本工具的仓库后生效",
+    "unsupported": "当前 git 不支持",
+}
+
+# 索引条目超过该数量时建议开启
+LARGE_WORKTREE = 50000
+
+# 开启未跟踪文件缓存前 status.showUntrackedFiles 的原值保存在这里，关闭时恢复；
+# 原来没有设置时保存为 UNSET_MARKER
+SAVED_SHOW_UNTRACKED = "gitgui.savedShowUntrackedFiles"
+UNSET_MARKER = "(unset)"
+
+HOOK_NAME = "gitgui-fsmonitor"
+
+# -S 跳过 site 初始化：钩子只用到标准库，每次 git 命令都会运行它
+HOOK_TEMPLATE = """#!{python} -S
+# 傻瓜式Git工具生成的 core.fsmonitor 钩子（协议版本 2），读取工具的文件监视日志
+import sys
+sys.path.insert(0, {package_dir!r})
+from fsmonitor_hook import run_hook
+sys.exit(run_hook(sys.argv, {git_dir!r}))
+"""
+
+
+class WorktreeAcceleration:
+    """大工作区的状态加速：未跟踪文件缓存、fsmonitor、索引版本 4 和拆分索引
+
+    git status 默认要 lstat 索引中的每个文件、打开每个目录查找未跟踪文件；
+    fsmonitor 告诉 git 自上次查询以来哪些路径变化过，未跟踪文件缓存记住各目录的扫描结果，
+    两者配合后一次状态查询只需检查变化过的路径。索引版本 4 压缩路径前缀，拆分索引把
+    很少变化的大部分条目放在共享文件中，两者都减少每次读写索引的数据量。
+
+    没有内置 fsmonitor 守护进程时，使用随本工具生成的钩子，由状态监视线程的 inotify 日志驱动。
+    """
+
+    def __init__(self, repo_path, git_executable="git"):
+        self.repo_path = repo_path
+        self.git_executable = git_executable
+        self.git_dir = os.path.join(repo_path, ".git")
+        self.hook_path = os.path.join(self.git_dir, "hooks", HOOK_NAME)
+        self.journal = FsmonitorJournal(self.git_dir)
+
+    def _git(self, *args, check=True, env=None):
+        result = subprocess.run([self.git_executable, *args], cwd=self.repo_path,
+                                env=dict(os.environ, **env) if env else None,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if check and result.returncode != 0:
+            raise Exception(f"git {args[0]} 失败: {result.stderr.decode(errors='replace').strip()}")
+        return result
+
+    # ---- 检测 ----
+
+    def fsmonitor_mode(self):
+        """"daemon"（git 内置守护进程）、"hook"（本工具的钩子）或 None（不支持）"""
+        if git_supports('fsmonitor_daemon'):
+            return "daemon"
+        # 打包后的程序没有 Python 解释器可以运行钩子
+        if git_supports('fsmonitor_hook_v2') and not getattr(sys, "frozen", False):
+            return "hook"
+        return None
+
+    def available(self):
+        return {
+            FEATURE_UNTRACKED_CACHE: git_supports('untracked_cache'),
+            FEATURE_FSMONITOR: self.fsmonitor_mode() is not None,
+            FEATURE_INDEX_V4: True,
+            FEATURE_SPLIT_INDEX: git_supports('split_index'),
+        }
+
+    def read_config(self):
+        result = self._git("config", "-z", "--get-regexp",
+                           r"^(core\.(untrackedcache|fsmonitor|splitindex)|index\.version)$", check=False)
+        config = {}
+        for record in result.stdout.decode("utf-8", "replace").split("\0"):
+            if record:
+                key, _, value = record.partition("\n")
+                config[key.lower()] = value
+        return config
+
+    def probe(self):
+        """用 trace2 运行一次状态查询，返回 {类别/键: 值}，从中可以看出 git 实际用上了哪些缓存"""
+        fd, trace_path = tempfile.mkstemp(prefix="gitgui-trace2-", suffix=".json")
+        os.close(fd)
+        try:
+            self._git("--no-optional-locks", "status", "--porcelain", "--untracked-files=all",
+                      env={"GIT_TRACE2_EVENT": trace_path, "GIT_TRACE2_EVENT_NESTING": "20"})
+            data = {}
+            with open(trace_path, "r", encoding="utf-8", errors="replace") as f:
+                for line in f:
+                    try:
+                        event = json.loads(line)
+                    except ValueError:
+                        continue
+                    if event.get("event") == "data":
+                        data[f"{event['category']}/{event['key']}"] = event.get("value")
+            return data
+        finally:
+            os.remove(trace_path)
+
+    def inspect(self):
+        """检查各项加速的配置和实际效果"""
+        config = self.read_config()
+        data = self.probe()
+        available = self.available()
+        entries = int(data.get("index/read/cache_nr") or 0)
+        index_version = int(data.get("index/read/version") or 0)
+        lstats = int(data.get("index/refresh/sum_lstat") or 0)
+        mode = self.fsmonitor_mode()
+
+        if config.get("core.untrackedcache", "").lower() not in ("true", "yes", "on", "1"):
+            untracked_cache = "off"
+        else:
+            # 使用缓存时 read_directory 会报告实际打开的目录数
+            untracked_cache = "ok" if "read_directory/opendir" in data else "inactive"
+
+        fsmonitor_value = config.get("core.fsmonitor", "")
+        if not fsmonitor_value or fsmonitor_value.lower() in ("false", "no", "off", "0"):
+            fsmonitor = "off"
+        elif "index/extension/fsmn/read/token" in data and (lstats < entries or not entries):
+            fsmonitor = "ok"
+        elif fsmonitor_value == self.hook_path and not self.journal.alive():
+            fsmonitor = "watcher_stopped"
+        else:
+            fsmonitor = "inactive"
+
+        if index_version == 4:
+            index_v4 = "ok"
+        else:
+            index_v4 = "inactive" if config.get("index.version") == "4" else "off"
+
+        if config.get("core.splitindex", "").lower() not in ("true", "yes", "on", "1"):
+            split_index = "off"
+        else:
+            split_index = "ok" if glob.glob(os.path.join(self.git_dir, "sharedindex.*")) else "inactive"
+
+        state = {
+            "entries": entries,
+            "index_version": index_version,
+            "fsmonitor_mode": mode,
+            FEATURE_UNTRACKED_CACHE: untracked_cache,
+            FEATURE_FSMONITOR: fsmonitor,
+            FEATURE_INDEX_V4: index_v4,
+            FEATURE_SPLIT_INDEX: split_index,
+            "recommended": entries >= LARGE_WORKTREE,
+        }
+        for feature, supported in available.items():
+            if not supported and state[feature] == "off":
+                state[feature] = "unsupported"
+        return state
+
+    # ---- 计时 ----
+
+    def measure(self, repeat=3):
+        """测量状态查询和暂存扫描的耗时（秒，取中位数）"""
+        if self.read_config().get("core.fsmonitor") == self.hook_path:
+            # 刚开启时等待监视线程开始写日志
+            deadline = time.monotonic() + 5
+            while not self.journal.alive() and time.monotonic() < deadline:
+                time.sleep(0.1)
+        # 先运行一次允许写索引的状态查询，让缓存和 fsmonitor 令牌落盘
+        self._git("status", "--porcelain", "--untracked-files=all", check=False)
+        probes = {
+            "status": ["--no-optional-locks", "status", "--porcelain=v2", "-z", "--untracked-files=all"],
+            "stage_scan": ["--no-optional-locks", "add", "--all", "--dry-run"],
+        }
+        timings = {}
+        for name, args in probes.items():
+            samples = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                self._git(*args, check=False)
+                samples.append(time.perf_counter() - start)
+            timings[name] = statistics.median(samples)
+        return timings
+
+    # ---- 开启/关闭 ----
+
+    def _write_hook(self):
+        os.makedirs(os.path.dirname(self.hook_path), exist_ok=True)
+        with open(self.hook_path, "w", encoding="utf-8") as f:
+            f.write(HOOK_TEMPLATE.format(python=sys.executable,
+                                         package_dir=os.path.dirname(os.path.abspath(__file__)),
+                                         git_dir=os.path.abspath(self.git_dir)))
+        os.chmod(self.hook_path, 0o755)
+
+    def _set_fsmonitor(self, enabled):
+        mode = self.fsmonitor_mode()
+        if enabled:
+            if mode is None:
+                raise Exception("当前 git 版本或运行方式不支持 fsmonitor")
+            if mode == "daemon":
+                self._git("config", "core.fsmonitor", "true")
+                self._git("fsmonitor--daemon", "start", check=False)
+            else:
+                self._write_hook()
+                self._git("config", "core.fsmonitor", self.hook_path)
+                self._git("config", "core.fsmonitorHookVersion", "2")
+            self._git("update-index", "--fsmonitor")
+        else:
+            if git_supports('fsmonitor_daemon'):
+                self._git("fsmonitor--daemon", "stop", check=False)
+            self._git("config", "--unset", "core.fsmonitor", check=False)
+            self._git("config", "--unset", "core.fsmonitorHookVersion", check=False)
+            self._git("update-index", "--no-fsmonitor", check=False)
+            if os.path.exists(self.hook_path):
+                os.remove(self.hook_path)
+
+    def _get_config(self, key):
+        result = self._git("config", "--local", "--get", key, check=False)
+        return result.stdout.decode("utf-8", "replace").strip() if result.returncode == 0 else None
+
+    def _set_show_untracked(self, enabled):
+        """状态查询使用 --untracked-files=all，只有配置的默认值也是 all 时 git 才会使用未跟踪文件缓存
+
+        这个设置也会影响用户在命令行运行的 git status，因此保存原值，关闭时恢复；返回配置变化的说明。
+        """
+        key = "status.showUntrackedFiles"
+        current = self._get_config(key)
+        saved = self._get_config(SAVED_SHOW_UNTRACKED)
+        if enabled:
+            if current == "all":
+                return None
+            self._git("config", SAVED_SHOW_UNTRACKED, UNSET_MARKER if current is None else current)
+            self._git("config", key, "all")
+            return f"{key}: {current or '未设置'} → all"
+        if saved is None:
+            # 不是本工具修改的，保持原样
+            return None
+        if saved == UNSET_MARKER:
+            self._git("config", "--unset", key, check=False)
+        else:
+            self._git("config", key, saved)
+        self._git("config", "--unset", SAVED_SHOW_UNTRACKED, check=False)
+        return f"{key}: {current or '未设置'} → {'未设置' if saved == UNSET_MARKER else saved}"
+
+    def apply(self, changes):
+        """按 {功能: 开启/关闭} 修改配置并重写索引，返回对用户可见的配置变化说明"""
+        notes = []
+        for feature, enabled in changes.items():
+            if feature == FEATURE_UNTRACKED_CACHE:
+                if enabled:
+                    self._git("config", "core.untrackedCache", "true")
+                else:
+                    self._git("config", "--unset", "core.untrackedCache", check=False)
+                note = self._set_show_untracked(enabled)
+                if note:
+                    notes.append(note)
+                self._git("update-index", "--untracked-cache" if enabled else "--no-untracked-cache")
+            elif feature == FEATURE_FSMONITOR:
+                self._set_fsmonitor(enabled)
+            elif feature == FEATURE_INDEX_V4:
+                if enabled:
+                    self._git("config", "index.version", "4")
+                    self._git("update-index", "--index-version", "4")
+                else:
+                    self._git("config", "--unset", "index.version", check=False)
+                    # 含扩展标志（如 skip-worktree）的索引只能降到版本 3
+                    if self._git("update-index", "--index-version", "2", check=False).returncode != 0:
+                        self._git("update-index", "--index-version", "3")
+            elif feature == FEATURE_SPLIT_INDEX:
+                if enabled:
+                    self._git("config", "core.splitIndex", "true")
+                else:
+                    self._git("config", "--unset", "core.splitIndex", check=False)
+                self._git("update-index", "--split-index" if enabled else "--no-split-index")
+            else:
+                raise Exception(f"未知的加速功能: {feature}")
+        return notes
+
+    def start(self, features=None, enabled=True):
+        """测量当前耗时后开启（或关闭）指定功能，默认为当前 git 支持的全部功能
+
+        返回报告的前半部分，监视线程就绪后用 finish 补上开启后的检测和耗时。
+        """
+        available = self.available()
+        features = [f for f in FEATURE_NAMES if available[f]] if features is None else list(features)
+        report = {"before": self.inspect(), "timings_before": self.measure(), "changes": {}, "config": []}
+        report["config"] = self.apply({feature: enabled for feature in features})
+        report["changes"] = {feature: enabled for feature in features}
+        return report
+
+    def finish(self, report):
+        report["timings_after"] = self.measure()
+        report["after"] = self.inspect()
+        return report
+
+
+def format_state(state):
+    """把检测结果格式化为界面文字"""
+    lines = [f"索引条目: {state['entries']}（索引版本 {state['index_version']}）"]
+    for feature, name in FEATURE_NAMES.items():
+        lines.append(f"{name}: {STATE_NAMES.get(state[feature], state[feature])}")
+    return "\n".join(lines)
+
+
+def format_report(report):
+    """把开启/关闭报告格式化为界面文字"""
+    lines = [format_state(report["after"]), ""]
+    labels = {"status": "状态查询", "stage_scan": "暂存扫描"}
+    for name, label in labels.items():
+        before = report["timings_before"][name] * 1000
+        after = report["timings_after"][name] * 1000
+        ratio = f"（快 {before / after:.1f} 倍）" if after and before > after else ""
+        lines.append(f"{label}: {before:.0f} ms → {after:.0f} ms{ratio}")
+    if report.get("config"):
+        lines.append("")
+        lines.append("同时修改了仓库配置（也影响命令行中的 git status）：")
+        lines.extend(report["config"])
+    return "\n".join(lines)
@@ -0,0 +1,299 @@
+"""GitOperations 基准：生成合成仓库，逐项测量各操作的耗时、子进程数和峰值内存
+
+合成仓库用 git fast-import 一次性写入历史，推送/拉取使用本地裸仓库作为远程，不需要网络。
+
+用法：
+    python benchmarks/git_ops_bench.py --files 20000 --commits 5000 --repeat 3 --output ops.json
+    python benchmarks/git_ops_bench.py --files 1000 --file-size 4096 --renames 0.2 --deletes 0.1
+"""
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from utils import set_headless
+
+set_headless(True)
+
+from git_operations import GitOperations  # noqa: E402
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BENCH_ENV = {
+    "GIT_AUTHOR_NAME": "Bench", "GIT_AUTHOR_EMAIL": "bench@localhost",
+    "GIT_COMMITTER_NAME": "Bench", "GIT_COMMITTER_EMAIL": "bench@localhost",
+}
+
+
+# ---- 子进程计数 ----
+
+class PopenCounter:
+    """统计 subprocess.Popen 的调用次数（GitPython 和 GitOperations 都经由它启动 git）"""
+
+    def __init__(self):
+        self.count = 0
+        self._original = subprocess.Popen.__init__
+
+    def install(self):
+        counter = self
+        original = self._original
+
+        def counting_init(self, *args, **kwargs):
+            counter.count += 1
+            original(self, *args, **kwargs)
+
+        subprocess.Popen.__init__ = counting_init
+
+    def uninstall(self):
+        subprocess.Popen.__init__ = self._original
+
+
+def peak_rss_kb():
+    """返回 (本进程峰值 RSS, 子进程峰值 RSS)，单位 KB；不支持的平台返回 None"""
+    if resource is None:
+        return None, None
+    # macOS 上 ru_maxrss 的单位是字节，Linux 上是 KB
+    scale = 1024 if sys.platform == "darwin" else 1
+    return (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss // scale,
+            resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss // scale)
+
+
+# ---- 合成仓库 ----
+
+def git(cwd, *args, input=None):
+    result = subprocess.run(["git", *args], cwd=cwd, input=input, env=dict(os.environ, **BENCH_ENV),
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(f"git {' '.join(args)} 失败: {result.stderr.decode(errors='replace')}")
+    return result.stdout
+
+
+def file_path(index, files_per_dir=200):
+    return f"dir{index // files_per_dir:04d}/file{index:06d}.txt"
+
+
+def file_content(rng, size, tag):
+    line = f"{tag} " + "x" * 60 + "\n"
+    body = (line * (size // len(line) + 1))[:size]
+    return f"{rng.random()}\n{body}".encode()
+
+
+def fast_import_stream(args, rng):
+    """生成 fast-import 输入：第一个提交包含全部文件，之后每个提交修改/重命名/删除若干文件"""
+    timestamp = 1500000000
+    live = list(range(args.files))
+    next_index = args.files
+    chunks = []
+
+    def blob(path, data):
+        chunks.append(f"M 644 inline {path}\ndata {len(data)}\n".encode() + data + b"\n")
+
+    for number in range(1, args.commits + 1):
+        message = f"commit {number}".encode()
+        chunks.append(f"commit refs/heads/master\nmark :{number}\n"
+                      f"committer Bench <bench@localhost> {timestamp + number * 60} +0000\n"
+                      f"data {len(message)}\n".encode() + message + b"\n")
+        if number > 1:
+            chunks.append(f"from :{number - 1}\n".encode())
+        if number == 1:
+            for index in live:
+                blob(file_path(index), file_content(rng, args.file_size, number))
+        else:
+            for _ in range(args.changes_per_commit):
+                roll = rng.random()
+                position = rng.randrange(len(live))
+                index = live[position]
+                if roll < args.deletes and len(live) > 1:
+                    chunks.append(f"D {file_path(index)}\n".encode())
+                    live.pop(position)
+                elif roll < args.deletes + args.renames:
+                    chunks.append(f"R {file_path(index)} {file_path(next_index)}\n".encode())
+                    live[position] = next_index
+                    next_index += 1
+                else:
+                    blob(file_path(index), file_content(rng, args.file_size, number))
+        yield b"".join(chunks)
+        chunks = []
+
+
+def create_repos(workdir, args):
+    """创建工作仓库、作为远程的裸仓库，以及用于制造远程新提交的第二个克隆"""
+    rng = random.Random(args.seed)
+    repo = os.path.join(workdir, "repo")
+    remote = os.path.join(workdir, "remote.git")
+    other = os.path.join(workdir, "other")
+
+    git(workdir, "init", "-q", repo)
+    process = subprocess.Popen(["git", "fast-import", "--quiet"], cwd=repo, stdin=subprocess.PIPE)
+    for chunk in fast_import_stream(args, rng):
+        process.stdin.write(chunk)
+    process.stdin.close()
+    if process.wait() != 0:
+        raise RuntimeError("git fast-import 失败")
+    git(repo, "checkout", "-q", "-f", "master")
+    git(repo, "config", "user.name", "Bench")
+    git(repo, "config", "user.email", "bench@localhost")
+
+    git(workdir, "clone", "-q", "--bare", repo, remote)
+    git(repo, "remote", "add", "origin", remote)
+    git(repo, "fetch", "-q", "origin")
+    git(repo, "branch", "-q", "--set-upstream-to=origin/master")
+    git(workdir, "clone", "-q", remote, other)
+    return repo, remote, other
+
+
+def dirty_worktree(repo, args, rng):
+    """按比例修改、删除、重命名已跟踪文件并新增未跟踪文件"""
+    tracked = git(repo, "ls-files", "-z").decode().split("\0")[:-1]
+    rng.shuffle(tracked)
+    count = min(args.dirty, len(tracked))
+    renames = int(count * args.renames)
+    deletes = int(count * args.deletes)
+    for i, path in enumerate(tracked[:count]):
+        full_path = os.path.join(repo, path)
+        if i < renames:
+            os.replace(full_path, full_path + ".renamed")
+        elif i < renames + deletes:
+            os.remove(full_path)
+        else:
+            with open(full_path, "ab") as f:
+                f.write(b"changed\n")
+    for i in range(args.untracked):
+        with open(os.path.join(repo, f"untracked_{rng.random():.12f}_{i}.txt"), "wb") as f:
+            f.write(file_content(rng, args.file_size, "new"))
+
+
+def push_remote_commit(other, number):
+    """在第二个克隆中提交并推送，使工作仓库的拉取有内容可取"""
+    git(other, "pull", "-q", "--ff-only")
+    with open(os.path.join(other, "remote_change.txt"), "a") as f:
+        f.write(f"remote change {number}\n")
+    git(other, "add", "remote_change.txt")
+    git(other, "commit", "-q", "-m", f"remote change {number}")
+    git(other, "push", "-q", "origin", "master")
+
+
+# ---- 测量 ----
+
+def measure(counter, fn, *args, **kwargs):
+    counter.count = 0
+    start = time.perf_counter()
+    fn(*args, **kwargs)
+    elapsed = time.perf_counter() - start
+    self_rss, children_rss = peak_rss_kb()
+    return {
+        "seconds": elapsed,
+        "subprocesses": counter.count,
+        "peak_rss_kb": self_rss,
+        "children_peak_rss_kb": children_rss,
+    }
+
+
+def run_round(git_ops, repo, other, args, rng, number, counter):
+    """执行一轮完整的操作序列，返回 {操作名: 测量结果}"""
+    results = {}
+    dirty_worktree(repo, args, rng)
+
+    git_ops._status_cache = None
+    results["check_repo_status"] = measure(counter, git_ops.check_repo_status)
+    results["check_repo_status_cached"] = measure(counter, git_ops.check_repo_status)
+    results["add_to_stage"] = measure(counter, git_ops.add_to_stage)
+    results["commit_changes"] = measure(counter, git_ops.commit_changes, f"bench round {number}")
+    results["get_commit_history"] = measure(counter, git_ops.get_commit_history)
+    results["push_to_remote"] = measure(counter, git_ops.push_to_remote)
+
+    push_remote_commit(other, number)
+    results["pull_from_remote"] = measure(counter, git_ops.pull_from_remote)
+
+    # 回退到上一个提交再撤销，仓库回到本轮结束时的状态
+    dirty_worktree(repo, args, rng)
+    results["rollback_to_commit"] = measure(counter, git_ops.rollback_to_commit, "HEAD~1")
+    results["undo_rollback"] = measure(counter, git_ops.undo_rollback)
+    git(repo, "reset", "-q", "--hard")
+    git(repo, "clean", "-q", "-fd")
+    return results
+
+
+def summarize(rounds):
+    report = {}
+    for name in rounds[0]:
+        runs = [round_results[name] for round_results in rounds]
+        seconds = [run["seconds"] for run in runs]
+        report[name] = {
+            "seconds": {"min": min(seconds), "median": statistics.median(seconds), "max": max(seconds)},
+            "subprocesses": max(run["subprocesses"] for run in runs),
+            "peak_rss_kb": runs[-1]["peak_rss_kb"],
+            "children_peak_rss_kb": runs[-1]["children_peak_rss_kb"],
+        }
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="在合成仓库上测量 GitOperations 各操作的性能")
+    parser.add_argument("--files", type=int, default=5000, help="初始文件数")
+    parser.add_argument("--commits", type=int, default=1000, help="历史提交数")
+    parser.add_argument("--file-size", type=int, default=1024, help="每个文件的字节数")
+    parser.add_argument("--changes-per-commit", type=int, default=5, help="每个历史提交改动的文件数")
+    parser.add_argument("--renames", type=float, default=0.1, help="改动中重命名的比例")
+    parser.add_argument("--deletes", type=float, default=0.05, help="改动中删除的比例")
+    parser.add_argument("--dirty", type=int, default=200, help="每轮在工作区改动的已跟踪文件数")
+    parser.add_argument("--untracked", type=int, default=50, help="每轮新增的未跟踪文件数")
+    parser.add_argument("--repeat", type=int, default=3, help="重复轮数")
+    parser.add_argument("--seed", type=int, default=1, help="随机种子")
+    parser.add_argument("--workdir", help="生成仓库的目录（默认使用临时目录并在结束后删除）")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="gitgui-bench-")
+    os.makedirs(workdir, exist_ok=True)
+    try:
+        start = time.perf_counter()
+        repo, remote, other = create_repos(workdir, args)
+        setup_seconds = time.perf_counter() - start
+
+        counter = PopenCounter()
+        counter.install()
+        try:
+            git_ops = GitOperations()
+            load = measure(counter, git_ops.load_repo, repo)
+            rng = random.Random(args.seed)
+            rounds = [run_round(git_ops, repo, other, args, rng, number, counter)
+                      for number in range(1, args.repeat + 1)]
+            git_ops.close()
+        finally:
+            counter.uninstall()
+
+        report = {
+            "python": sys.version.split()[0],
+            "git": git(workdir, "--version").decode().strip(),
+            "platform": sys.platform,
+            "parameters": {key: value for key, value in vars(args).items() if key not in ("workdir", "output")},
+            "setup_seconds": setup_seconds,
+            "load_repo": load,
+            "operations": summarize(rounds),
+        }
+    finally:
+        if not args.workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""启动耗时基准：在全新的解释器中测量导入主模块和首次绘制窗口的时间
+
+用法：
+    python benchmarks/startup.py --repeat 5 --output startup.json
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 只导入主模块，并检查重量级模块是否被提前加载
+IMPORT_SCRIPT = """
+import sys, time, json
+start = time.perf_counter()
+import main
+elapsed = time.perf_counter() - start
+print(json.dumps({"import": elapsed, "heavy_modules": [m for m in ("git", "PIL") if m in sys.modules]}))
+"""
+
+# 创建窗口并处理完第一轮绘制事件
+PAINT_SCRIPT = """
+import time, json
+start = time.perf_counter()
+import tkinter as tk
+import main
+root = tk.Tk()
+app = main.GitGUI(root)
+root.update()
+elapsed = time.perf_counter() - start
+app.on_close()
+print(json.dumps({"first_paint": elapsed}))
+"""
+
+
+def run_script(script):
+    result = subprocess.run([sys.executable, "-c", script], cwd=ROOT,
+                            stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.decode(errors="replace").strip())
+    return json.loads(result.stdout.decode().strip().splitlines()[-1])
+
+
+def summarize(values):
+    return {
+        "min": min(values),
+        "median": statistics.median(values),
+        "max": max(values),
+        "runs": len(values)
+    }
+
+
+def has_display():
+    return sys.platform in ("win32", "darwin") or bool(os.environ.get("DISPLAY"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="测量 GitGUI 启动耗时")
+    parser.add_argument("--repeat", type=int, default=5, help="重复次数")
+    parser.add_argument("--output", help="把结果写入 JSON 文件")
+    args = parser.parse_args(argv)
+
+    imports = [run_script(IMPORT_SCRIPT) for _ in range(args.repeat)]
+    report = {
+        "python": sys.version.split()[0],
+        "import_seconds": summarize([run["import"] for run in imports]),
+        "heavy_modules_at_import": imports[-1]["heavy_modules"],
+    }
+    if has_display():
+        paints = [run_script(PAINT_SCRIPT)["first_paint"] for _ in range(args.repeat)]
+        report["first_paint_seconds"] = summarize(paints)
+    else:
+        report["first_paint_seconds"] = None
+        report["note"] = "没有可用的显示环境，跳过首次绘制测量"
+
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
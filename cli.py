@@ -0,0 +1,215 @@
+"""无界面命令行入口，与图形界面共用 GitOperations，输出 JSON
+
+用法示例：
+    python cli.py -C /path/to/repo status
+    python cli.py -C repo1 -C repo2 stage-all
+    python cli.py -C repo commit -m "更新文档"
+    python cli.py -C repo history --days 7 --limit 50
+    python cli.py -C new_repo clone file:///srv/big.git --depth 1 --filter blob:none --sparse src
+    python cli.py -C repo push --all --progress
+"""
+import os
+import sys
+import json
+import argparse
+from datetime import datetime, timedelta
+
+import tracing
+from utils import set_headless
+
+
+def status_to_dict(status, message):
+    return {
+        'branch': status.head,
+        'commit': status.oid,
+        'upstream': status.upstream,
+        'ahead': status.ahead,
+        'behind': status.behind,
+        'message': message,
+        'files': [
+            {'path': e.path, 'orig_path': e.orig_path, 'kind': e.kind, 'index': e.index, 'worktree': e.worktree}
+            for e in status.entries
+        ]
+    }
+
+
+def print_progress(op_code, cur_count, max_count=None, message=''):
+    """--progress 时把进度写到标准错误，不干扰 JSON 输出"""
+    percent = f"{cur_count / max_count * 100:.0f}%" if max_count else f"{int(cur_count or 0)}"
+    sys.stderr.write(f"\r{percent} {message}".ljust(60))
+    sys.stderr.flush()
+
+
+def run_command(git_ops, args):
+    """执行一个子命令并返回可序列化为 JSON 的结果"""
+    progress = print_progress if getattr(args, "progress", False) else None
+
+    if args.command == "clone":
+        try:
+            git_ops.clone_repo(args.url, git_ops.repo_path, args.depth, args.filter, args.sparse,
+                               progress_callback=progress)
+        finally:
+            if progress:
+                sys.stderr.write("\n")
+        return {'path': git_ops.repo_path, 'shallow': git_ops.history_truncated()}
+    if args.command == "deepen":
+        return {'shallow': git_ops.deepen_history(args.count, progress_callback=progress)}
+    if args.command == "status":
+        return status_to_dict(git_ops.get_status(), git_ops.build_status_message())
+    if args.command in ("stage-all", "stage"):
+        if args.command == "stage" and args.dry_run:
+            return git_ops.match_unstaged(args.include, args.exclude, args.dir)
+        selection = (args.include, args.exclude, args.dir) if args.command == "stage" else ()
+        counts = git_ops.stage_matching(*selection, large_files=args.large_files,
+                                        configure_lfs_filter=args.builtin_lfs_filter)
+        if counts['large']:
+            sys.stderr.write(f"警告: {len(counts['large'])} 个文件超过大小阈值，已照常暂存"
+                             f"（可用 --large-files lfs 或 skip）: {', '.join(counts['large'])}\n")
+        return counts
+    if args.command == "push-size":
+        return git_ops.projected_push_size()
+    if args.command == "commit":
+        commit = git_ops.commit_changes(args.message)
+        return {'commit': commit.hexsha}
+    if args.command == "push" and args.all:
+        def report_done(name, error):
+            if progress:
+                sys.stderr.write(f"{name}: {'推送完成' if error is None else f'推送失败: {error}'}\n")
+
+        results = git_ops.push_to_all(on_remote_done=report_done)
+        return {name: None if error is None else str(error) for name, error in results.items()}
+    if args.command == "remote-add":
+        git_ops.add_remote(args.url, args.name)
+        return git_ops.get_remote_urls()
+    if args.command in ("push", "pull", "fetch"):
+        operation = {"push": git_ops.push_to_remote, "pull": git_ops.pull_from_remote,
+                     "fetch": git_ops.fetch_from_remote}[args.command]
+        try:
+            if args.command == "push":
+                operation(progress_callback=progress, remote=args.remote)
+            else:
+                operation(progress_callback=progress)
+        finally:
+            if progress:
+                sys.stderr.write("\n")
+        return {}
+    if args.command == "history":
+        since = datetime.now() - timedelta(days=args.days) if args.days else None
+        commits = []
+        for page in git_ops.iter_commit_history(since=since):
+            commits.extend(page)
+            if args.limit and len(commits) >= args.limit:
+                del commits[args.limit:]
+                break
+        return [dict(commit, date=commit['date'].isoformat()) for commit in commits]
+    if args.command == "rollback":
+        snapshot = git_ops.rollback_to_commit(args.commit)
+        return {'commit': args.commit, 'snapshot': snapshot['id'], 'skipped': snapshot['skipped']}
+    if args.command == "undo-rollback":
+        return git_ops.undo_rollback(args.snapshot)
+    if args.command == "maintenance":
+        if args.check:
+            return git_ops.inspect_maintenance()
+        return git_ops.run_maintenance(args.task or None)
+    if args.command == "accelerate":
+        if args.check:
+            return git_ops.inspect_acceleration()
+        action = git_ops.disable_acceleration if args.disable else git_ops.enable_acceleration
+        return git_ops.finish_acceleration_report(action(args.feature or None))
+    raise ValueError(f"未知命令: {args.command}")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="gitgui-cli", description="傻瓜式Git工具命令行版")
+    parser.add_argument("-C", "--repo", action="append", dest="repos",
+                        help="仓库路径，可重复指定以批量操作多个仓库（默认当前目录）")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    clone = sub.add_parser("clone", help="把远程仓库克隆到 -C 指定的目录")
+    clone.add_argument("url", help="远程仓库链接")
+    clone.add_argument("--depth", type=int, help="浅克隆深度")
+    clone.add_argument("--filter", choices=["blob:none", "tree:0"], help="部分克隆过滤方式")
+    clone.add_argument("--sparse", action="append", help="只检出该目录（可重复）")
+    clone.add_argument("--progress", action="store_true", help="在标准错误输出进度")
+    deepen = sub.add_parser("deepen", help="把浅克隆的历史向前加深")
+    deepen.add_argument("--count", type=int, default=200, help="加深的提交数")
+    deepen.add_argument("--progress", action="store_true", help="在标准错误输出进度")
+    sub.add_parser("status", help="查看仓库状态")
+    stage_all = sub.add_parser("stage-all", help="添加所有改动到暂存区")
+    stage = sub.add_parser("stage", help="按目录和通配符选择性暂存")
+    stage.add_argument("--include", action="append", help="包含的通配符（可重复）")
+    stage.add_argument("--exclude", action="append", help="排除的通配符（可重复）")
+    stage.add_argument("--dir", action="append", help="只暂存该目录下的更改（可重复）")
+    stage.add_argument("--dry-run", action="store_true", help="只列出匹配的文件，不暂存")
+    for staging in (stage_all, stage):
+        staging.add_argument("--large-files", choices=["lfs", "git", "skip"], default="git",
+                             help="超过阈值的大文件：转为 LFS 指针、照常暂存（默认，输出警告）或跳过")
+        staging.add_argument("--builtin-lfs-filter", action="store_true",
+                             help="未安装 git-lfs 时，同意把本工具的内置 LFS 过滤器写入仓库配置")
+    sub.add_parser("push-size", help="估算提交暂存区后推送的数据量")
+    commit = sub.add_parser("commit", help="提交暂存区")
+    commit.add_argument("-m", "--message", required=True, help="提交信息")
+    for name, text in (("push", "推送到远程"), ("pull", "拉取更新"), ("fetch", "抓取远程（不合并）")):
+        remote = sub.add_parser(name, help=text)
+        remote.add_argument("--progress", action="store_true", help="在标准错误输出进度")
+        if name == "push":
+            remote.add_argument("--remote", default="origin", help="推送到的远程名")
+            remote.add_argument("--all", action="store_true", help="同时推送到所有远程，结果按远程名列出")
+    remote_add = sub.add_parser("remote-add", help="添加远程仓库（同名远程已存在时修改链接）")
+    remote_add.add_argument("url", help="远程仓库链接")
+    remote_add.add_argument("--name", default="origin", help="远程名")
+    history = sub.add_parser("history", help="查看提交历史")
+    history.add_argument("--days", type=float, help="只显示最近若干天的提交")
+    history.add_argument("--limit", type=int, help="最多显示的提交数量")
+    rollback = sub.add_parser("rollback", help="回退到指定提交")
+    rollback.add_argument("commit", help="提交ID")
+    undo = sub.add_parser("undo-rollback", help="恢复回退前自动保存的快照")
+    undo.add_argument("--snapshot", type=int, help="快照编号，默认最新的一个")
+    maintenance = sub.add_parser("maintenance", help="写入提交图、整理包和松散对象")
+    maintenance.add_argument("--check", action="store_true", help="只检测，不执行")
+    maintenance.add_argument("--task", action="append",
+                             choices=["commit-graph", "incremental-repack", "loose-objects"],
+                             help="指定任务（可重复），默认执行检测建议的任务")
+    accelerate = sub.add_parser("accelerate", help="开启未跟踪文件缓存、fsmonitor 等大工作区状态加速")
+    accelerate.add_argument("--check", action="store_true", help="只检测，不修改")
+    accelerate.add_argument("--disable", action="store_true", help="关闭状态加速")
+    accelerate.add_argument("--feature", action="append",
+                            choices=["untracked_cache", "fsmonitor", "index_v4", "split_index"],
+                            help="指定功能（可重复），默认为当前 git 支持的全部功能")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    # 必须在导入 git_operations 之前切换到无界面模式
+    set_headless(True)
+    tracing.enable_from_env()
+    from git_operations import GitOperations
+
+    results = []
+    for repo_path in args.repos or [os.getcwd()]:
+        result = {'repo': os.path.abspath(repo_path), 'ok': True}
+        git_ops = GitOperations()
+        try:
+            if args.command == "clone":
+                # 克隆的目标目录尚不是仓库
+                git_ops.repo_path = os.path.abspath(repo_path)
+            else:
+                git_ops.load_repo(repo_path)
+            result['result'] = run_command(git_ops, args)
+        except Exception as e:
+            result['ok'] = False
+            result['error'] = f"{type(e).__name__}: {e}"
+        finally:
+            git_ops.close()
+        results.append(result)
+
+    output = results[0] if len(results) == 1 else results
+    json.dump(output, sys.stdout, ensure_ascii=False, indent=2, default=str)
+    sys.stdout.write("\n")
+    return 0 if all(result['ok'] for result in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
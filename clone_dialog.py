@@ -0,0 +1,108 @@
+import os
+import re
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from stage_dialog import split_patterns
+
+
+# 过滤方式的界面名称 -> git clone --filter 的取值
+FILTER_CHOICES = (
+    ("完整克隆", None),
+    ("不下载文件内容，检出时按需下载 (blob:none)", "blob:none"),
+    ("不下载目录树和文件内容 (tree:0)", "tree:0"),
+)
+
+
+def repo_name_from_url(url):
+    """从远程链接推断目录名，例如 git@github.com:user/project.git -> project"""
+    name = re.split(r"[/:\\]", url.strip().rstrip("/"))[-1]
+    return name[:-4] if name.endswith(".git") else name
+
+
+class CloneDialog:
+    """克隆远程仓库：可选浅克隆深度、部分克隆过滤方式和只检出的目录"""
+
+    def __init__(self, root, on_clone):
+        self.root = root
+        self.on_clone = on_clone
+
+        self.dialog = tk.Toplevel(root)
+        self.dialog.title("克隆仓库")
+        self.dialog.geometry("560x330")
+        self.dialog.transient(root)
+        self.dialog.grab_set()
+
+        form = ttk.Frame(self.dialog, padding=10)
+        form.pack(fill=tk.BOTH, expand=True)
+        form.columnconfigure(1, weight=1)
+
+        ttk.Label(form, text="远程仓库链接:").grid(row=0, column=0, sticky=tk.W)
+        self.url_var = tk.StringVar()
+        ttk.Entry(form, textvariable=self.url_var).grid(row=0, column=1, columnspan=2, sticky=tk.EW, pady=2)
+
+        ttk.Label(form, text="保存到:").grid(row=1, column=0, sticky=tk.W)
+        self.parent_var = tk.StringVar(value=os.path.expanduser("~"))
+        ttk.Entry(form, textvariable=self.parent_var).grid(row=1, column=1, sticky=tk.EW, pady=2)
+        ttk.Button(form, text="浏览", command=self.choose_parent).grid(row=1, column=2, padx=(5, 0))
+
+        ttk.Label(form, text="文件夹名:").grid(row=2, column=0, sticky=tk.W)
+        self.name_var = tk.StringVar()
+        ttk.Entry(form, textvariable=self.name_var).grid(row=2, column=1, columnspan=2, sticky=tk.EW, pady=2)
+        # 文件夹名跟随链接自动填写，用户手动修改后不再覆盖
+        self.auto_name = ""
+        self.url_var.trace_add("write", lambda *_: self.update_name())
+
+        ttk.Label(form, text="历史深度:").grid(row=3, column=0, sticky=tk.W)
+        self.depth_var = tk.StringVar()
+        depth_frame = ttk.Frame(form)
+        depth_frame.grid(row=3, column=1, columnspan=2, sticky=tk.W, pady=2)
+        ttk.Spinbox(depth_frame, from_=1, to=1000000, width=8, textvariable=self.depth_var).pack(side=tk.LEFT)
+        ttk.Label(depth_frame, text="留空下载完整历史；浅克隆的历史在查看时按需加深",
+                  foreground="#666666").pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(form, text="下载内容:").grid(row=4, column=0, sticky=tk.W)
+        self.filter_var = tk.StringVar(value=FILTER_CHOICES[0][0])
+        ttk.Combobox(form, textvariable=self.filter_var, state="readonly",
+                     values=[label for label, _ in FILTER_CHOICES]).grid(row=4, column=1, columnspan=2,
+                                                                         sticky=tk.EW, pady=2)
+
+        ttk.Label(form, text="只检出目录:").grid(row=5, column=0, sticky=tk.W)
+        self.sparse_var = tk.StringVar()
+        ttk.Entry(form, textvariable=self.sparse_var).grid(row=5, column=1, columnspan=2, sticky=tk.EW, pady=2)
+        ttk.Label(form, text="例如 src, docs/api；留空检出全部文件，根目录下的文件总会检出",
+                  foreground="#666666").grid(row=6, column=1, columnspan=2, sticky=tk.W)
+
+        btn_frame = ttk.Frame(self.dialog)
+        btn_frame.pack(fill=tk.X, pady=10)
+        ttk.Button(btn_frame, text="克隆", command=self.clone).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(btn_frame, text="取消", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+
+    def choose_parent(self):
+        folder = filedialog.askdirectory(parent=self.dialog, initialdir=self.parent_var.get())
+        if folder:
+            self.parent_var.set(folder)
+
+    def update_name(self):
+        name = repo_name_from_url(self.url_var.get())
+        if self.name_var.get() == self.auto_name:
+            self.name_var.set(name)
+        self.auto_name = name
+
+    def clone(self):
+        url = self.url_var.get().strip()
+        name = self.name_var.get().strip()
+        if not url or not name:
+            messagebox.showerror("错误", "请填写远程仓库链接和文件夹名！", parent=self.dialog)
+            return
+        depth = self.depth_var.get().strip()
+        if depth and (not depth.isdigit() or int(depth) < 1):
+            messagebox.showerror("错误", "历史深度必须是正整数！", parent=self.dialog)
+            return
+        path = os.path.join(self.parent_var.get(), name)
+        if os.path.isdir(path) and os.listdir(path):
+            messagebox.showerror("错误", f"{path} 已存在且不为空！", parent=self.dialog)
+            return
+        filter_spec = dict(FILTER_CHOICES)[self.filter_var.get()]
+        self.on_clone(url, path, int(depth) if depth else None, filter_spec, split_patterns(self.sparse_var.get()))
+        self.dialog.destroy()
@@ -0,0 +1,220 @@
+import os
+import sqlite3
+import subprocess
+import threading
+
+# 表结构变化时加一，打开旧版本的索引会整体重建
+SCHEMA_VERSION = 2
+
+# position 是提交在 git log --topo-order 中的位置，越大越新；
+# 同一秒内的多个提交无法按提交时间排序，显示顺序以它为准
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS commits (
+    sha TEXT PRIMARY KEY,
+    position INTEGER NOT NULL,
+    ctime INTEGER NOT NULL,
+    author TEXT NOT NULL,
+    subject TEXT NOT NULL,
+    parents TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS commits_position ON commits (position DESC);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+LOG_FORMAT = "--format=%H%x00%ct%x00%an%x00%P%x00%s"
+
+
+class ReadCancelled(Exception):
+    """读取 git 输出时被取消"""
+
+
+def iter_nul_records(command, cwd, field_count, cancel_event=None):
+    """流式运行 git 命令，把以 NUL 分隔的输出按固定字段数切分成记录
+
+    cancel_event 被设置时结束 git 进程（git 还没有输出时也能立即结束）并抛出 ReadCancelled。
+    """
+    process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def watch_cancel():
+        while process.poll() is None:
+            if cancel_event.wait(0.2):
+                process.kill()
+                return
+
+    if cancel_event:
+        threading.Thread(target=watch_cancel, daemon=True).start()
+    try:
+        fields = []
+        pending = b""
+        while True:
+            chunk = process.stdout.read(64 * 1024)
+            if not chunk:
+                break
+            parts = (pending + chunk).split(b"\0")
+            pending = parts.pop()
+            for part in parts:
+                fields.append(part.decode("utf-8", "replace"))
+                if len(fields) == field_count:
+                    # -z 输出中记录之间可能带有换行
+                    fields[0] = fields[0].lstrip("\n")
+                    yield fields
+                    fields = []
+        if cancel_event and cancel_event.is_set():
+            raise ReadCancelled()
+    finally:
+        # 调用方提前放弃生成器时结束 git 进程
+        if process.poll() is None:
+            process.kill()
+        process.stdout.close()
+        process.wait()
+
+
+class CommitIndex:
+    """保存在 .git 下的提交元数据索引（SQLite），按 HEAD 增量刷新"""
+
+    def __init__(self, repo_path, git_executable="git"):
+        self.repo_path = repo_path
+        self.git_executable = git_executable
+        self.db_path = os.path.join(repo_path, ".git", "gitgui-commits.sqlite")
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] != SCHEMA_VERSION:
+            self._conn.executescript("DROP TABLE IF EXISTS commits; DROP TABLE IF EXISTS meta;")
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        self._conn.executescript(SCHEMA)
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _git(self, *args):
+        return subprocess.run([self.git_executable, *args], cwd=self.repo_path,
+                              stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def _get_meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key, value):
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _ingest(self, *revisions, older=False, cancel_event=None):
+        """按 git log --topo-order 的顺序写入提交，返回写入数量
+
+        新写入的提交默认都排在已有提交之前（新增提交不可能是已有提交的祖先）；
+        older=True 时排在已有提交之后（加深浅克隆补写的更早提交）。
+        被取消时抛出 ReadCancelled，调用方的事务整体回滚。
+        """
+        command = [self.git_executable, "log", "-z", "--topo-order", LOG_FORMAT, *revisions, "--"]
+        low, high = self._conn.execute("SELECT MIN(position), MAX(position) FROM commits").fetchone()
+        # 流式写入时还不知道总数：先按输出顺序递增编号，写完后再把新增部分整体翻转
+        start = (low or 0) - 1 if older else (high or 0) + 1
+        step = -1 if older else 1
+        count = 0
+        batch = []
+        for sha, ctime, author, parents, subject in iter_nul_records(command, self.repo_path, 5, cancel_event):
+            batch.append((sha, start + step * count, int(ctime), author, subject, parents))
+            count += 1
+            if len(batch) >= 1000:
+                self._write_batch(batch)
+                batch = []
+        if batch:
+            self._write_batch(batch)
+        if count and not older:
+            self._conn.execute("UPDATE commits SET position = ? - position WHERE position >= ?",
+                               (2 * start + count - 1, start))
+        return count
+
+    def _write_batch(self, batch):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO commits (sha, position, ctime, author, subject, parents) "
+            "VALUES (?, ?, ?, ?, ?, ?)", batch)
+
+    def _rev_list(self, *revisions):
+        result = self._git("rev-list", *revisions, "--")
+        return result.stdout.decode().split() if result.returncode == 0 else None
+
+    def refresh(self, tip, cancel_event=None):
+        """同步索引到新的 HEAD，返回新写入的提交数量
+
+        新的 HEAD 是旧 HEAD 的后代时只写入新增提交；历史被改写（回退、强制拉取）时
+        只删除从合并基点到旧 HEAD 之间的提交，再写入合并基点到新 HEAD 的提交。
+        cancel_event 被设置时终止 git log 并抛出 ReadCancelled，索引保持刷新前的状态。
+        """
+        with self._lock, self._conn:
+            old_tip = self._get_meta("tip")
+            if old_tip == tip:
+                return 0
+
+            if tip is None:
+                # 空仓库或 HEAD 无效
+                self._conn.execute("DELETE FROM commits")
+                count = 0
+            elif old_tip is None:
+                self._conn.execute("DELETE FROM commits")
+                count = self._ingest(tip, cancel_event=cancel_event)
+            elif self._git("merge-base", "--is-ancestor", old_tip, tip).returncode == 0:
+                count = self._ingest(tip, f"^{old_tip}", cancel_event=cancel_event)
+            else:
+                result = self._git("merge-base", old_tip, tip)
+                base = result.stdout.decode().strip() if result.returncode == 0 else None
+                stale = self._rev_list(old_tip, f"^{base}") if base else None
+                if stale is None:
+                    # 旧提交已不存在或没有共同祖先，整体重建
+                    self._conn.execute("DELETE FROM commits")
+                    count = self._ingest(tip, cancel_event=cancel_event)
+                else:
+                    self._conn.executemany("DELETE FROM commits WHERE sha = ?", [(sha,) for sha in stale])
+                    count = self._ingest(tip, f"^{base}", cancel_event=cancel_event)
+
+            self._set_meta("tip", tip)
+            return count
+
+    def extend(self, revisions):
+        """浅克隆加深后，从原来的截断处开始补写新下载的更早提交，返回写入数量"""
+        with self._lock, self._conn:
+            if self._get_meta("tip") is None:
+                # 索引尚未建立，下一次 refresh 会完整写入
+                return 0
+            return self._ingest(*revisions, older=True)
+
+    def iter_pages(self, since=None, page_size=200, after=None):
+        """按 git log --topo-order 的顺序从新到旧分页读取索引（按 position 键集分页）
+
+        after 为提交 ID 时从该提交之后开始读取。since 不参与查询条件：和 git log --since
+        一样，遇到第一个早于 since 的提交就停止，避免时间范围内提交很少时整表扫描。
+        """
+        since_ts = int(since.timestamp()) if since else None
+        cursor = None
+        if after:
+            with self._lock:
+                row = self._conn.execute("SELECT position FROM commits WHERE sha = ?", (after,)).fetchone()
+            if not row:
+                return
+            cursor = row[0]
+        while True:
+            with self._lock:
+                if cursor is None:
+                    rows = self._conn.execute(
+                        "SELECT sha, ctime, author, subject, position FROM commits "
+                        "ORDER BY position DESC LIMIT ?", (page_size,)).fetchall()
+                else:
+                    rows = self._conn.execute(
+                        "SELECT sha, ctime, author, subject, position FROM commits "
+                        "WHERE position < ? ORDER BY position DESC LIMIT ?",
+                        (cursor, page_size)).fetchall()
+            if since_ts is not None:
+                for i, row in enumerate(rows):
+                    if row[1] < since_ts:
+                        if i:
+                            yield [row[:4] for row in rows[:i]]
+                        return
+            if not rows:
+                return
+            yield [row[:4] for row in rows]
+            if len(rows) < page_size:
+                return
+            cursor = rows[-1][4]
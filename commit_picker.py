@@ -0,0 +1,245 @@
+import threading
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+
+class CommitPicker:
+    """虚拟化的提交选择框
+
+    提交记录在后台分页流式加载，列表只为可见的几行创建条目；
+    搜索框按提交信息、作者、哈希前缀和日期（如 2024-05）增量过滤。
+    """
+
+    COLUMNS = ("提交ID", "日期", "作者", "描述")
+    VISIBLE_ROWS = 15
+    PAGE_SIZE = 1000
+    FILTER_CHUNK = 20000
+
+    def __init__(self, root, scheduler, git_ops, on_confirm, title="选择回退版本"):
+        self.root = root
+        self.scheduler = scheduler
+        self.git_ops = git_ops
+        self.on_confirm = on_confirm
+
+        self.rows = []  # (sha, 日期, 作者, 描述, 小写搜索文本)
+        self.matches = []  # 当前过滤结果在 rows 中的下标
+        self.query = ""
+        self.filter_job = None
+        self.filter_after = None
+        self.offset = 0
+        self.selected_sha = None
+        self.details_sha = None
+        # 关闭对话框时设置，终止仍在写索引或读取历史的 git log
+        self.cancel_event = threading.Event()
+        self.pages = git_ops.iter_commit_history(page_size=self.PAGE_SIZE, cancel_event=self.cancel_event)
+        self.loading = True
+        self.closed = False
+        self.serial_key = ("picker", git_ops.repo_path)
+
+        self.dialog = tk.Toplevel(root)
+        self.dialog.title(title)
+        self.dialog.geometry("760x480")
+        self.dialog.transient(root)
+        self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self.close)
+
+        search_frame = ttk.Frame(self.dialog, padding=(10, 10, 10, 0))
+        search_frame.pack(fill=tk.X)
+        ttk.Label(search_frame, text="搜索:").pack(side=tk.LEFT)
+        self.search_var = tk.StringVar()
+        self.search_var.trace_add("write", lambda *_: self.schedule_filter())
+        search_entry = ttk.Entry(search_frame, textvariable=self.search_var)
+        search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True, padx=5)
+        search_entry.focus_set()
+        self.count_label = ttk.Label(search_frame, text="正在加载...")
+        self.count_label.pack(side=tk.LEFT)
+
+        list_frame = ttk.Frame(self.dialog, padding=10)
+        list_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(list_frame, columns=self.COLUMNS, show="headings",
+                                 height=self.VISIBLE_ROWS, selectmode="browse")
+        for column, width in zip(self.COLUMNS, (80, 130, 120, 380)):
+            self.tree.heading(column, text=column, anchor=tk.W)
+            self.tree.column(column, width=width)
+        self.scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.on_scrollbar)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        # 选中提交的完整信息
+        self.detail_label = ttk.Label(self.dialog, text="", justify=tk.LEFT, wraplength=720, padding=(10, 0))
+        self.detail_label.pack(fill=tk.X)
+
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        self.tree.bind("<MouseWheel>", lambda e: self.scroll_by(-1 if e.delta > 0 else 1) or "break")
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-1) or "break")
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(1) or "break")
+        self.tree.bind("<Up>", lambda e: self.move_selection(-1) or "break")
+        self.tree.bind("<Down>", lambda e: self.move_selection(1) or "break")
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-self.VISIBLE_ROWS) or "break")
+        self.tree.bind("<Next>", lambda e: self.scroll_by(self.VISIBLE_ROWS) or "break")
+        self.tree.bind("<Double-1>", lambda e: self.confirm())
+
+        btn_frame = ttk.Frame(self.dialog)
+        btn_frame.pack(fill=tk.X, pady=10)
+        ttk.Button(btn_frame, text="回退", command=self.confirm).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(btn_frame, text="取消", command=self.close).pack(side=tk.RIGHT, padx=5)
+
+        self.load_next_page()
+
+    # ---- 数据加载 ----
+
+    def load_next_page(self):
+        self.scheduler.submit(next, self.pages, None, serial_key=self.serial_key,
+                              on_success=self.on_page, on_error=self.on_page_error)
+
+    def on_page_error(self, error):
+        if not self.closed:
+            messagebox.showerror("错误", f"获取提交历史失败: {str(error)}", parent=self.dialog)
+
+    def on_page(self, page):
+        if self.closed:
+            return
+        if page is None:
+            self.loading = False
+            self.update_count()
+            return
+        start = len(self.rows)
+        for commit in page:
+            date = commit['date'].strftime("%Y-%m-%d %H:%M")
+            text = f"{commit['id']} {date} {commit['author']} {commit['message']}".lower()
+            self.rows.append((commit['id'], date, commit['author'], commit['message'], text))
+        # 新到的一页只需按当前条件过滤自身，再追加到结果末尾
+        if self.filter_job is None:
+            self.matches.extend(i for i in range(start, len(self.rows)) if self.match(i))
+            self.render()
+        self.load_next_page()
+
+    # ---- 过滤 ----
+
+    def match(self, index):
+        if not self.query:
+            return True
+        row = self.rows[index]
+        for token in self.query.split():
+            if token in row[4] or row[0].startswith(token):
+                continue
+            return False
+        return True
+
+    def schedule_filter(self):
+        """输入停顿 150ms 后再过滤，避免每个按键都扫描全部提交"""
+        if self.filter_after:
+            self.dialog.after_cancel(self.filter_after)
+        self.filter_after = self.dialog.after(150, self.start_filter)
+
+    def start_filter(self):
+        self.filter_after = None
+        query = self.search_var.get().strip().lower()
+        # 新条件是旧条件的细化时，只需在当前结果中继续筛选
+        if self.query and query.startswith(self.query) and self.filter_job is None:
+            candidates = self.matches
+        else:
+            candidates = range(len(self.rows))
+        self.query = query
+        self.filter_job = (iter(candidates), [], len(self.rows))
+        self.continue_filter()
+
+    def continue_filter(self):
+        """分块过滤，每块之间把控制权交还给事件循环，保证输入流畅"""
+        if self.filter_job is None or self.closed:
+            return
+        candidates, result, total = self.filter_job
+        for _ in range(self.FILTER_CHUNK):
+            index = next(candidates, None)
+            if index is None:
+                # 过滤期间新加载的提交也要检查
+                result.extend(i for i in range(total, len(self.rows)) if self.match(i))
+                self.filter_job = None
+                self.matches = result
+                self.offset = 0
+                self.render()
+                return
+            if self.match(index):
+                result.append(index)
+        self.dialog.after(1, self.continue_filter)
+
+    # ---- 虚拟滚动 ----
+
+    def render(self):
+        """只为可见区域创建行"""
+        total = len(self.matches)
+        self.offset = max(0, min(self.offset, total - self.VISIBLE_ROWS))
+        self.tree.delete(*self.tree.get_children())
+        for index in self.matches[self.offset:self.offset + self.VISIBLE_ROWS]:
+            sha, date, author, message, _ = self.rows[index]
+            self.tree.insert("", tk.END, iid=sha, values=(sha[:7], date, author, message))
+        if self.selected_sha and self.tree.exists(self.selected_sha):
+            self.tree.selection_set(self.selected_sha)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.VISIBLE_ROWS) / total))
+        else:
+            self.scrollbar.set(0, 1)
+        self.update_count()
+
+    def update_count(self):
+        suffix = "，加载中..." if self.loading else ""
+        self.count_label.config(text=f"{len(self.matches)}/{len(self.rows)} 条提交{suffix}")
+
+    def scroll_by(self, rows):
+        self.offset += rows
+        self.render()
+
+    def on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.offset = int(float(value) * len(self.matches))
+        elif action == "scroll":
+            step = self.VISIBLE_ROWS if unit == "pages" else 1
+            self.offset += int(value) * step
+        self.render()
+
+    def move_selection(self, delta):
+        shas = [self.rows[i][0] for i in self.matches]
+        if not shas:
+            return
+        position = shas.index(self.selected_sha) + delta if self.selected_sha in shas else 0
+        position = max(0, min(position, len(shas) - 1))
+        self.selected_sha = shas[position]
+        if position < self.offset:
+            self.offset = position
+        elif position >= self.offset + self.VISIBLE_ROWS:
+            self.offset = position - self.VISIBLE_ROWS + 1
+        self.render()
+
+    def on_select(self, event=None):
+        selection = self.tree.selection()
+        if not selection:
+            return
+        self.selected_sha = selection[0]
+        # 重新绘制可见行时也会触发选中事件，同一提交只查询一次
+        if self.selected_sha != self.details_sha:
+            self.details_sha = self.selected_sha
+            self.scheduler.submit(self.git_ops.get_commit_details, self.selected_sha,
+                                  on_success=self.show_details, on_error=lambda e: None)
+
+    def show_details(self, details):
+        if self.closed or details['id'] != self.details_sha:
+            return
+        self.detail_label.config(text=f"{details['id']}\n"
+                                      f"作者: {details['author']} <{details['author_email']}>  "
+                                      f"{details['author_date'].strftime('%Y-%m-%d %H:%M:%S')}\n\n"
+                                      f"{details['message']}")
+
+    # ---- 确认与关闭 ----
+
+    def confirm(self):
+        if not self.selected_sha:
+            messagebox.showerror("错误", "请选择要回退的版本！", parent=self.dialog)
+            return
+        self.on_confirm(self.selected_sha, self)
+
+    def close(self):
+        self.closed = True
+        # 终止正在读取的一页，再在同一串行队列中关闭生成器
+        self.cancel_event.set()
+        self.scheduler.submit(self.pages.close, serial_key=self.serial_key)
+        self.dialog.destroy()
@@ -0,0 +1,243 @@
+import os
+import subprocess
+from typing import NamedTuple, Optional
+
+# 超过这些阈值的文件只显示摘要，不读取差异内容
+HUGE_LINES = 20000
+HUGE_BYTES = 5 * 1024 * 1024
+# 单行显示的最大字符数（压缩过的 js/css 可能一行就有几 MB）
+MAX_LINE_CHARS = 2000
+
+STATUS_NAMES = {
+    "A": "新增",
+    "M": "修改",
+    "D": "删除",
+    "R": "重命名",
+    "C": "复制",
+    "T": "类型变化",
+    "U": "冲突",
+    "?": "未跟踪",
+}
+
+
+class DiffFile(NamedTuple):
+    """变更文件列表中的一项"""
+    status: str  # name-status 的状态字母，未跟踪文件为 "?"
+    path: str
+    orig_path: Optional[str] = None
+
+
+class DiffStat(NamedTuple):
+    """numstat 给出的行数统计；二进制文件的行数为 None"""
+    added: Optional[int]
+    deleted: Optional[int]
+
+    @property
+    def binary(self):
+        return self.added is None
+
+    @property
+    def huge(self):
+        return not self.binary and self.added + self.deleted > HUGE_LINES
+
+
+def _split_nul(data):
+    return [field.decode("utf-8", "surrogateescape") for field in data.split(b"\0")]
+
+
+def parse_name_status(data):
+    """解析 `git diff --name-status -z` 的输出"""
+    fields = _split_nul(data)
+    files = []
+    i = 0
+    while i < len(fields) and fields[i]:
+        status = fields[i][0]
+        if status in ("R", "C"):
+            files.append(DiffFile(status, fields[i + 2], fields[i + 1]))
+            i += 3
+        else:
+            files.append(DiffFile(status, fields[i + 1]))
+            i += 2
+    return files
+
+
+class RawEntry(NamedTuple):
+    """`git diff --raw` 的一项：前后两侧的对象 ID（工作区一侧和不存在的一侧为全 0）"""
+    old_sha: str
+    new_sha: str
+    status: str
+    path: str
+    orig_path: Optional[str] = None
+
+
+def parse_raw(data):
+    """解析 `git diff --raw -z --no-abbrev` 的输出"""
+    fields = _split_nul(data)
+    entries = []
+    i = 0
+    while i < len(fields) and fields[i]:
+        _, _, old_sha, new_sha, status = fields[i].lstrip(":").split(" ")
+        if status[0] in ("R", "C"):
+            entries.append(RawEntry(old_sha, new_sha, status[0], fields[i + 2], fields[i + 1]))
+            i += 3
+        else:
+            entries.append(RawEntry(old_sha, new_sha, status[0], fields[i + 1]))
+            i += 2
+    return entries
+
+
+def parse_numstat(data):
+    """解析 `git diff --numstat -z` 的输出，返回 {路径: DiffStat}"""
+    fields = _split_nul(data)
+    stats = {}
+    i = 0
+    while i < len(fields) and fields[i]:
+        added, deleted, path = fields[i].split("\t", 2)
+        i += 1
+        if not path:
+            # 重命名记录的路径为空，后面依次是原路径和新路径
+            path = fields[i + 1]
+            i += 2
+        binary = added == "-"
+        stats[path] = DiffStat(None if binary else int(added), None if binary else int(deleted))
+    return stats
+
+
+def looks_binary(path, sample_size=8000):
+    """与 git 相同的判断方法：前 8000 字节中含有 NUL 即视为二进制"""
+    try:
+        with open(path, "rb") as f:
+            return b"\0" in f.read(sample_size)
+    except OSError:
+        return False
+
+
+class DiffPager:
+    """流式读取单个文件的差异，按页取出，避免一次读入整个大差异"""
+
+    def __init__(self, command, cwd):
+        self.process = subprocess.Popen(command, cwd=cwd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+        self.exhausted = False
+        self.lines_read = 0
+
+    def next_page(self, page_size=500):
+        """返回下一页（最多 page_size 行）；读完后 exhausted 为 True 并结束进程"""
+        lines = []
+        if self.exhausted:
+            return lines
+        for _ in range(page_size):
+            raw = self.process.stdout.readline()
+            if not raw:
+                self.close()
+                break
+            line = raw.decode("utf-8", "replace").rstrip("\n")
+            if len(line) > MAX_LINE_CHARS:
+                line = line[:MAX_LINE_CHARS] + " …（行过长，已截断）"
+            lines.append(line)
+        self.lines_read += len(lines)
+        return lines
+
+    def close(self):
+        if self.exhausted:
+            return
+        self.exhausted = True
+        if self.process.poll() is None:
+            self.process.kill()
+        self.process.stdout.close()
+        self.process.wait()
+
+
+class DiffReader:
+    """暂存区（staged=True，对比 HEAD 与暂存区）或工作区（对比暂存区与工作区）的差异读取"""
+
+    def __init__(self, repo_path, git_executable="git", process_pool=None):
+        self.repo_path = repo_path
+        self.git_executable = git_executable
+        self.process_pool = process_pool
+
+    def _git(self, *args):
+        result = subprocess.run([self.git_executable, *args], cwd=self.repo_path,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(f"git {args[0]} 失败: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout
+
+    def _diff_args(self, staged):
+        args = ["diff", "--no-color", "--no-ext-diff", "-M"]
+        if staged:
+            args.append("--cached")
+        return args
+
+    def list_files(self, staged, untracked=()):
+        """立即列出变更文件（只比较对象 ID，不计算差异）；工作区列表附加未跟踪文件"""
+        files = parse_name_status(self._git(*self._diff_args(staged), "--name-status", "-z"))
+        files.extend(DiffFile("?", path) for path in untracked)
+        return files
+
+    def stats(self, staged, untracked=()):
+        """计算每个文件的增删行数，用于提前识别二进制和超大文件
+
+        先用 --raw 取得对象 ID 并查询大小（不计算差异），超过 HUGE_BYTES 的文件直接按超大文件处理，
+        只对其余文件运行 --numstat，避免为几百 MB 的文件完整计算一遍差异。
+        """
+        stats = {}
+        excluded = []
+        for entry, size in self._raw_sizes(staged):
+            if size > HUGE_BYTES:
+                stats[entry.path] = DiffStat(HUGE_LINES + 1, 0)
+                excluded.extend(path for path in (entry.orig_path, entry.path) if path)
+        pathspec = [f":(exclude,literal){path}" for path in excluded]
+        stats.update(parse_numstat(self._git(*self._diff_args(staged), "--numstat", "-z", "--", *pathspec)))
+        for path in untracked:
+            full_path = os.path.join(self.repo_path, path)
+            if looks_binary(full_path):
+                stats[path] = DiffStat(None, None)
+            else:
+                size = os.path.getsize(full_path) if os.path.exists(full_path) else 0
+                # 未跟踪文件不读取内容数行，超过大小阈值直接按超大文件处理
+                stats[path] = DiffStat(HUGE_LINES + 1 if size > HUGE_BYTES else 0, 0)
+        return stats
+
+    def _raw_sizes(self, staged):
+        """返回 [(RawEntry, 前后两个版本中较大的字节数)]；对象大小由常驻的 cat-file 进程批量查询"""
+        entries = parse_raw(self._git(*self._diff_args(staged), "--raw", "-z", "--no-abbrev"))
+        shas = {sha for entry in entries for sha in (entry.old_sha, entry.new_sha) if sha.strip("0")}
+        infos = self.process_pool.info_many(list(shas)) if shas else {}
+        result = []
+        for entry in entries:
+            size = 0
+            for sha in (entry.old_sha, entry.new_sha):
+                info = infos.get(sha)
+                if info:
+                    size = max(size, info.size)
+            if not staged and not entry.new_sha.strip("0"):
+                # 工作区一侧没有对象 ID，直接读取文件大小
+                try:
+                    size = max(size, os.lstat(os.path.join(self.repo_path, entry.path)).st_size)
+                except OSError:
+                    pass
+            result.append((entry, size))
+        return result
+
+    def sizes(self, diff_file, staged):
+        """二进制/超大文件前后两个版本的大小（字节），不存在的一侧为 None"""
+        old_name = f"{'HEAD' if staged else ''}:{diff_file.orig_path or diff_file.path}"
+        if staged:
+            new_name = f":{diff_file.path}"
+            infos = self.process_pool.info_many([old_name, new_name])
+            new_size = infos[new_name].size if infos[new_name] else None
+        else:
+            infos = self.process_pool.info_many([old_name]) if diff_file.status != "?" else {old_name: None}
+            full_path = os.path.join(self.repo_path, diff_file.path)
+            new_size = os.path.getsize(full_path) if os.path.exists(full_path) else None
+        return (infos[old_name].size if infos[old_name] else None), new_size
+
+    def open(self, diff_file, staged):
+        """打开单个文件的差异，返回 DiffPager"""
+        if diff_file.status == "?":
+            # 未跟踪文件与空文件比较（git 在所有平台上都识别 /dev/null）
+            command = [self.git_executable, "diff", "--no-color", "--no-index", "--", "/dev/null", diff_file.path]
+        else:
+            paths = [diff_file.path] if not diff_file.orig_path else [diff_file.orig_path, diff_file.path]
+            command = [self.git_executable, *self._diff_args(staged), "--", *paths]
+        return DiffPager(command, self.repo_path)
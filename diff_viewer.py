@@ -0,0 +1,232 @@
+import tkinter as tk
+from tkinter import ttk, messagebox
+
+from diff_reader import STATUS_NAMES
+from progress import format_size
+
+
+class DiffViewer:
+    """查看暂存区和工作区的更改
+
+    文件列表由 name-status 立即给出，行数统计随后补上；
+    选中文件时才读取它的差异，并在滚动到底部时按页继续读取。
+    """
+
+    PAGE_SIZE = 500
+    # 单个文件最多显示的行数，超过后不再加载，避免文本框占用过多内存
+    MAX_LINES = 20000
+    SECTIONS = ((True, "已暂存（将被提交）"), (False, "未暂存（'添加到暂存区'将包含）"))
+
+    def __init__(self, root, scheduler, git_ops):
+        self.root = root
+        self.scheduler = scheduler
+        self.git_ops = git_ops
+        self.files = {}  # 树节点 -> (staged, DiffFile)
+        self.stats = {True: {}, False: {}}
+        self.pager = None
+        self.page_pending = False
+        self.generation = 0
+        self.closed = False
+        self.serial_key = ("diff", id(self))
+
+        self.window = tk.Toplevel(root)
+        self.window.title("查看更改")
+        self.window.geometry("1000x640")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        top_frame = ttk.Frame(self.window, padding=10)
+        top_frame.pack(fill=tk.X)
+        ttk.Button(top_frame, text="刷新", command=self.refresh).pack(side=tk.LEFT, padx=5)
+        ttk.Label(top_frame, text="选中文件后显示差异，二进制和超大文件只显示大小").pack(side=tk.LEFT, padx=10)
+
+        paned = ttk.PanedWindow(self.window, orient=tk.HORIZONTAL)
+        paned.pack(fill=tk.BOTH, expand=True, padx=10, pady=(0, 10))
+
+        list_frame = ttk.Frame(paned)
+        self.tree = ttk.Treeview(list_frame, columns=("变化",), selectmode="browse")
+        self.tree.heading("#0", text="文件", anchor=tk.W)
+        self.tree.heading("变化", text="变化", anchor=tk.W)
+        self.tree.column("#0", width=260)
+        self.tree.column("变化", width=90)
+        tree_scrollbar = ttk.Scrollbar(list_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=tree_scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        tree_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.bind("<<TreeviewSelect>>", self.on_select)
+        paned.add(list_frame, weight=1)
+
+        text_frame = ttk.Frame(paned)
+        self.text = tk.Text(text_frame, wrap=tk.NONE, font=("Consolas", 10), state=tk.DISABLED)
+        self.text_scrollbar = ttk.Scrollbar(text_frame, orient=tk.VERTICAL, command=self.text.yview)
+        x_scrollbar = ttk.Scrollbar(text_frame, orient=tk.HORIZONTAL, command=self.text.xview)
+        self.text.configure(yscrollcommand=self.on_text_scroll, xscrollcommand=x_scrollbar.set)
+        self.text_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        x_scrollbar.pack(side=tk.BOTTOM, fill=tk.X)
+        self.text.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.text.tag_configure("add", foreground="#1a7f37", background="#e6ffec")
+        self.text.tag_configure("delete", foreground="#cf222e", background="#ffebe9")
+        self.text.tag_configure("hunk", foreground="#0550ae", background="#ddf4ff")
+        self.text.tag_configure("meta", foreground="#6e7781")
+        self.text.tag_configure("notice", foreground="#9a6700")
+        paned.add(text_frame, weight=3)
+
+        self.refresh()
+
+    # ---- 文件列表 ----
+
+    def refresh(self):
+        self.generation += 1
+        self.close_pager()
+        self.tree.delete(*self.tree.get_children())
+        self.files.clear()
+        self.stats = {True: {}, False: {}}
+        self.set_text([])
+        for staged, title in self.SECTIONS:
+            self.tree.insert("", tk.END, iid=str(staged), text=title, open=True)
+            self.scheduler.submit(self.git_ops.list_changed_files, staged,
+                                  on_success=lambda files, s=staged: self.on_files(s, files),
+                                  on_error=self.report_error)
+
+    def on_files(self, staged, files):
+        if self.closed:
+            return
+        parent = str(staged)
+        for diff_file in files:
+            name = diff_file.path if not diff_file.orig_path else f"{diff_file.orig_path} → {diff_file.path}"
+            node = self.tree.insert(parent, tk.END,
+                                    text=f"[{STATUS_NAMES.get(diff_file.status, diff_file.status)}] {name}",
+                                    values=("…",))
+            self.files[node] = (staged, diff_file)
+        title = dict(self.SECTIONS)[staged]
+        self.tree.item(parent, text=f"{title} {len(files)} 个文件")
+        # 行数统计需要真正计算差异，放在列表显示之后
+        self.scheduler.submit(self.git_ops.get_diff_stats, staged,
+                              on_success=lambda stats: self.on_stats(staged, stats), on_error=self.report_error)
+
+    def on_stats(self, staged, stats):
+        if self.closed:
+            return
+        self.stats[staged] = stats
+        for node, (node_staged, diff_file) in self.files.items():
+            stat = stats.get(diff_file.path)
+            if node_staged != staged or stat is None:
+                continue
+            if stat.binary:
+                label = "二进制"
+            elif stat.huge:
+                label = "超大"
+            elif diff_file.status == "?":
+                label = "新文件"
+            else:
+                label = f"+{stat.added} -{stat.deleted}"
+            self.tree.item(node, values=(label,))
+
+    # ---- 差异内容 ----
+
+    def on_select(self, event=None):
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.files:
+            return
+        staged, diff_file = self.files[selection[0]]
+        self.generation += 1
+        generation = self.generation
+        self.close_pager()
+        self.set_text([])
+
+        stat = self.stats[staged].get(diff_file.path)
+        if stat and (stat.binary or stat.huge):
+            # 二进制和超大文件只显示大小变化，不读取内容
+            self.scheduler.submit(self.git_ops.get_diff_sizes, diff_file, staged, serial_key=self.serial_key,
+                                  on_success=lambda sizes: self.show_summary(generation, stat, sizes),
+                                  on_error=self.report_error)
+            return
+        self.page_pending = True
+        self.scheduler.submit(self.open_first_page, diff_file, staged, serial_key=self.serial_key,
+                              on_success=lambda result: self.on_first_page(generation, *result),
+                              on_error=self.report_error)
+
+    def open_first_page(self, diff_file, staged):
+        """在后台线程中打开差异并读取第一页"""
+        pager = self.git_ops.open_diff(diff_file, staged)
+        return pager, pager.next_page(self.PAGE_SIZE)
+
+    def on_first_page(self, generation, pager, lines):
+        if self.closed or generation != self.generation:
+            pager.close()
+            return
+        self.pager = pager
+        self.on_page(generation, lines)
+
+    def on_page(self, generation, lines):
+        if self.closed or generation != self.generation:
+            return
+        self.page_pending = False
+        self.append_lines(lines)
+        if self.pager.exhausted:
+            return
+        if self.pager.lines_read >= self.MAX_LINES:
+            self.append_lines([f"… 差异过长，只显示前 {self.pager.lines_read} 行"], tag="notice")
+            self.close_pager()
+
+    def load_next_page(self):
+        generation = self.generation
+        self.page_pending = True
+        self.scheduler.submit(self.pager.next_page, self.PAGE_SIZE, serial_key=self.serial_key,
+                              on_success=lambda lines: self.on_page(generation, lines),
+                              on_error=self.report_error)
+
+    def on_text_scroll(self, first, last):
+        """接近底部时继续读取下一页"""
+        self.text_scrollbar.set(first, last)
+        if self.pager and not self.pager.exhausted and not self.page_pending and float(last) >= 0.9:
+            self.load_next_page()
+
+    def show_summary(self, generation, stat, sizes):
+        if self.closed or generation != self.generation:
+            return
+        old_size, new_size = sizes
+        kind = "二进制文件" if stat.binary else f"超大差异（+{stat.added} -{stat.deleted} 行）"
+        before = format_size(old_size) if old_size is not None else "不存在"
+        after = format_size(new_size) if new_size is not None else "不存在"
+        self.set_text([f"{kind}，不显示内容", f"大小: {before} → {after}"], tag="notice")
+
+    def set_text(self, lines, tag=None):
+        self.text.configure(state=tk.NORMAL)
+        self.text.delete("1.0", tk.END)
+        self.text.configure(state=tk.DISABLED)
+        self.append_lines(lines, tag)
+
+    def append_lines(self, lines, tag=None):
+        self.text.configure(state=tk.NORMAL)
+        for line in lines:
+            line_tag = tag
+            if line_tag is None:
+                if line.startswith("@@"):
+                    line_tag = "hunk"
+                elif line.startswith(("diff --git", "index ", "--- ", "+++ ", "new file", "deleted file",
+                                      "similarity", "rename ", "old mode", "new mode", "Binary files")):
+                    line_tag = "meta"
+                elif line.startswith("+"):
+                    line_tag = "add"
+                elif line.startswith("-"):
+                    line_tag = "delete"
+            self.text.insert(tk.END, line + "\n", line_tag or ())
+        self.text.configure(state=tk.DISABLED)
+
+    # ---- 关闭 ----
+
+    def close_pager(self):
+        if self.pager:
+            # 在同一串行队列中关闭，避免与正在读取的页冲突
+            self.scheduler.submit(self.pager.close, serial_key=self.serial_key)
+            self.pager = None
+        self.page_pending = False
+
+    def report_error(self, error):
+        if not self.closed:
+            messagebox.showerror("错误", f"读取更改失败: {str(error)}", parent=self.window)
+
+    def close(self):
+        self.closed = True
+        self.close_pager()
+        self.window.destroy()
@@ -0,0 +1,185 @@
+"""fsmonitor 钩子和它读取的文件监视日志
+
+git 每次读取索引都会运行 core.fsmonitor 钩子，这个模块因此只依赖标准库中启动最快的部分。
+"""
+import os
+import sys
+import time
+
+JOURNAL_DIR = "gitgui-fsmonitor"
+# 日志超过该大小时重新开始（下一次查询回答“全部变化”）
+JOURNAL_LIMIT = 8 * 1024 * 1024
+HEARTBEAT_INTERVAL = 2
+HEARTBEAT_TIMEOUT = 10
+# 钩子等待监视线程确认同步文件的最长时间（秒），超时则让 git 完整扫描
+COOKIE_TIMEOUT = 1.0
+
+
+class FsmonitorJournal:
+    """工作区变化日志：由状态监视线程写入，fsmonitor 钩子和状态缓存读取
+
+    .git/gitgui-fsmonitor/ 下：
+        journal    第一行是本轮监视的编号，之后每条记录以 NUL 结尾：
+                   "P<路径>" 表示该路径有变化，"C<名称>" 表示监视线程已看到该同步文件
+        heartbeat  监视线程定期更新修改时间，过期说明监视已停止
+        cookies/   查询方在这里创建同步文件；监视线程确认它时，之前的所有变化都已写入日志
+    令牌格式为 gitgui:<编号>:<偏移>，编号变化或监视停止时回答“全部变化”。
+    """
+
+    def __init__(self, git_dir):
+        self.dir = os.path.join(git_dir, JOURNAL_DIR)
+        self.journal_path = os.path.join(self.dir, "journal")
+        self.heartbeat_path = os.path.join(self.dir, "heartbeat")
+        self.cookie_dir = os.path.join(self.dir, "cookies")
+        self.epoch = None
+        self._file = None
+        self._last_beat = 0
+
+    # ---- 写入（监视线程） ----
+
+    def open(self):
+        os.makedirs(self.cookie_dir, exist_ok=True)
+        for name in os.listdir(self.cookie_dir):
+            try:
+                os.remove(os.path.join(self.cookie_dir, name))
+            except OSError:
+                pass
+        self.reset()
+        self.beat(force=True)
+
+    def reset(self):
+        """开始新一轮日志，之前的令牌全部失效"""
+        if self._file:
+            self._file.close()
+        self.epoch = f"{time.time_ns():x}.{os.getpid()}"
+        # 先写临时文件再替换，读取方不会看到没有编号的日志
+        temp_path = self.journal_path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(self.epoch.encode() + b"\n")
+        os.replace(temp_path, self.journal_path)
+        self._file = open(self.journal_path, "ab")
+
+    def record(self, path):
+        self._file.write(b"P" + path + b"\0")
+
+    def ack(self, cookie):
+        self._file.write(b"C" + os.fsencode(cookie) + b"\0")
+
+    def flush(self):
+        self._file.flush()
+        if self._file.tell() > JOURNAL_LIMIT:
+            self.reset()
+
+    def beat(self, force=False):
+        now = time.monotonic()
+        if force or now - self._last_beat >= HEARTBEAT_INTERVAL:
+            self._last_beat = now
+            with open(self.heartbeat_path, "w") as f:
+                f.write(str(os.getpid()))
+
+    def close(self):
+        try:
+            os.remove(self.heartbeat_path)
+        except OSError:
+            pass
+        if self._file:
+            self._file.close()
+            self._file = None
+
+    # ---- 读取（钩子、状态缓存） ----
+
+    def alive(self):
+        try:
+            return time.time() - os.stat(self.heartbeat_path).st_mtime < HEARTBEAT_TIMEOUT
+        except OSError:
+            return False
+
+    def _read(self, start):
+        with open(self.journal_path, "rb") as f:
+            header = f.readline()
+            offset = max(start or 0, len(header))
+            f.seek(offset)
+            return header.rstrip(b"\n").decode(), offset, f.read()
+
+    def _sync(self, epoch, start, timeout):
+        """创建同步文件并等待监视线程确认
+
+        返回 (编号, 起始偏移, 确认处偏移, 其间的日志)；监视不可用或超时返回 None。
+        """
+        name = f"{os.getpid()}-{time.time_ns()}"
+        marker = b"C" + name.encode() + b"\0"
+        cookie = os.path.join(self.cookie_dir, name)
+        try:
+            current, offset, _ = self._read(None)
+            if current != epoch:
+                start = None
+            open(cookie, "wb").close()
+        except OSError:
+            return None
+        try:
+            deadline = time.monotonic() + timeout
+            while True:
+                current, offset, data = self._read(start)
+                if start is None:
+                    epoch, start = current, offset
+                if current != epoch:
+                    return None
+                index = data.find(marker)
+                # 记录边界上的标记才是确认（路径中不会有 NUL）
+                while index > 0 and data[index - 1] != 0:
+                    index = data.find(marker, index + 1)
+                if index >= 0:
+                    return epoch, start, start + index + len(marker), data[:index]
+                if time.monotonic() > deadline:
+                    return None
+                time.sleep(0.002)
+        except OSError:
+            return None
+        finally:
+            try:
+                os.remove(cookie)
+            except OSError:
+                pass
+
+    def changes_since(self, token, timeout=COOKIE_TIMEOUT):
+        """返回 (新令牌, 变化的路径列表)，路径列表为 None 表示应当作全部变化
+
+        监视未运行时返回 None。
+        """
+        if not self.alive():
+            return None
+        epoch = offset = None
+        parts = (token or "").split(":")
+        if len(parts) == 3 and parts[0] == "gitgui" and parts[2].isdigit():
+            epoch, offset = parts[1], int(parts[2])
+        synced = self._sync(epoch, offset, timeout)
+        if synced is None:
+            return None
+        new_epoch, start, end, data = synced
+        new_token = f"gitgui:{new_epoch}:{end}"
+        if new_epoch != epoch or start != offset:
+            return new_token, None
+        paths = []
+        seen = set()
+        for record in data.split(b"\0"):
+            if record[:1] == b"P" and record not in seen:
+                seen.add(record)
+                paths.append(record[1:])
+        return new_token, paths
+
+
+def run_hook(argv, git_dir):
+    """core.fsmonitor 钩子入口，argv 为 [钩子, 协议版本, 上次的令牌]"""
+    if len(argv) < 3 or argv[1] != "2":
+        # 只支持协议版本 2；钩子失败时 git 会自行完整扫描
+        return 1
+    result = FsmonitorJournal(git_dir).changes_since(argv[2])
+    out = sys.stdout.buffer
+    if result is None or result[1] is None:
+        token = result[0] if result else f"gitgui:none:{time.time_ns()}"
+        out.write(token.encode() + b"\0/\0")
+    else:
+        token, paths = result
+        out.write(token.encode() + b"\0" + b"".join(path + b"\0" for path in paths))
+    out.flush()
+    return 0
@@ -1,215 +1,973 @@
 # 设置 Git 可执行文件路径
-from utils import handle_exception, require_repo, find_git_executable
+from utils import handle_exception, require_repo, show_error
+from git_resolver import resolve_git, git_supports
 import os
-from tkinter import messagebox
-git_exe = find_git_executable()
-if git_exe:
-    os.environ['GIT_PYTHON_GIT_EXECUTABLE'] = git_exe
+git_info = resolve_git()
+if git_info:
+    os.environ['GIT_PYTHON_GIT_EXECUTABLE'] = git_info.path
 else:
-    messagebox.showerror("错误", "未找到 Git 可执行文件，请确保已安装 Git")
-from git import Repo
+    show_error("未找到 Git 可执行文件，请确保已安装 Git")
 from datetime import datetime
+import time
+import signal
+import functools
+import subprocess
+import threading
+import sqlite3
+from concurrent.futures import ThreadPoolExecutor
+from commit_index import CommitIndex, ReadCancelled, iter_nul_records
+from rollback import RollbackEngine
+from maintenance import RepoMaintenance
+from repo_state import RepoStateCache
+from git_pool import GitProcessPool
+from diff_reader import DiffReader
+from remote_sync import AheadBehindTracker
+from acceleration import WorktreeAcceleration
+from large_files import LargeFileRouter, LARGE_LFS, LARGE_GIT, LARGE_SKIP
+from lfs_filter import parse_pointer, POINTER_MAX_SIZE
+from status_engine import parse_porcelain_v1, parse_porcelain_v2, select_paths, normalize_directory
+from status_watcher import git_state_signature, tree_signature
+
+# 部分克隆的过滤方式：blob:none 按需下载文件内容，tree:0 连目录树也按需下载
+CLONE_FILTERS = ("blob:none", "tree:0")
+# 浅克隆每次向前加深的提交数
+HISTORY_DEEPEN = 200
+# 距上次成功抓取不超过这么多秒时，拉取只做本地的合并/变基
+PULL_FETCH_REUSE = 120
+# 推送到全部远程时同时进行的推送数
+PUSH_WORKERS = 3
+# 后台抓取超过这么多秒仍未结束时终止（网络挂起或远程无响应）
+BACKGROUND_FETCH_TIMEOUT = 120
+
+
+class OperationCancelled(Exception):
+    """操作被用户取消"""
+
+
+# 加载仓库后尚未创建的服务
+_UNOPENED = object()
+
+
+class _service:
+    """按需创建的仓库服务：加载仓库时只标记为未创建，第一次访问时才调用 _create_<名称> 创建
+
+    工作区批量查询状态时只用到状态缓存，不必为每个仓库打开提交索引、回退引擎等。
+    """
+
+    def __set_name__(self, owner, name):
+        self.name = name
+        self.attr = "_" + name
+
+    def __get__(self, obj, owner=None):
+        if obj is None:
+            return self
+        value = obj.__dict__.get(self.attr)
+        if value is _UNOPENED:
+            with obj._service_lock:
+                value = obj.__dict__[self.attr]
+                if value is _UNOPENED:
+                    value = getattr(obj, f"_create_{self.name}")()
+                    obj.__dict__[self.attr] = value
+        return value
+
+    def __set__(self, obj, value):
+        obj.__dict__[self.attr] = value
+
+
+# GitPython 在首次真正使用时才导入，导入时它会检查 git 可执行文件，放在启动阶段会拖慢窗口显示
+def _git_command_error(command, returncode, stderr):
+    from git import GitCommandError
+    return GitCommandError(command, returncode, stderr)
+
+
+@functools.lru_cache(maxsize=None)
+def _progress_parser_class():
+    from git import RemoteProgress
+
+    class ProgressParser(RemoteProgress):
+        """把 git 的进度输出转交给回调"""
+
+        def __init__(self, callback):
+            super().__init__()
+            self.callback = callback
+
+        def update(self, op_code, cur_count, max_count=None, message=''):
+            if self.callback:
+                self.callback(op_code, cur_count, max_count, message)
+
+    return ProgressParser
+
 
 class GitOperations:
+    commit_index = _service()
+    rollback_engine = _service()
+    maintenance = _service()
+    process_pool = _service()
+    diff_reader = _service()
+    acceleration = _service()
+    large_files = _service()
+
     def __init__(self):
         self.repo = None
         self.repo_path = None
+        # 按需创建服务时加锁，避免并发的后台任务各自创建一份
+        self._service_lock = threading.RLock()
+        # 上一次结构化状态的缓存：(stat签名, RepoStatus)
+        self._status_cache = None
+        # 提交元数据索引
+        self.commit_index = None
+        # 带快照的回退引擎
+        self.rollback_engine = None
+        # 提交图、多包索引等后台维护
+        self.maintenance = None
+        # HEAD、远程、用户信息等前置检查所需状态的缓存
+        self.state_cache = None
+        # 常驻的 cat-file 进程，用于对象和提交详情查询
+        self.process_pool = None
+        # 暂存区/工作区差异读取
+        self.diff_reader = None
+        # 领先/落后提交数的增量计算
+        self.ahead_behind = None
+        # 远程名 -> 上次成功抓取的时间（time.monotonic）
+        self.last_fetch = {}
+        # 未跟踪文件缓存、fsmonitor 等大工作区加速
+        self.acceleration = None
+        # 暂存前找出大文件并分流到 LFS 指针
+        self.large_files = None
+        # 状态缓存读取文件监视日志的位置，以及日志中出现变化的次数
+        self._journal_token = None
+        self._journal_version = 0
+        # 状态监视器运行时由它报告工作区变化（计数递增），状态查询不再遍历工作区
+        self._worktree_watched = False
+        self._worktree_version = 0
 
     def init_repo(self,path):
         """初始化仓库"""
-        if not self.repo_path:
-            messagebox.showerror("错误", "请先选择文件夹！")
+        if not path:
+            show_error("请先选择文件夹！")
             return
-        try:
-            self.repo = Repo.init(path)
-            self.repo_path = path
-        except Exception as e:
-            messagebox.showerror("错误", f"初始化失败: {str(e)}")
+        from git import Repo
+        self.repo = Repo.init(path)
+        self.repo_path = path
+        self._status_cache = None
+        self._open_services()
+
+    def clone_repo(self, url, path, depth=None, filter_spec=None, sparse_dirs=None,
+                   progress_callback=None, cancel_event=None):
+        """克隆远程仓库到 path 并加载
+
+        depth 为浅克隆深度（之后可用 deepen_history 按需加深）；filter_spec 为部分克隆过滤器，
+        见 CLONE_FILTERS；sparse_dirs 非空时只检出这些目录（cone 模式稀疏检出）。
+        """
+        if not url or not path:
+            raise Exception("请填写远程仓库链接和目标文件夹！")
+        target = os.path.abspath(path)
+        if os.path.isdir(target) and os.listdir(target):
+            raise Exception("目标文件夹不为空")
+        if filter_spec and filter_spec not in CLONE_FILTERS:
+            raise Exception(f"不支持的过滤方式: {filter_spec}")
+        if filter_spec and not git_supports('partial_clone'):
+            raise Exception("当前 git 版本不支持部分克隆，请升级 git")
+        directories = [d for d in (normalize_directory(d) for d in sparse_dirs or ()) if d]
+        if directories and not git_supports('sparse_checkout_cone'):
+            raise Exception("当前 git 版本不支持稀疏检出，请升级 git")
+
+        args = ["clone", "--progress"]
+        if depth:
+            args.append(f"--depth={int(depth)}")
+        if filter_spec:
+            args.append(f"--filter={filter_spec}")
+        if directories:
+            # 先只检出根目录下的文件，设置好目录后再检出所选目录
+            args.append("--sparse")
+        parent = os.path.dirname(target)
+        os.makedirs(parent, exist_ok=True)
+        self._run_remote_command(*args, "--", url, target, cwd=parent,
+                                 progress_callback=progress_callback, cancel_event=cancel_event)
+        if directories:
+            # 部分克隆时所选目录的文件内容在这一步才下载
+            self._run_remote_command("sparse-checkout", "init", "--cone", cwd=target, cancel_event=cancel_event)
+            self._run_remote_command("sparse-checkout", "set", "--", *directories, cwd=target,
+                                     progress_callback=progress_callback, cancel_event=cancel_event)
+        return self.load_repo(target)
 
     def load_repo(self, path):
         """加载已存在的仓库"""
+        from git import Repo
         self.repo = Repo(path)
         self.repo_path = path
+        self._status_cache = None
+        self._open_services()
         return self.repo
 
+    def _open_services(self):
+        """为当前仓库创建状态缓存；提交索引、回退引擎、维护、进程池等在第一次使用时才创建"""
+        self.close()
+        self.state_cache = RepoStateCache(self.repo)
+        self.ahead_behind = AheadBehindTracker(self.repo_path, self._git_executable())
+        self.last_fetch = {}
+        for name in ("commit_index", "rollback_engine", "maintenance", "process_pool", "diff_reader",
+                     "acceleration", "large_files"):
+            setattr(self, name, _UNOPENED)
+        self._journal_token = None
+
+    def _opened(self, name):
+        """已创建的服务，尚未创建时返回 None（不会触发创建）"""
+        value = self.__dict__.get("_" + name)
+        return None if value is _UNOPENED else value
+
+    def close(self):
+        """释放当前仓库占用的常驻进程和数据库连接（退出程序时调用）"""
+        process_pool = self._opened("process_pool")
+        if process_pool:
+            process_pool.close()
+        commit_index = self._opened("commit_index")
+        if commit_index:
+            commit_index.close()
+        self.commit_index = None
+
+    def _git_executable(self):
+        return self.repo.git.GIT_PYTHON_GIT_EXECUTABLE or "git"
+
+    def _create_commit_index(self):
+        """打开（或创建）当前仓库的提交索引，失败时返回 None，退回直接读取 git log"""
+        try:
+            return CommitIndex(self.repo_path, self._git_executable())
+        except sqlite3.Error:
+            return None
+
+    def _create_rollback_engine(self):
+        return RollbackEngine(self.repo_path, self._git_executable())
+
+    def _create_maintenance(self):
+        return RepoMaintenance(self.repo_path, self._git_executable())
+
+    def _create_process_pool(self):
+        return GitProcessPool(self.repo_path, self._git_executable())
+
+    def _create_diff_reader(self):
+        return DiffReader(self.repo_path, self._git_executable(), self.process_pool)
+
+    def _create_acceleration(self):
+        return WorktreeAcceleration(self.repo_path, self._git_executable())
+
+    def _create_large_files(self):
+        return LargeFileRouter(self.repo_path, self._git_executable())
+
+    def _reopen_commit_index(self):
+        """索引出错后关闭它，下一次使用时重新打开（版本不符时整体重建）"""
+        commit_index = self._opened("commit_index")
+        if commit_index:
+            commit_index.close()
+        self.commit_index = _UNOPENED
+
+    def _run_git(self, *args, input=None, env=None):
+        """在仓库目录下直接运行 git，返回标准输出（bytes）"""
+        command = [self.repo.git.GIT_PYTHON_GIT_EXECUTABLE or "git", *args]
+        if env:
+            env = dict(os.environ, **env)
+        result = subprocess.run(command, cwd=self.repo_path, input=input, env=env,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise _git_command_error(command, result.returncode, result.stderr)
+        return result.stdout
+
+    def watch_worktree(self, watched):
+        """状态监视器启动（True）或停止（False）时调用
+
+        监视期间工作区签名只看监视器报告变化的次数，不再在每次状态查询时遍历整个工作区。
+        """
+        self._worktree_watched = watched
+        self._worktree_version += 1
+
+    def worktree_changed(self):
+        """状态监视器检测到工作区变化时调用，下一次状态查询重新运行 git status"""
+        self._worktree_version += 1
+
+    def get_status(self):
+        """获取结构化的仓库状态；.git 中 index/HEAD/refs 与工作区签名未变化时直接返回缓存"""
+        # 先取签名再运行 git，期间发生的修改会在下一次查询时被发现
+        signature = (git_state_signature(self.repo_path), self._tree_signature())
+        if self._status_cache and self._status_cache[0] == signature:
+            return self._status_cache[1]
+
+        if git_supports('porcelain_v2'):
+            # 领先/落后数由 AheadBehindTracker 按两端提交缓存并增量计算，status 只需判断两端是否相同
+            extra = ["--no-ahead-behind"] if git_supports('no_ahead_behind') else []
+            output = self._run_git("--no-optional-locks", "status", "--porcelain=v2", "-z",
+                                   "--branch", "--untracked-files=all", *extra)
+            status = parse_porcelain_v2(output)
+            if status.ahead is None:
+                ahead, behind = self.ahead_behind.counts(status.oid, self._upstream_sha(status.upstream))
+                status = status._replace(ahead=ahead, behind=behind)
+        else:
+            output = self._run_git("status", "--porcelain", "-z", "--branch", "--untracked-files=all")
+            status = parse_porcelain_v1(output)
+        self._status_cache = (signature, status)
+        return status
+
+    def _tree_signature(self):
+        """工作区签名：文件监视日志可用时只看日志中有没有新的变化，状态监视器运行时看它报告的变化次数，
+        都没有时才 stat 整个工作区"""
+        journal = self.fsmonitor_journal()
+        if journal:
+            result = journal.changes_since(self._journal_token)
+            if result is not None:
+                token, paths = result
+                if paths or paths is None:
+                    self._journal_version += 1
+                self._journal_token = token
+                return "journal", self._journal_version
+        self._journal_token = None
+        if self._worktree_watched:
+            return "watcher", self._worktree_version
+        return tree_signature(self.repo_path)
+
+    def fsmonitor_journal(self):
+        """仓库使用本工具的 fsmonitor 钩子时返回文件监视日志，否则返回 None"""
+        if self.acceleration and self.repo_state().fsmonitor == self.acceleration.hook_path:
+            return self.acceleration.journal
+        return None
+
     @handle_exception("检查状态失败")
     def check_repo_status(self):
         """检查仓库状态并返回提示信息"""
+        return self.build_status_message()
+
+    def build_status_message(self):
+        """生成仓库状态提示信息（不弹窗，可在后台线程中调用）"""
         if not self.repo:
             return "请先选择或初始化Git仓库"
 
-        status = self.repo.git.status()
+        status = self.get_status()
         messages = []
 
-        if "Changes not staged for commit" in status and "Changes to be committed" in status:
+        if status.has_unstaged and status.has_staged:
             messages.append("有未暂存和待提交的更改，建议先执行'添加到暂存区'，再执行'提交更改'")
-        elif "Changes not staged for commit" in status:
+        elif status.has_unstaged:
             messages.append("工作区有未暂存的更改，建议执行'添加到暂存区'")
-        elif "Changes to be committed" in status:
+        elif status.has_staged:
             messages.append("暂存区有文件待提交，建议执行'提交更改'")
 
-        if "Your branch is ahead" in status:
-            messages.append("本地有未推送的提交，建议执行'推送到远程'")
+        if status.ahead:
+            messages.append(f"本地有 {status.ahead} 个未推送的提交，建议执行'推送到远程'")
 
-        if not self.repo.remotes:
+        if status.behind:
+            messages.append(f"远程有 {status.behind} 个新提交，建议执行'拉取更新'")
+
+        if not self.repo_state().remotes:
             messages.append("未配置远程仓库，建议添加GitHub仓库链接")
 
         return "\n".join(messages) if messages else "仓库状态正常"
 
     @require_repo
     def add_to_stage(self):
-        """添加未暂存的文件到暂存区"""
-        # 获取未暂存的文件列表
-        untracked = self.repo.untracked_files  # 未跟踪的文件
-        diff_index = self.repo.index.diff(None)  # 获取工作区和暂存区的差异
-        
-        # 分类处理不同状态的文件
-        modified = []  # 修改的文件
-        deleted = []   # 删除的文件
-        renamed = []   # 重命名/移动的文件
-        
-        for diff in diff_index:
-            if diff.deleted_file:
-                deleted.append(diff.a_path)
-            elif diff.renamed:
-                renamed.append((diff.a_path, diff.b_path))
+        """添加未暂存的文件到暂存区，返回各类文件的数量"""
+        return self.stage_matching()
+
+    @require_repo
+    def match_unstaged(self, include=None, exclude=None, directories=None):
+        """返回未暂存的更改中，位于所选目录内、匹配 include 且不匹配 exclude 的路径"""
+        entries = [entry for entry in self.get_status().entries
+                   if entry.kind == "untracked" or (entry.kind != "ignored" and entry.worktree != ".")]
+        return select_paths(entries, include, exclude, directories)
+
+    @require_repo
+    def find_large_files(self, include=None, exclude=None, directories=None):
+        """找出待暂存的更改中超过大小阈值、尚未使用 LFS 的文件
+
+        返回 {'files': [(路径, 字节数)], 'threshold': 阈值字节数, 'lfs': 能否转为 LFS 指针,
+              'lfs_configured': 是否已配置 filter.lfs（未配置时转为指针需要写入仓库配置）}
+        """
+        return {
+            'files': self.large_files.find_large(self.match_unstaged(include, exclude, directories)),
+            'threshold': self.large_files.threshold,
+            'lfs': self.large_files.available(),
+            'lfs_configured': self.large_files.filter_configured(),
+        }
+
+    @require_repo
+    def stage_matching(self, include=None, exclude=None, directories=None, large_files=LARGE_GIT,
+                       configure_lfs_filter=False):
+        """选择性暂存：只暂存匹配条件的未暂存更改，返回各类文件的数量
+
+        large_files 为超过阈值的大文件的处理方式：LARGE_GIT 照常暂存（默认，并在返回值的
+        'large' 中列出这些文件作为提醒）、LARGE_SKIP 不暂存、LARGE_LFS 转为 LFS 指针。
+        只有明确选择 LARGE_LFS 才会修改 .gitattributes；没有配置 filter.lfs（未安装 git-lfs）时
+        还需要 configure_lfs_filter=True 才会把内置过滤器写入仓库配置。
+        """
+        paths = self.match_unstaged(include, exclude, directories)
+        counts = {'added': 0, 'modified': 0, 'deleted': 0, 'renamed': 0, 'lfs': 0, 'skipped': 0, 'large': []}
+        large = [path for path, _ in self.large_files.find_large(paths)] if paths else []
+        if large and large_files == LARGE_SKIP:
+            skipped = set(large)
+            paths = [path for path in paths if path not in skipped]
+            counts['skipped'] = len(large)
+        elif large and large_files == LARGE_LFS:
+            # 内容在 git add 时由 clean 过滤器流式写入 .git/lfs，暂存区中只有指针
+            attributes = self.large_files.track(large, configure_filter=configure_lfs_filter)
+            if attributes not in paths:
+                paths.append(attributes)
+            counts['lfs'] = len(large)
+        elif large:
+            counts['large'] = large
+        if not paths:
+            return counts
+
+        self.stage_paths(paths)
+
+        # 暂存后由 git 判定新增/修改/删除/重命名（重命名检测只在暂存区中进行），
+        # 只需一次 diff --cached，不再重新计算整个状态
+        staged = set(paths)
+        fields = self._run_git("diff", "--cached", "--name-status", "-z", "-M").split(b"\0")
+        i = 0
+        while i < len(fields) - 1:
+            # 状态\0路径\0，重命名/复制为 R相似度\0原路径\0新路径\0
+            letter = fields[i][:1].decode()
+            names = [os.fsdecode(name) for name in fields[i + 1:i + (3 if letter in ("R", "C") else 2)]]
+            i += 1 + len(names)
+            if not staged.intersection(names):
+                continue
+            if letter in ("R", "C"):
+                counts['renamed'] += 1
+            elif letter == "A":
+                counts['added'] += 1
+            elif letter == "D":
+                counts['deleted'] += 1
+            elif letter in ("M", "T"):
+                counts['modified'] += 1
+        return counts
+
+    def stage_paths(self, paths):
+        """把一批路径一次性交给单个 git 进程暂存（包括新增、修改和删除）"""
+        data = b"\0".join(os.fsencode(path) for path in paths) + b"\0"
+        if git_supports('pathspec_from_file'):
+            # 路径按字面匹配，避免文件名中的 * ? 等被当作通配符
+            self._run_git("add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul",
+                          input=data, env={'GIT_LITERAL_PATHSPECS': '1'})
+        else:
+            self._run_git("update-index", "--add", "--remove", "-z", "--stdin", input=data)
+
+    @require_repo
+    def projected_push_size(self):
+        """估算提交暂存区后推送的数据量（字节）
+
+        unpushed 为尚未推送的提交中远程没有的对象（支持时按压缩后的磁盘大小），
+        staged 为暂存区相对 HEAD 新增的文件内容（未压缩），lfs 为其中 LFS 指针所指的内容，
+        这部分不会推送到 git 远程。
+        """
+        state = self.repo_state()
+        unpushed = 0
+        if state.head_valid:
+            # 没有远程跟踪分支时 --not --remotes 不排除任何提交，即整个历史都要推送
+            args = ["rev-list", "--objects", "HEAD", "--not", "--remotes"]
+            if git_supports('rev_list_disk_usage'):
+                unpushed = int(self._run_git(*args[:2], "--disk-usage", *args[2:]))
             else:
-                modified.append(diff.a_path)
-        
-        # 添加未跟踪的新文件
-        if untracked:
-            existing_untracked = [f for f in untracked if os.path.exists(os.path.join(self.repo_path, f))]
-            if existing_untracked:
-                self.repo.index.add(existing_untracked)
-        
-        # 添加修改的文件
-        if modified:
-            existing_modified = [f for f in modified if os.path.exists(os.path.join(self.repo_path, f))]
-            if existing_modified:
-                self.repo.index.add(existing_modified)
-        
-        # 处理删除的文件
-        if deleted:
-            self.repo.index.remove(deleted, working_tree=False)
-        
-        # 处理重命名/移动的文件
-        if renamed:
-            for old_path, new_path in renamed:
-                self.repo.index.remove([old_path], working_tree=False)
-                self.repo.index.add([new_path])
+                names = [line.split(b" ", 1)[0].decode() for line in self._run_git(*args).splitlines()]
+                unpushed = sum(info.size for info in self.process_pool.info_many(names).values() if info)
+
+        # :旧模式 新模式 旧sha 新sha 状态\0路径\0
+        output = self._run_git("diff", "--cached", "--raw", "-z", "--no-renames", "--no-abbrev")
+        blobs = []
+        for header in output.split(b"\0")[0::2]:
+            fields = header.split()
+            if len(fields) == 5 and fields[4] in (b"A", b"M", b"T") and fields[1] != b"160000":
+                blobs.append(fields[3].decode())
+        staged = lfs = 0
+        for info in self.process_pool.info_many(blobs).values():
+            if info is None:
+                continue
+            staged += info.size
+            if info.size <= POINTER_MAX_SIZE:
+                pointer = parse_pointer(self.process_pool.read(info.sha)[1] or b"")
+                if pointer:
+                    lfs += pointer[1]
+        return {'unpushed': unpushed, 'staged': staged, 'lfs': lfs, 'total': unpushed + staged}
 
     @require_repo
     def commit_changes(self, message):
-        """提交更改"""
-        return self.repo.index.commit(message)
+        """提交更改
+
+        通过 git commit 提交：GitPython 只能读写版本 2 的索引，开启索引版本 4 或拆分索引后
+        直接用它提交会失败或写出损坏的树。与之前一样，没有改动时也生成提交。
+        """
+        self._run_git("commit", "-q", "--allow-empty", "-F", "-", input=message.encode("utf-8"))
+        return self.repo.head.commit
 
     @require_repo
-    def add_remote(self, url):
-        """添加远程仓库"""
+    def add_remote(self, url, name="origin"):
+        """添加远程仓库；同名远程已存在时只修改它的链接"""
+        name = name.strip()
         try:
-            self.repo.delete_remote('origin')
-        except:
-            pass
-        return self.repo.create_remote('origin', url)
+            # 远程名会成为 refs/remotes/<name>，须符合引用名规则
+            self._run_git("check-ref-format", f"refs/remotes/{name}")
+        except Exception:
+            raise Exception(f"远程仓库名称不合法: {name!r}")
+        if name in self.repo_state().remotes:
+            remote = self.repo.remote(name)
+            remote.set_url(url)
+        else:
+            remote = self.repo.create_remote(name, url)
+        # 同一时钟刻度内的修改可能不改变 stat 签名，写配置后主动使缓存失效
+        self.state_cache.invalidate()
+        return remote
+
+    def _run_remote_command(self, *args, cwd=None, env=None, progress_callback=None, cancel_event=None,
+                            timeout=None):
+        """运行会访问远程的 git 命令（push/pull/clone 等），解析进度并支持中途取消
+
+        cwd 默认为当前仓库（克隆时仓库尚未加载，需要指定）。
+        progress_callback 的签名与 RemoteProgress.update 相同：(op_code, cur_count, max_count, message)
+        timeout 为秒数，超时后终止 git 进程并报错。
+        """
+        if cancel_event and cancel_event.is_set():
+            raise OperationCancelled()
+        git_executable = self.repo.git.GIT_PYTHON_GIT_EXECUTABLE if self.repo else None
+        command = [git_executable or os.environ.get('GIT_PYTHON_GIT_EXECUTABLE') or "git", *args]
+        if env:
+            env = dict(os.environ, **env)
+        # 有超时的命令放在单独的进程组中，超时后连同 ssh 等子进程一起终止
+        group = {}
+        if timeout:
+            if os.name == "nt":
+                group['creationflags'] = subprocess.CREATE_NEW_PROCESS_GROUP
+            else:
+                group['start_new_session'] = True
+        process = subprocess.Popen(command, cwd=cwd or self.repo_path, env=env,
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, **group)
+
+        def watch_cancel():
+            while process.poll() is None:
+                if cancel_event.wait(0.2):
+                    process.terminate()
+                    return
+
+        if cancel_event:
+            threading.Thread(target=watch_cancel, daemon=True).start()
+        timed_out = threading.Event()
+        timer = None
+        if timeout:
+            def kill():
+                timed_out.set()
+                if os.name == "nt":
+                    subprocess.run(["taskkill", "/F", "/T", "/PID", str(process.pid)],
+                                   stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+                else:
+                    try:
+                        os.killpg(process.pid, signal.SIGKILL)
+                    except OSError:
+                        pass
+            timer = threading.Timer(timeout, kill)
+            timer.daemon = True
+            timer.start()
+
+        parser = _progress_parser_class()(progress_callback)
+        pending = b""
+        while True:
+            chunk = process.stderr.read1(4096)
+            if not chunk:
+                break
+            # 进度行以 \r 刷新，普通输出以 \n 结束
+            lines = (pending + chunk).replace(b"\r", b"\n").split(b"\n")
+            pending = lines.pop()
+            for line in lines:
+                if line:
+                    parser._parse_progress_line(line.decode("utf-8", "replace"))
+        if pending:
+            parser._parse_progress_line(pending.decode("utf-8", "replace"))
+        process.stderr.close()
+        returncode = process.wait()
+        if timer:
+            timer.cancel()
+
+        if cancel_event and cancel_event.is_set():
+            raise OperationCancelled()
+        if timed_out.is_set():
+            raise Exception(f"git {args[0]} 超过 {timeout} 秒没有完成，已终止")
+        if returncode != 0:
+            raise _git_command_error(command, returncode, "\n".join(parser.error_lines + parser.other_lines))
 
     @require_repo
-    def push_to_remote(self, progress_callback=None):
-        """推送到远程仓库"""
-        if 'origin' not in [remote.name for remote in self.repo.remotes]:
-            raise Exception("未配置远程仓库")
+    def push_to_remote(self, progress_callback=None, cancel_event=None, remote="origin", env=None):
+        """推送到远程仓库；env 为附加的环境变量（例如 non_interactive_env()）"""
+        state = self.repo_state()
+        if remote not in state.remotes:
+            raise Exception("未配置远程仓库" if remote == "origin" else f"远程仓库 {remote} 不存在")
 
-        if not any(self.repo.iter_commits()):
+        if not state.head_valid:
             raise Exception("仓库中没有提交记录")
 
-        origin = self.repo.remote('origin')
-        
-        def progress_handler(op_code, cur_count, max_count=None, message=''):
-            if progress_callback:
-                progress = (cur_count / max_count * 100) if max_count else 0
-                progress_callback(progress, message)
-        
-        return origin.push(self.repo.active_branch, progress=progress_handler)
+        if not state.branch:
+            raise Exception("当前不在任何分支上，无法推送")
+
+        self._run_remote_command("push", "--progress", remote, state.branch, env=env,
+                                 progress_callback=progress_callback, cancel_event=cancel_event)
+
+    @require_repo
+    def push_to_all(self, progress_callbacks=None, cancel_events=None, on_remote_done=None,
+                    max_workers=PUSH_WORKERS):
+        """同时推送到所有远程仓库，返回 {远程名: 异常或 None}
+
+        最多 max_workers 个推送同时进行；每个远程有各自的进度回调和取消事件（按远程名传入），
+        某个远程失败或很慢不影响其他远程。on_remote_done(远程名, 异常或 None) 在每个远程
+        结束时于工作线程中调用。
+        """
+        remotes = list(self.repo_state().remotes)
+        if not remotes:
+            raise Exception("未配置远程仓库")
+        progress_callbacks = progress_callbacks or {}
+        cancel_events = cancel_events or {}
+
+        def push(name):
+            try:
+                self.push_to_remote(progress_callbacks.get(name), cancel_events.get(name), remote=name)
+                error = None
+            except Exception as e:
+                error = e
+            if on_remote_done:
+                on_remote_done(name, error)
+            return error
+
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(remotes)), thread_name_prefix="git-push") as pool:
+            futures = {name: pool.submit(push, name) for name in remotes}
+            return {name: future.result() for name, future in futures.items()}
+
+    @require_repo
+    def pull_from_remote(self, progress_callback=None, cancel_event=None, env=None):
+        """从远程仓库拉取更新；刚抓取过时只做本地的合并/变基"""
+        state = self.repo_state()
+        if 'origin' not in state.remotes:
+            raise Exception("未配置远程仓库")
+
+        fetched_at = self.last_fetch.get('origin')
+        if (state.upstream and state.upstream.startswith("origin/") and fetched_at is not None
+                and time.monotonic() - fetched_at < PULL_FETCH_REUSE):
+            self._run_remote_command(*self._integrate_args(state), env=env, cancel_event=cancel_event)
+            return
+
+        self._run_remote_command("pull", "--progress", "origin", env=env,
+                                 progress_callback=progress_callback, cancel_event=cancel_event)
+        self.last_fetch['origin'] = time.monotonic()
+
+    def _integrate_args(self, state):
+        """按 branch.<name>.rebase、pull.rebase 和 pull.ff 配置，生成把上游并入当前分支的命令"""
+        reader = self.repo.config_reader()
+
+        def config(section, option):
+            return str(reader.get_value(section, option, "")).lower()
+
+        rebase = config(f'branch "{state.branch}"', "rebase") or config("pull", "rebase")
+        if rebase in ("true", "yes", "on", "1", "merges", "m", "interactive", "i"):
+            return ["rebase", *(["--rebase-merges"] if rebase in ("merges", "m") else []), "@{upstream}"]
+        ff = config("pull", "ff")
+        ff_args = ["--ff-only"] if ff == "only" else ["--no-ff"] if ff in ("false", "no", "off", "0") else []
+        return ["merge", "--no-edit", *ff_args, "@{upstream}"]
 
     @require_repo
-    def pull_from_remote(self, progress_callback=None):
-        """从远程仓库拉取更新"""
-        if 'origin' not in [remote.name for remote in self.repo.remotes]:
+    def fetch_from_remote(self, progress_callback=None, cancel_event=None, env=None):
+        """从远程仓库抓取更新（只更新远程跟踪分支，不修改工作区）"""
+        if 'origin' not in self.repo_state().remotes:
             raise Exception("未配置远程仓库")
-        
-        origin = self.repo.remote('origin')
-        
-        def progress_handler(op_code, cur_count, max_count=None, message=''):
-            if progress_callback:
-                progress = (cur_count / max_count * 100) if max_count else 0
-                progress_callback(progress, message)
-        
-        return origin.pull(progress=progress_handler)
+
+        self._run_remote_command("fetch", "--progress", "origin", env=env,
+                                 progress_callback=progress_callback, cancel_event=cancel_event)
+        self.last_fetch['origin'] = time.monotonic()
+
+    def non_interactive_env(self):
+        """无人值守运行远程命令（后台抓取、工作区批量操作）时的环境变量：需要输入密码、口令或
+        确认主机密钥时直接失败，不弹出提示
+
+        用户自己指定了 SSH 程序（GIT_SSH_COMMAND、GIT_SSH 或 core.sshCommand，可能是 plink 等）时
+        不覆盖它，只靠 askpass 设置阻止提示。
+        """
+        env = {
+            "GIT_TERMINAL_PROMPT": "0",
+            # askpass 指向必然失败的命令，已保存的凭据仍然可用
+            "GIT_ASKPASS": "false",
+            "SSH_ASKPASS": "false",
+            "GCM_INTERACTIVE": "never",
+        }
+        custom_ssh = (os.environ.get("GIT_SSH_COMMAND") or os.environ.get("GIT_SSH")
+                      or self.repo.config_reader().get_value("core", "sshCommand", ""))
+        if not custom_ssh:
+            # 默认的 ssh 不询问口令和主机密钥
+            env["GIT_SSH_COMMAND"] = "ssh -o BatchMode=yes"
+        return env
+
+    @require_repo
+    def background_fetch(self, timeout=BACKGROUND_FETCH_TIMEOUT, cancel_event=None):
+        """后台定时抓取当前分支上游所在的远程（默认 origin），不弹出认证提示
+
+        需要输入密码、口令或确认主机密钥时直接失败，超过 timeout 秒时终止。没有可抓取的远程时返回 False。
+        """
+        state = self.repo_state()
+        remote = state.upstream.split("/", 1)[0] if state.upstream else "origin"
+        if remote not in state.remotes:
+            return False
+        args = ["fetch", "--quiet"]
+        if git_supports('no_write_fetch_head'):
+            # 可能与用户的拉取同时运行，不覆盖拉取正要合并的 FETCH_HEAD
+            args.append("--no-write-fetch-head")
+        self._run_remote_command(*args, remote, env=self.non_interactive_env(), timeout=timeout,
+                                 cancel_event=cancel_event)
+        self.last_fetch[remote] = time.monotonic()
+        return True
+
+    def _upstream_sha(self, upstream):
+        """上游分支（例如 origin/main）指向的提交，优先直接读取引用文件"""
+        from git.refs.symbolic import SymbolicReference
+        for ref in (f"refs/remotes/{upstream}", f"refs/heads/{upstream}"):
+            try:
+                return SymbolicReference.dereference_recursive(self.repo, ref)
+            except (ValueError, OSError):
+                continue
+        return self._run_git("rev-parse", "--verify", "@{upstream}").decode().strip()
+
+    def _shallow_commits(self):
+        """浅克隆中历史被截断处的提交（记录在 .git/shallow 中），完整仓库返回空列表"""
+        try:
+            with open(os.path.join(self.repo.git_dir, "shallow")) as f:
+                return f.read().split()
+        except OSError:
+            return []
+
+    @require_repo
+    def history_truncated(self, since=None):
+        """浅克隆的截断处是否仍在 since 之后，即该时间范围内可能还有未下载的提交"""
+        boundary = self._shallow_commits()
+        if not boundary:
+            return False
+        if since is None:
+            return True
+        times = self._run_git("log", "--no-walk", "--format=%ct", *boundary).split()
+        return any(int(ctime) >= since.timestamp() for ctime in times)
+
+    @require_repo
+    def deepen_history(self, count=HISTORY_DEEPEN, progress_callback=None, cancel_event=None):
+        """把浅克隆的历史向前加深 count 个提交，返回加深后是否仍是浅克隆"""
+        boundary = self._shallow_commits()
+        if not boundary:
+            return False
+        if 'origin' not in self.repo_state().remotes:
+            raise Exception("未配置远程仓库")
+
+        self._run_remote_command("fetch", "--progress", f"--deepen={int(count)}", "origin",
+                                 progress_callback=progress_callback, cancel_event=cancel_event)
+        if self.commit_index:
+            try:
+                self.commit_index.extend(boundary)
+            except sqlite3.Error:
+                self._reopen_commit_index()
+        return bool(self._shallow_commits())
 
     @require_repo
     def get_commit_history(self, since=None):
         """获取提交历史"""
-        if not self.repo:
-            return []
-        
         commits = []
+        for page in self.iter_commit_history(since=since):
+            commits.extend(page)
+        return commits
+
+    def iter_commit_history(self, since=None, page_size=200, after=None, cancel_event=None):
+        """按页读取提交历史（从新到旧），每次产出一页提交记录
+
+        after 为上一次读到的最后一个提交 ID，给出时从它之后继续读取（加深浅克隆后接着显示）。
+        cancel_event 被设置时终止正在写索引或读取历史的 git log，并抛出 OperationCancelled。
+        """
+        if not self.repo:
+            return
+        if self.commit_index:
+            try:
+                self.commit_index.refresh(self._head_sha(), cancel_event)
+                rows_pages = self.commit_index.iter_pages(since=since, page_size=page_size, after=after)
+            except ReadCancelled:
+                raise OperationCancelled()
+            except sqlite3.Error:
+                rows_pages = None
+            if rows_pages is not None:
+                for rows in rows_pages:
+                    yield [self._commit_record(sha, ctime, author, subject)
+                           for sha, ctime, author, subject in rows]
+                return
+
+        # 没有索引时直接流式读取 git log
+        command = [self.repo.git.GIT_PYTHON_GIT_EXECUTABLE or "git", "log", "-z", "--topo-order",
+                   "--format=%H%x00%ct%x00%an%x00%s"]
+        if since:
+            command.append(f"--since=@{int(since.timestamp())}")
+        page = []
+        skipping = after is not None
         try:
-            # 如果指定了时间范围，则按时间范围获取提交记录
-            if since:
-                for commit in self.repo.iter_commits(since=since):
-                    commits.append({
-                        'id': commit.hexsha,
-                        'date': datetime.fromtimestamp(commit.committed_date),
-                        'message': commit.message,
-                        'author': commit.author.name
-                    })
-            else:
-                # 默认获取所有提交记录
-                for commit in self.repo.iter_commits():
-                    commits.append({
-                        'id': commit.hexsha,
-                        'date': datetime.fromtimestamp(commit.committed_date),
-                        'message': commit.message,
-                        'author': commit.author.name
-                    })
-            return commits
-        except Exception:
-            return []
+            for sha, ctime, author, subject in iter_nul_records(command, self.repo_path, 4, cancel_event):
+                if skipping:
+                    skipping = sha != after
+                    continue
+                page.append(self._commit_record(sha, ctime, author, subject))
+                if len(page) >= page_size:
+                    yield page
+                    page = []
+        except ReadCancelled:
+            raise OperationCancelled()
+        if page:
+            yield page
+
+    @staticmethod
+    def _commit_record(sha, ctime, author, subject):
+        return {
+            'id': sha,
+            'date': datetime.fromtimestamp(int(ctime)),
+            'message': subject,
+            'author': author
+        }
+
+    def _head_sha(self):
+        """当前 HEAD 指向的提交（直接读取引用文件，不启动子进程）"""
+        return self.repo_state().head_sha
+
+    def repo_state(self):
+        """返回缓存的仓库状态快照；HEAD、引用和配置文件未变化时不做任何读取"""
+        return self.state_cache.get()
+
+    @require_repo
+    def get_commit_details(self, commit_id):
+        """读取提交的完整信息（作者、邮箱、父提交和完整提交说明），复用常驻 cat-file 进程"""
+        info, data = self.process_pool.read(commit_id)
+        if info is None or info.type != "commit":
+            raise Exception(f"找不到提交 {commit_id}")
+        header, _, message = data.decode("utf-8", "replace").partition("\n\n")
+        details = {'id': info.sha, 'parents': [], 'message': message.strip()}
+        for line in header.splitlines():
+            key, _, value = line.partition(" ")
+            if key == "parent":
+                details['parents'].append(value)
+            elif key in ("author", "committer"):
+                # 格式：姓名 <邮箱> 时间戳 时区
+                name, _, rest = value.partition(" <")
+                email, _, stamp = rest.partition("> ")
+                details[key] = name
+                details[f'{key}_email'] = email
+                details[f'{key}_date'] = datetime.fromtimestamp(int(stamp.split()[0]))
+        return details
+
+    @require_repo
+    def read_file_at(self, revision, path):
+        """读取某个版本中的文件内容（bytes），文件不存在时返回 None"""
+        info, data = self.process_pool.read(f"{revision}:{path}")
+        return data if info is not None and info.type == "blob" else None
+
+    @require_repo
+    def get_object_sizes(self, names):
+        """批量查询对象大小，返回 {对象名: 字节数或 None}"""
+        infos = self.process_pool.info_many(names)
+        return {name: info.size if info else None for name, info in infos.items()}
+
+    @require_repo
+    def list_changed_files(self, staged=False):
+        """列出暂存区（staged=True）或工作区的变更文件"""
+        untracked = [] if staged else [entry.path for entry in self.get_status().untracked]
+        return self.diff_reader.list_files(staged, untracked)
+
+    @require_repo
+    def get_diff_stats(self, staged=False):
+        """返回 {路径: DiffStat}，用于识别二进制和超大文件"""
+        untracked = [] if staged else [entry.path for entry in self.get_status().untracked]
+        return self.diff_reader.stats(staged, untracked)
+
+    @require_repo
+    def get_diff_sizes(self, diff_file, staged=False):
+        """二进制或超大文件修改前后的大小"""
+        return self.diff_reader.sizes(diff_file, staged)
+
+    @require_repo
+    def open_diff(self, diff_file, staged=False):
+        """打开单个文件的流式差异读取器（DiffPager）"""
+        return self.diff_reader.open(diff_file, staged)
 
     @require_repo
     def rollback_to_commit(self, commit_id):
-        """回退到指定提交"""
-        self.repo.git.reset('--hard', commit_id)
+        """回退到指定提交；回退前自动快照暂存区和工作区，返回快照记录"""
+        return self.rollback_engine.rollback(commit_id)
+
+    @require_repo
+    def undo_rollback(self, snapshot_id=None):
+        """撤销回退：恢复快照（默认最新的一个），返回被恢复的快照记录"""
+        entry, _ = self.rollback_engine.restore(snapshot_id)
+        return entry
+
+    @require_repo
+    def get_rollback_snapshots(self):
+        """返回撤销栈中的快照记录，最新的在最后"""
+        return self.rollback_engine.load_stack()
+
+    @require_repo
+    def inspect_maintenance(self):
+        """检查提交图、多包索引和松散对象，返回检测结果及建议的维护任务"""
+        return self.maintenance.inspect()
+
+    @require_repo
+    def run_maintenance(self, tasks=None, cancel_event=None):
+        """执行维护任务，返回包含历史和状态查询前后耗时的报告"""
+        report = self.maintenance.run(tasks, cancel_event=cancel_event)
+        # 打包会改变 .git 中的文件，状态缓存的签名随之失效，这里显式清空以免误判
+        self._status_cache = None
+        return report
+
+    @require_repo
+    def inspect_acceleration(self):
+        """检查未跟踪文件缓存、fsmonitor、索引版本 4 和拆分索引是否开启并生效"""
+        return self.acceleration.inspect()
+
+    @require_repo
+    def enable_acceleration(self, features=None):
+        """开启状态加速（默认为当前 git 支持的全部功能），返回包含开启前耗时的报告"""
+        report = self.acceleration.start(features)
+        self._status_cache = None
+        self.state_cache.invalidate()
+        return report
+
+    @require_repo
+    def disable_acceleration(self, features=None):
+        """关闭状态加速，返回包含关闭前耗时的报告"""
+        report = self.acceleration.start(features, enabled=False)
+        self._status_cache = None
+        self.state_cache.invalidate()
+        return report
+
+    @require_repo
+    def finish_acceleration_report(self, report):
+        """在开启/关闭后重新检测和计时，补全报告"""
+        return self.acceleration.finish(report)
 
     @require_repo
     def check_git_config(self):
         """检查Git配置"""
-        try:
-            return {
-                'name': self.repo.git.config('user.name'),
-                'email': self.repo.git.config('user.email')
-            }
-        except:
+        state = self.repo_state()
+        if not state.user_name or not state.user_email:
             return None
+        return {
+            'name': state.user_name,
+            'email': state.user_email
+        }
 
     @require_repo
     def set_git_config(self, name, email):
         """设置Git配置"""
         self.repo.git.config('--global', 'user.name', name)
         self.repo.git.config('--global', 'user.email', email)
+        self.state_cache.invalidate()
 
     @require_repo
     def get_remotes(self):
         """获取远程仓库列表"""
-        return [remote.name for remote in self.repo.remotes]
+        return list(self.repo_state().remotes)
+
+    @require_repo
+    def get_remote_urls(self):
+        """获取所有远程仓库：{远程名: URL}"""
+        return dict(self.repo_state().remotes)
 
     @require_repo
     def get_remote_url(self):
         """获取远程仓库URL"""
-        try:
-            if self.repo and self.repo.remotes:
-                origin = self.repo.remote('origin')
-                if origin.urls:
-                    return next(origin.urls)
-        except:
-            pass
-        return ""
\ No newline at end of file
+        return self.repo_state().remotes.get('origin', "")
\ No newline at end of file
@@ -0,0 +1,152 @@
+import threading
+import subprocess
+import contextlib
+from typing import NamedTuple
+
+BATCH = "--batch"
+BATCH_CHECK = "--batch-check"
+
+
+class ObjectInfo(NamedTuple):
+    """cat-file 返回的对象信息"""
+    sha: str
+    type: str
+    size: int
+
+
+class _BatchProcess:
+    """一个常驻的 `git cat-file --batch` 或 `--batch-check` 进程"""
+
+    def __init__(self, git_executable, repo_path, mode):
+        self.mode = mode
+        self.process = subprocess.Popen([git_executable, "cat-file", mode], cwd=repo_path,
+                                        stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                                        stderr=subprocess.DEVNULL)
+
+    @property
+    def alive(self):
+        return self.process.poll() is None
+
+    def _send(self, names):
+        for name in names:
+            if "\n" in name:
+                raise ValueError(f"对象名不能包含换行: {name!r}")
+        self.process.stdin.write("".join(f"{name}\n" for name in names).encode("utf-8"))
+        self.process.stdin.flush()
+
+    def _read_response(self):
+        header = self.process.stdout.readline()
+        if not header:
+            raise EOFError("cat-file 进程意外退出")
+        parts = header.decode("utf-8", "replace").split()
+        # 对象不存在时输出 "<name> missing"（或 ambiguous），对象名本身可能含空格，只能看最后一项
+        if not parts or parts[-1] in ("missing", "ambiguous"):
+            return None, None
+        if len(parts) != 3 or not parts[2].isdigit():
+            raise EOFError(f"无法解析 cat-file 输出: {header!r}")
+        info = ObjectInfo(parts[0], parts[1], int(parts[2]))
+        if self.mode != BATCH:
+            return info, None
+        data = self.process.stdout.read(info.size)
+        self.process.stdout.read(1)  # 内容后的换行
+        return info, data
+
+    def request(self, name):
+        self._send([name])
+        return self._read_response()
+
+    def request_many(self, names):
+        """批量发送再批量读取，省去逐个往返；只用于 --batch-check，输出小不会塞满管道"""
+        self._send(names)
+        return [self._read_response()[0] for _ in names]
+
+    def close(self):
+        try:
+            # 关闭标准输入后 cat-file 会自行退出
+            self.process.stdin.close()
+        except OSError:
+            pass
+        try:
+            self.process.wait(timeout=2)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+        self.process.stdout.close()
+
+
+class GitProcessPool:
+    """每个仓库一组常驻的 cat-file 进程，供对象、文件内容和提交详情查询复用
+
+    每种模式最多 size 个进程，并发查询各自借用一个；进程退出或读写出错时丢弃并重建，
+    查询重试一次。关闭仓库或退出程序时调用 close() 结束所有进程。
+    """
+
+    CHUNK = 256
+
+    def __init__(self, repo_path, git_executable="git", size=2):
+        self.repo_path = repo_path
+        self.git_executable = git_executable
+        self._lock = threading.Lock()
+        self._idle = {BATCH: [], BATCH_CHECK: []}
+        self._slots = {BATCH: threading.BoundedSemaphore(size), BATCH_CHECK: threading.BoundedSemaphore(size)}
+        self._closed = False
+        self.started = 0  # 累计启动的进程数，用于观察复用效果
+
+    @contextlib.contextmanager
+    def _borrow(self, mode):
+        with self._slots[mode]:
+            with self._lock:
+                if self._closed:
+                    raise Exception("进程池已关闭")
+                process = self._idle[mode].pop() if self._idle[mode] else None
+                if process is None or not process.alive:
+                    # 健康检查：已退出的进程直接替换
+                    if process is not None:
+                        process.close()
+                    process = _BatchProcess(self.git_executable, self.repo_path, mode)
+                    self.started += 1
+            try:
+                yield process
+            except Exception:
+                # 出错的进程状态不可信，不再放回池中
+                process.close()
+                raise
+            with self._lock:
+                if self._closed:
+                    process.close()
+                else:
+                    self._idle[mode].append(process)
+
+    def _call(self, mode, method, *args):
+        try:
+            with self._borrow(mode) as process:
+                return getattr(process, method)(*args)
+        except (OSError, EOFError):
+            # 进程在两次查询之间退出（如仓库被 gc），换一个新进程重试一次
+            with self._borrow(mode) as process:
+                return getattr(process, method)(*args)
+
+    def info(self, name):
+        """查询对象类型和大小，对象不存在时返回 None"""
+        return self._call(BATCH_CHECK, "request", name)[0]
+
+    def info_many(self, names):
+        """批量查询，返回 {对象名: ObjectInfo 或 None}"""
+        names = list(names)
+        result = {}
+        for start in range(0, len(names), self.CHUNK):
+            chunk = names[start:start + self.CHUNK]
+            result.update(zip(chunk, self._call(BATCH_CHECK, "request_many", chunk)))
+        return result
+
+    def read(self, name):
+        """读取对象内容，返回 (ObjectInfo, bytes)；对象不存在时返回 (None, None)"""
+        return self._call(BATCH, "request", name)
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            processes = self._idle[BATCH] + self._idle[BATCH_CHECK]
+            self._idle = {BATCH: [], BATCH_CHECK: []}
+        for process in processes:
+            process.close()
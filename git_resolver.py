@@ -0,0 +1,125 @@
+import os
+import re
+import sys
+import subprocess
+import configparser
+from typing import Dict, NamedTuple, Tuple
+
+from utils import find_git_executable, load_cache, save_cache
+
+# 配置文件放在本工具所在目录（打包后为可执行文件所在目录），与启动时的当前目录无关
+TOOL_DIR = os.path.dirname(os.path.abspath(sys.executable if getattr(sys, "frozen", False) else __file__))
+CONFIG_FILE = os.path.join(TOOL_DIR, "config.ini")
+
+# 各功能最早出现的 git 版本
+FEATURE_VERSIONS = {
+    'porcelain_v2': (2, 11),            # git status --porcelain=v2
+    'no_ahead_behind': (2, 17),         # git status --no-ahead-behind
+    'commit_graph': (2, 18),            # git commit-graph write
+    'partial_clone': (2, 19),           # clone/fetch --filter
+    'pathspec_from_file': (2, 25),      # git add --pathspec-from-file
+    'sparse_checkout_cone': (2, 25),    # git sparse-checkout --cone
+    'fsmonitor_hook_v2': (2, 26),       # core.fsmonitorHookVersion 2
+    'no_write_fetch_head': (2, 29),     # git fetch --no-write-fetch-head
+    'maintenance': (2, 30),             # git maintenance run --task=...
+    'cat_file_batch_command': (2, 36),  # git cat-file --batch-command
+    'rev_list_disk_usage': (2, 31),     # git rev-list --disk-usage
+    'untracked_cache': (2, 8),          # core.untrackedCache
+    'split_index': (2, 9),              # core.splitIndex
+}
+
+
+class GitInfo(NamedTuple):
+    """git 可执行文件及其能力表"""
+    path: str
+    version: Tuple[int, ...]
+    version_string: str
+    capabilities: Dict[str, bool]
+
+    def supports(self, feature):
+        return self.capabilities.get(feature, False)
+
+
+def parse_version(output):
+    """从 `git --version` 输出中取出版本号，例如 (2, 39, 5)"""
+    match = re.search(r"(\d+)\.(\d+)(?:\.(\d+))?", output)
+    if not match:
+        return (0, 0, 0)
+    return tuple(int(part or 0) for part in match.groups())
+
+
+def build_capabilities(version):
+    capabilities = {name: version >= required for name, required in FEATURE_VERSIONS.items()}
+    # 内置 fsmonitor 守护进程只在 Windows 和 macOS 上可用
+    capabilities['fsmonitor_daemon'] = version >= (2, 36) and sys.platform in ("win32", "darwin")
+    return capabilities
+
+
+def configured_git_path():
+    """读取配置文件 config.ini 中 [git] executable 指定的路径"""
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(CONFIG_FILE, encoding="utf-8")
+    except configparser.Error:
+        return None
+    return parser.get("git", "executable", fallback=None) or None
+
+
+def _discover(override):
+    if override:
+        return override if os.path.isfile(override) else None
+    env_path = os.environ.get("GIT_PYTHON_GIT_EXECUTABLE")
+    if env_path and os.path.isfile(env_path):
+        return env_path
+    return find_git_executable()
+
+
+_git_info = None
+
+
+def resolve_git():
+    """查找 git 并返回 GitInfo，找不到时返回 None
+
+    查找顺序：config.ini 覆盖 > GIT_PYTHON_GIT_EXECUTABLE > 注册表/常见路径（Windows）> PATH。
+    结果（含 `git --version` 的能力表）缓存在磁盘上，git 可执行文件修改时间变化后重新探测。
+    """
+    global _git_info
+    if _git_info:
+        return _git_info
+
+    override = configured_git_path()
+    source = override or os.environ.get("GIT_PYTHON_GIT_EXECUTABLE") or ""
+    cached = load_cache("git.json")
+    if cached and cached.get("source") == source:
+        try:
+            if os.stat(cached["path"]).st_mtime_ns == cached["mtime"]:
+                version = tuple(cached["version"])
+                _git_info = GitInfo(cached["path"], version, cached["version_string"], build_capabilities(version))
+                return _git_info
+        except (OSError, KeyError, TypeError):
+            pass
+
+    git_path = _discover(override)
+    if not git_path:
+        return None
+    try:
+        result = subprocess.run([git_path, "--version"], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+    except OSError:
+        return None
+    version_string = result.stdout.decode(errors="replace").strip()
+    version = parse_version(version_string)
+    save_cache("git.json", {
+        "source": source,
+        "path": git_path,
+        "mtime": os.stat(git_path).st_mtime_ns,
+        "version": list(version),
+        "version_string": version_string
+    })
+    _git_info = GitInfo(git_path, version, version_string, build_capabilities(version))
+    return _git_info
+
+
+def git_supports(feature):
+    """当前 git 是否支持某个功能；未找到 git 时返回 False"""
+    info = resolve_git()
+    return bool(info and info.supports(feature))
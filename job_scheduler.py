@@ -0,0 +1,169 @@
+import sys
+import queue
+import threading
+import collections
+from concurrent.futures import ThreadPoolExecutor
+
+import tracing
+
+
+class JobCancelled(Exception):
+    """任务在执行前或执行中被取消"""
+
+
+class Job:
+    """提交给调度器的一个后台任务"""
+
+    def __init__(self, fn, args, kwargs, serial_key, on_success, on_error, on_start, cancellable=False):
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.serial_key = serial_key
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_start = on_start
+        # 调用方已给 fn 传入 cancel_event（例如进度条的取消按钮）时沿用它，取消任务即终止 git 进程；
+        # cancellable=True 时把任务自己的取消事件作为 cancel_event 参数传给 fn
+        self.cancel_event = kwargs.get("cancel_event") or threading.Event()
+        if cancellable:
+            kwargs["cancel_event"] = self.cancel_event
+        self.started = False
+        self.done = False
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def cancel(self):
+        """取消任务：尚未开始的不再执行，已开始的结果被丢弃"""
+        self.cancel_event.set()
+
+
+class JobScheduler:
+    """后台任务调度器
+
+    任务在有界线程池中执行；serial_key 相同的任务按提交顺序逐个执行（用于同一仓库的写操作），
+    没有 serial_key 的只读查询可以并发。回调统一通过 root.after 在 Tk 主线程中执行。
+    """
+
+    def __init__(self, root, max_workers=4, poll_interval=30):
+        self.root = root
+        self.poll_interval = poll_interval
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="git-job")
+        self._lock = threading.Lock()
+        self._serial_queues = {}
+        self._running = set()
+        self._results = queue.Queue()
+        self._outstanding = 0
+        self._polling = False
+        self._closed = False
+
+    def submit(self, fn, *args, serial_key=None, on_success=None, on_error=None, on_start=None,
+               cancellable=False, **kwargs):
+        """提交任务，返回 Job；必须在主线程中调用
+
+        cancellable=True 表示 fn 接受 cancel_event 关键字参数，并在它被设置时尽快结束子进程。
+        """
+        job = Job(fn, args, kwargs, serial_key, on_success, on_error, on_start, cancellable)
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("调度器已关闭")
+            self._outstanding += 1
+            if serial_key is None:
+                self._executor.submit(self._run, job)
+            else:
+                pending = self._serial_queues.get(serial_key)
+                if pending is None:
+                    # 该键上没有任务在执行，直接开始
+                    self._serial_queues[serial_key] = collections.deque()
+                    self._executor.submit(self._run, job)
+                else:
+                    pending.append(job)
+        self._ensure_polling()
+        return job
+
+    def post(self, callback, *args):
+        """在任务线程中调用：把回调交给主线程执行，按放入顺序排在该任务的完成回调之前
+
+        只能在任务执行期间使用，调度器只在有未完成任务时轮询结果队列。
+        """
+        self._results.put((callback, args))
+
+    def is_busy(self, serial_key):
+        """该键上是否有任务正在执行或排队"""
+        with self._lock:
+            return serial_key in self._serial_queues
+
+    def shutdown(self):
+        """取消所有排队和正在执行的任务并关闭线程池"""
+        with self._lock:
+            self._closed = True
+            for pending in self._serial_queues.values():
+                for job in pending:
+                    job.cancel()
+            for job in self._running:
+                job.cancel()
+        self._executor.shutdown(wait=False)
+
+    def _run(self, job):
+        try:
+            with self._lock:
+                if job.cancelled:
+                    raise JobCancelled()
+                job.started = True
+                self._running.add(job)
+            if job.on_start:
+                self._results.put((job.on_start, ()))
+            with tracing.span(getattr(job.fn, "__qualname__", repr(job.fn)), "job"):
+                result = job.fn(*job.args, **job.kwargs)
+            if job.cancelled:
+                raise JobCancelled()
+            if job.on_success:
+                self._results.put((job.on_success, (result,)))
+        except JobCancelled:
+            pass
+        except Exception as e:
+            if job.on_error and not job.cancelled:
+                self._results.put((job.on_error, (e,)))
+        finally:
+            job.done = True
+            self._finish(job)
+
+    def _finish(self, job):
+        with self._lock:
+            self._running.discard(job)
+            self._outstanding -= 1
+            if job.serial_key is None:
+                return
+            pending = self._serial_queues[job.serial_key]
+            if pending:
+                next_job = pending.popleft()
+                if not self._closed:
+                    self._executor.submit(self._run, next_job)
+                    return
+            del self._serial_queues[job.serial_key]
+
+    def _ensure_polling(self):
+        if not self._polling:
+            self._polling = True
+            self.root.after(self.poll_interval, self._drain)
+
+    def _drain(self):
+        """在主线程中执行已完成任务的回调；没有待完成任务时停止轮询"""
+        while True:
+            try:
+                callback, args = self._results.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                with tracing.span(getattr(callback, "__qualname__", repr(callback)), "callback"):
+                    callback(*args)
+            except Exception:
+                self.root.report_callback_exception(*sys.exc_info())
+
+        with self._lock:
+            idle = self._outstanding == 0
+        if idle and self._results.empty():
+            self._polling = False
+        else:
+            self.root.after(self.poll_interval, self._drain)
@@ -0,0 +1,165 @@
+import os
+import sys
+import stat
+import subprocess
+import configparser
+
+from git_resolver import CONFIG_FILE
+
+# GitHub 对超过 50MB 的文件给出警告，拒绝超过 100MB 的文件
+DEFAULT_THRESHOLD_MB = 50
+
+# 提交前预计推送量超过该值时提醒
+PUSH_WARNING = 100 * 1024 * 1024
+
+# 与 git lfs track 写入的属性相同
+LFS_ATTRIBUTES = "filter=lfs diff=lfs merge=lfs -text"
+
+# 大文件的处理方式
+LARGE_LFS = "lfs"  # 转为 LFS 指针，内容存入 .git/lfs
+LARGE_GIT = "git"  # 照常暂存
+LARGE_SKIP = "skip"  # 不暂存
+
+
+def configured_threshold():
+    """读取配置文件 config.ini 中 [large_files] threshold_mb（字节数返回），0 表示不检查"""
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(CONFIG_FILE, encoding="utf-8")
+        megabytes = parser.getfloat("large_files", "threshold_mb", fallback=DEFAULT_THRESHOLD_MB)
+    except (configparser.Error, ValueError):
+        megabytes = DEFAULT_THRESHOLD_MB
+    return max(0, int(megabytes * 1024 * 1024))
+
+
+def attribute_pattern(path):
+    """把仓库内路径转换为只匹配该文件的 .gitattributes 模式（转义方式与 git lfs track 相同）"""
+    escaped = "".join("\\" + c if c in "*?[]\\!#" else c for c in path)
+    return "/" + escaped.replace(" ", "[[:space:]]")
+
+
+class LargeFileRouter:
+    """暂存前按大小找出大文件，并把它们分流到 LFS 指针
+
+    大文件照常暂存时，git add 要把整个文件压缩写入对象库，之后每次推送、克隆都要传输；
+    转为 LFS 指针后仓库中只有几十字节的指针，内容由 clean 过滤器流式计算 sha256 后
+    存入 .git/lfs/objects。安装了 git-lfs 时使用它的过滤器，否则使用 lfs_filter.py；
+    之后安装了 git-lfs 时，下一次转为指针前把仓库配置中的内置过滤器换成 git-lfs。
+    """
+
+    def __init__(self, repo_path, git_executable="git", threshold=None):
+        self.repo_path = repo_path
+        self.git_executable = git_executable
+        self.threshold = configured_threshold() if threshold is None else threshold
+
+    def _git(self, *args, input=None):
+        return subprocess.run([self.git_executable, *args], cwd=self.repo_path, input=input,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def find_large(self, paths):
+        """返回 [(路径, 字节数)]：工作区中不小于阈值、且尚未使用 LFS 的文件"""
+        if not self.threshold:
+            return []
+        large = []
+        for path in paths:
+            try:
+                st = os.lstat(os.path.join(self.repo_path, path))
+            except OSError:
+                continue  # 已删除
+            if stat.S_ISREG(st.st_mode) and st.st_size >= self.threshold:
+                large.append((path, st.st_size))
+        if not large:
+            return []
+        tracked = self.lfs_paths([path for path, _ in large])
+        return [(path, size) for path, size in large if path not in tracked]
+
+    def lfs_paths(self, paths):
+        """返回其中已由 .gitattributes 指定 filter=lfs 的路径"""
+        data = b"".join(os.fsencode(path) + b"\0" for path in paths)
+        result = self._git("check-attr", "-z", "--stdin", "filter", input=data)
+        # 输出为 路径\0属性\0取值\0 的三元组
+        fields = result.stdout.split(b"\0")
+        return {os.fsdecode(fields[i]) for i in range(0, len(fields) - 2, 3) if fields[i + 2] == b"lfs"}
+
+    def filter_configured(self):
+        return self._git("config", "--get", "filter.lfs.clean").returncode == 0
+
+    def builtin_filter_configured(self):
+        """仓库配置中是否写入了本工具的内置过滤器（ensure_filter 写入的 filter.lfs.*）"""
+        result = self._git("config", "--local", "--get", "filter.lfs.clean")
+        return result.returncode == 0 and b"lfs_filter.py" in result.stdout
+
+    def git_lfs_installed(self):
+        return self._git("lfs", "version").returncode == 0
+
+    def replace_builtin_filter(self):
+        """已安装 git-lfs 时删除仓库配置中的内置过滤器，改由 git-lfs 处理，返回是否替换
+
+        仓库配置优先于全局配置，不删除的话 git lfs install 写入的全局过滤器不会生效，
+        推送时也不会上传 LFS 内容。两者的指针格式和 .git/lfs/objects 布局相同，已有内容不受影响。
+        """
+        if not self.builtin_filter_configured() or not self.git_lfs_installed():
+            return False
+        self._git("config", "--local", "--remove-section", "filter.lfs")
+        # 同时安装 pre-push 等钩子；全局已配置过滤器时只补上钩子
+        result = self._git("lfs", "install", "--local")
+        if result.returncode != 0:
+            raise Exception(f"改用 git-lfs 失败: {result.stderr.decode(errors='replace').strip()}")
+        return True
+
+    def available(self):
+        """能否使用 LFS 指针：已配置 filter.lfs（git-lfs 或本工具），或能用当前 Python 运行内置过滤器"""
+        return self.filter_configured() or not getattr(sys, "frozen", False)
+
+    def ensure_filter(self):
+        """没有配置 filter.lfs 时（未安装 git-lfs），在仓库配置中使用内置过滤器
+
+        写入的命令包含当前 Python 和本工具的绝对路径，移动它们后需要重新设置；同时设置
+        filter.lfs.required，过滤器无法运行时 git 直接报错，不会把文件内容原样写入仓库。
+        调用方必须先征得用户同意。
+        """
+        if self.filter_configured():
+            return
+        if getattr(sys, "frozen", False):
+            raise Exception("没有安装 git-lfs，无法用 LFS 指针保存大文件")
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lfs_filter.py")
+        command = f'"{sys.executable}" -S "{script}"'
+        for key, value in (("clean", f"{command} clean"), ("smudge", f"{command} smudge"), ("required", "true")):
+            result = self._git("config", f"filter.lfs.{key}", value)
+            if result.returncode != 0:
+                raise Exception(f"设置 LFS 过滤器失败: {result.stderr.decode(errors='replace').strip()}")
+
+    def track(self, paths, configure_filter=False):
+        """把文件逐个加入 .gitattributes（filter=lfs），返回需要一并暂存的 .gitattributes 路径
+
+        没有配置 filter.lfs 时，只有 configure_filter=True 才会把内置过滤器写入仓库配置，否则报错。
+        已安装 git-lfs 时先把之前写入的内置过滤器换成 git-lfs。
+        """
+        self.replace_builtin_filter()
+        if not self.filter_configured():
+            if not configure_filter:
+                raise Exception("没有配置 LFS 过滤器：请安装 git-lfs 并运行 git lfs install，"
+                                "或明确同意把本工具的内置过滤器写入仓库配置")
+            self.ensure_filter()
+        attributes = os.path.join(self.repo_path, ".gitattributes")
+        try:
+            with open(attributes, "rb") as f:
+                existing = f.read()
+        except FileNotFoundError:
+            existing = b""
+        # 已有同一模式的行时不再重复追加
+        patterns = {line.split(None, 1)[0] for line in existing.decode("utf-8", "replace").splitlines()
+                    if line.strip() and not line.lstrip().startswith("#")}
+        new_patterns = []
+        for path in paths:
+            pattern = attribute_pattern(path)
+            if pattern not in patterns and pattern not in new_patterns:
+                new_patterns.append(pattern)
+        if not new_patterns:
+            return ".gitattributes"
+        lines = "".join(f"{pattern} {LFS_ATTRIBUTES}\n" for pattern in new_patterns).encode("utf-8")
+        with open(attributes, "ab") as f:
+            if existing and not existing.endswith(b"\n"):
+                f.write(b"\n")
+            f.write(lines)
+        return ".gitattributes"
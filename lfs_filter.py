@@ -0,0 +1,141 @@
+"""LFS 指针的 clean/smudge 过滤器和本地内容存储
+
+git 每暂存或检出一个标记为 filter=lfs 的文件就运行一次过滤器，这个模块因此只依赖标准库中启动最快的部分。
+指针格式和 .git/lfs/objects 的目录布局与 git-lfs 相同，已有内容可以交给 git-lfs 继续使用；但仓库配置中的
+filter.lfs.* 优先于 git lfs install 写入的全局配置，安装 git-lfs 后必须删除它们（本工具在下一次转为 LFS
+指针时自动替换，也可以手动运行 git config --local --remove-section filter.lfs 再执行 git lfs install）。
+
+用法（由 git 调用，在工作区根目录运行）：
+    python -S lfs_filter.py clean  < 文件内容 > 指针
+    python -S lfs_filter.py smudge < 指针 > 文件内容
+"""
+import os
+import sys
+import hashlib
+
+POINTER_VERSION = b"version https://git-lfs.github.com/spec/v1"
+# 指针文件不会超过这个大小，更大的输入一定是文件内容
+POINTER_MAX_SIZE = 1024
+# 流式读写的块大小，大文件不会整个读入内存
+CHUNK_SIZE = 1024 * 1024
+
+
+def make_pointer(oid, size):
+    return b"%s\noid sha256:%s\nsize %d\n" % (POINTER_VERSION, oid.encode(), size)
+
+
+def parse_pointer(data):
+    """解析指针文件，返回 (oid, size)；不是指针时返回 None"""
+    if len(data) > POINTER_MAX_SIZE or not data.startswith(POINTER_VERSION + b"\n"):
+        return None
+    fields = dict(line.split(b" ", 1) for line in data.splitlines()[1:] if b" " in line)
+    oid = fields.get(b"oid", b"")
+    size = fields.get(b"size", b"")
+    if not oid.startswith(b"sha256:") or len(oid) != 71 or not size.isdigit():
+        return None
+    return oid[7:].decode(), int(size)
+
+
+def find_git_dir(start="."):
+    """返回存放 lfs 目录的 git 目录；.git 可能是指向实际目录的文件（工作树、子模块）"""
+    git_dir = os.environ.get("GIT_DIR") or os.path.join(start, ".git")
+    if os.path.isfile(git_dir):
+        with open(git_dir, "r", encoding="utf-8") as f:
+            line = f.readline().strip()
+        if line.startswith("gitdir:"):
+            git_dir = os.path.join(os.path.dirname(git_dir), line[7:].strip())
+    # 附加工作树共用主仓库的存储
+    common = os.path.join(git_dir, "commondir")
+    if os.path.isfile(common):
+        with open(common, "r", encoding="utf-8") as f:
+            git_dir = os.path.join(git_dir, f.read().strip())
+    return os.path.abspath(git_dir)
+
+
+class LfsStore:
+    """本地内容存储：.git/lfs/objects/<oid[0:2]>/<oid[2:4]>/<oid>"""
+
+    def __init__(self, git_dir):
+        self.root = os.path.join(git_dir, "lfs")
+
+    def object_path(self, oid):
+        return os.path.join(self.root, "objects", oid[:2], oid[2:4], oid)
+
+    def contains(self, oid, size=None):
+        try:
+            return size is None or os.path.getsize(self.object_path(oid)) == size
+        except OSError:
+            return False
+
+    def store_stream(self, head, stream):
+        """把 head 和 stream 的剩余内容写入存储，边写边计算 sha256，返回 (oid, size)"""
+        temp_dir = os.path.join(self.root, "tmp")
+        os.makedirs(temp_dir, exist_ok=True)
+        temp_path = os.path.join(temp_dir, f"{os.getpid()}-{id(stream):x}")
+        digest = hashlib.sha256()
+        size = 0
+        try:
+            with open(temp_path, "wb") as out:
+                chunk = head
+                while chunk:
+                    digest.update(chunk)
+                    out.write(chunk)
+                    size += len(chunk)
+                    chunk = stream.read(CHUNK_SIZE)
+            oid = digest.hexdigest()
+            target = self.object_path(oid)
+            if self.contains(oid, size):
+                os.remove(temp_path)
+            else:
+                os.makedirs(os.path.dirname(target), exist_ok=True)
+                os.replace(temp_path, target)
+            return oid, size
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
+
+
+def _copy(source, target):
+    chunk = source.read(CHUNK_SIZE)
+    while chunk:
+        target.write(chunk)
+        chunk = source.read(CHUNK_SIZE)
+
+
+def clean(stdin, stdout, store):
+    """暂存时：内容存入本地存储，输出指针"""
+    head = stdin.read(CHUNK_SIZE)
+    if len(head) < CHUNK_SIZE and parse_pointer(head) is not None:
+        # 已经是指针（例如本地没有内容的检出），原样保留
+        stdout.write(head)
+        return
+    oid, size = store.store_stream(head, stdin)
+    stdout.write(make_pointer(oid, size))
+
+
+def smudge(stdin, stdout, store):
+    """检出时：本地存储中有内容则还原，否则检出指针本身"""
+    data = stdin.read(POINTER_MAX_SIZE + 1)
+    pointer = parse_pointer(data)
+    if pointer is None or not store.contains(*pointer):
+        stdout.write(data)
+        _copy(stdin, stdout)
+        return
+    with open(store.object_path(pointer[0]), "rb") as f:
+        _copy(f, stdout)
+
+
+def main(argv=None):
+    argv = sys.argv if argv is None else argv
+    if len(argv) < 2 or argv[1] not in ("clean", "smudge"):
+        sys.stderr.write("用法: lfs_filter.py clean|smudge\n")
+        return 2
+    store = LfsStore(find_git_dir())
+    (clean if argv[1] == "clean" else smudge)(sys.stdin.buffer, sys.stdout.buffer, store)
+    sys.stdout.buffer.flush()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,14 +1,36 @@
+import tracing
+tracing.enable_from_env()
+
 import os
+import time
 import threading
-from utils import handle_exception, repo_not_exit, require_repo
+from utils import handle_exception, repo_not_exit, require_repo, avatar_thumbnail
 
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox, simpledialog
-from PIL import Image, ImageTk  # 添加PIL支持
 from datetime import datetime, timedelta
-from git_operations import GitOperations
-# 检查并设置Git环境
-from git import GitCommandError
+from git_operations import GitOperations, OperationCancelled
+from progress import ProgressChannel, format_progress, format_size
+from status_watcher import StatusWatcher
+from job_scheduler import JobScheduler
+from workspace_window import WorkspaceWindow
+from commit_picker import CommitPicker
+from diff_viewer import DiffViewer
+from stage_dialog import StageDialog
+from clone_dialog import CloneDialog
+from maintenance import format_report
+import acceleration
+from remote_sync import BackgroundFetcher
+from large_files import LARGE_LFS, LARGE_GIT, LARGE_SKIP, PUSH_WARNING
+
+
+# 空闲维护：每分钟检查一次，用户 2 分钟无操作时才开始，同一仓库 30 分钟内只检测一次
+IDLE_CHECK_INTERVAL = 60 * 1000
+IDLE_THRESHOLD = 120
+MAINTENANCE_RECHECK = 30 * 60
+
+# 主线程检查监视线程变化信号的间隔（毫秒）
+REPO_CHANGE_POLL = 200
 
 
 class GitGUI:
@@ -21,9 +43,8 @@ class GitGUI:
         # 初始化Git操作对象
         self.git_ops = GitOperations()
 
-        # 添加线程状态标志
-        self.is_pushing = False
-        self.is_pulling = False
+        # 后台任务调度器：Git 操作都在工作线程中执行，同一仓库的写操作排队依次执行
+        self.scheduler = JobScheduler(self.root)
 
         # 设置样式
         self.setup_styles()
@@ -35,8 +56,25 @@ class GitGUI:
         # 创建UI元素
         self.create_widgets()
 
-        # 启动定时检查
-        self.check_status_periodically()
+        # 仓库状态监视器（选择仓库后启动）；监视线程只设置变化信号，由主线程轮询
+        self.status_watcher = None
+        self.repo_changed = threading.Event()
+        self.show_status_message()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
+        # 记录用户最后一次操作的时间，空闲时在后台执行仓库维护
+        self.last_activity = time.monotonic()
+        self.maintenance_checked = {}
+        self.root.bind_all("<Any-KeyPress>", self.mark_activity, add="+")
+        self.root.bind_all("<Any-ButtonPress>", self.mark_activity, add="+")
+        self.root.after(IDLE_CHECK_INTERVAL, self.check_idle_maintenance)
+
+        # 定时在后台抓取远程，更新领先/落后提示（选择仓库后启动）
+        self.fetcher = BackgroundFetcher(self.root, self.scheduler, self.git_ops,
+                                         on_fetched=self.show_status_message)
+
+        # 开启追踪时检测主线程卡顿
+        self.stall_detector = tracing.install_stall_detector(self.root)
 
     def setup_styles(self):
         """设置样式"""
@@ -45,50 +83,90 @@ class GitGUI:
         style.configure("TLabel", padding=5, background="#f0f0f0")
         style.configure("TFrame", background="#f0f0f0")
 
-    def check_status_periodically(self):
-        """定期检查仓库状态"""
-        self.show_status_message()
-        # 每5秒检查一次
-        self.root.after(5000, self.check_status_periodically)
+    def start_status_watcher(self, folder):
+        """启动后台状态监视，文件变化时才重新检查仓库状态"""
+        self.stop_status_watcher()
+        # 使用本工具的 fsmonitor 钩子时，监视线程同时为钩子写变化日志
+        self.status_watcher = StatusWatcher(folder, self.on_repo_changed, journal=self.git_ops.fsmonitor_journal())
+        self.status_watcher.start()
+        # 监视期间由监视线程报告工作区变化，状态查询不再遍历工作区
+        self.git_ops.watch_worktree(True)
+        self.root.after(REPO_CHANGE_POLL, self.poll_repo_changed, self.status_watcher)
+
+    def stop_status_watcher(self):
+        if self.status_watcher:
+            self.status_watcher.stop()
+            self.status_watcher = None
+            self.git_ops.watch_worktree(False)
+
+    def on_repo_changed(self):
+        """监视线程回调：只记录变化，不调用 Tk，也不运行 git"""
+        self.git_ops.worktree_changed()
+        self.repo_changed.set()
+
+    def poll_repo_changed(self, watcher):
+        """主线程定期检查变化信号，在后台任务中重新计算状态；监视器停止或更换后结束轮询"""
+        if watcher is not self.status_watcher:
+            return
+        self.root.after(REPO_CHANGE_POLL, self.poll_repo_changed, watcher)
+
+        repo_path = self.git_ops.repo_path
+        status_key = ("status", repo_path)
+        # 上一次查询尚未结束时保留信号，结束后再查一次
+        if not self.repo_changed.is_set() or self.scheduler.is_busy(status_key):
+            return
+        self.repo_changed.clear()
+
+        def on_error(e):
+            self.status_label.config(text=f"检查状态失败: {str(e)}")
+
+        self.scheduler.submit(self.git_ops.build_status_message, serial_key=status_key,
+                              on_success=lambda msg: self.status_label.config(text=msg), on_error=on_error)
+
+    def on_close(self):
+        """关闭窗口"""
+        self.stop_status_watcher()
+        self.fetcher.stop()
+        if self.stall_detector:
+            self.stall_detector.stop()
+        self.history_cancel.set()
+        self.scheduler.shutdown()
+        self.git_ops.close()
+        self.root.destroy()
+
+    def error_reporter(self, error_message):
+        """生成在主线程中弹出错误提示的回调"""
+        def report(error):
+            messagebox.showerror("错误", f"{error_message}: {str(error)}")
+        return report
+
+    def run_read(self, fn, *args, error_message="操作失败", on_error=None, **kwargs):
+        """在后台执行只读查询，可与其他查询并发"""
+        return self.scheduler.submit(fn, *args, on_error=on_error or self.error_reporter(error_message),
+                                     **kwargs)
+
+    def run_write(self, fn, *args, error_message="操作失败", on_error=None, serial_key=None, **kwargs):
+        """在后台执行写操作，同一仓库的写操作按提交顺序排队"""
+        return self.scheduler.submit(fn, *args, serial_key=serial_key or self.git_ops.repo_path,
+                                     on_error=on_error or self.error_reporter(error_message), **kwargs)
 
     def create_widgets(self):
         # 添加头像和欢迎文字区域
         avatar_frame = ttk.Frame(self.main_frame)
         avatar_frame.pack(fill=tk.X, pady=(0, 15))
 
-        try:
-            # 加载并处理头像
-            image = Image.open("zyx.JPG")
-            # 调整图片大小为 120x120
-            image = image.resize((120, 120), Image.Resampling.LANCZOS)
-            photo = ImageTk.PhotoImage(image)
-
-            # 创建圆角效果的头像标签
-            avatar_label = tk.Label(
-                avatar_frame,
-                image=photo,
-                bg="#f0f0f0",
-                bd=2,
-                relief="groove"
-            )
-            avatar_label.image = photo
-            avatar_label.pack(pady=(10, 5))
-
-        except Exception as e:
-            # 创建默认的黑色背景标签
-            default_label = tk.Label(
-                avatar_frame,
-                text="未获取到图像路径 zyx.JPG",
-                width=16,  # 设置宽度
-                height=7,  # 设置高度
-                bg="black",  # 黑色背景
-                fg="white",  # 白色文字
-                font=("微软雅黑", 10),
-                bd=2,
-                relief="groove"
-            )
-            default_label.pack(pady=(10, 5))
-            # print(f"加载头像失败: {str(e)}")
+        # 先用同尺寸的空白图片占位，窗口显示后再在后台加载头像
+        self.avatar_placeholder = tk.PhotoImage(width=120, height=120)
+        self.avatar_label = tk.Label(
+            avatar_frame,
+            image=self.avatar_placeholder,
+            bg="#f0f0f0",
+            bd=2,
+            relief="groove"
+        )
+        self.avatar_label.pack(pady=(10, 5))
+        self.run_read(avatar_thumbnail, "zyx.JPG", on_success=self.show_avatar,
+                      on_error=lambda e: self.show_avatar_error())
 
         # 添加优雅的欢迎文字
         welcome_text = tk.Label(
@@ -107,6 +185,12 @@ class GitGUI:
         # 选择文件夹按钮
         self.select_btn = ttk.Button(top_frame, text="选择文件夹", command=self.select_folder)
         self.select_btn.pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="克隆仓库", command=self.show_clone_dialog).pack(side=tk.LEFT, padx=5)
+
+        # 多仓库工作区
+        ttk.Button(top_frame, text="工作区", command=self.open_workspace).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="仓库维护", command=self.run_maintenance).pack(side=tk.LEFT, padx=5)
+        ttk.Button(top_frame, text="状态加速", command=self.show_acceleration).pack(side=tk.LEFT, padx=5)
 
         # 当前路径显示
         self.path_label = ttk.Label(top_frame, text="当前未选择仓库")
@@ -130,16 +214,28 @@ class GitGUI:
 
         # Git操作按钮
         # ttk.Button(self.git_frame, text="初始化仓库", command=self.init_repo).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.git_frame, text="查看更改", command=self.show_diff_viewer).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.git_frame, text="添加到暂存区", command=self.add_to_stage).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.git_frame, text="选择性暂存", command=self.show_stage_dialog).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.git_frame, text="提交更改", command=self.commit_changes).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.git_frame, text="推送到远程", command=self.push_to_remote).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.git_frame, text="推送到全部远程", command=self.push_to_all_remotes).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.git_frame, text="拉取更新", command=self.pull_from_remote).pack(side=tk.LEFT, padx=5)
         ttk.Button(self.git_frame, text="版本回退", command=self.show_rollback_dialog).pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.git_frame, text="撤销回退", command=self.undo_rollback).pack(side=tk.LEFT, padx=5)
 
         # GitHub设置区
         self.github_frame = ttk.LabelFrame(self.main_frame, text="GitHub设置(建议使用ssh链接)", padding=10)
         self.github_frame.pack(fill=tk.X, pady=5)
 
+        # 远程名可以选择已有的远程，也可以输入新名字（例如镜像或备份服务器）
+        ttk.Label(self.github_frame, text="远程名:").pack(side=tk.LEFT)
+        self.remote_name = tk.StringVar(value="origin")
+        self.remote_urls = {}
+        self.remote_combo = ttk.Combobox(self.github_frame, textvariable=self.remote_name, width=10)
+        self.remote_combo.pack(side=tk.LEFT, padx=5)
+        self.remote_combo.bind("<<ComboboxSelected>>",
+                               lambda e: self.github_url.set(self.remote_urls.get(self.remote_name.get(), "")))
         ttk.Label(self.github_frame, text="GitHub仓库链接:").pack(side=tk.LEFT)
         self.github_url = tk.StringVar()
         self.github_entry = ttk.Entry(self.github_frame, textvariable=self.github_url)
@@ -182,15 +278,50 @@ class GitGUI:
         self.history_tree.column("描述", width=320)
         self.history_tree.column("作者", width=150)
 
-        # 添加滚动条
-        scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.history_tree.yview)
-        self.history_tree.configure(yscrollcommand=scrollbar.set)
+        # 添加滚动条；滚动接近底部时再加载下一页
+        self.history_scrollbar = ttk.Scrollbar(self.tree_frame, orient=tk.VERTICAL, command=self.history_tree.yview)
+        self.history_tree.configure(yscrollcommand=self.on_history_scroll)
+        self.history_pages = None
+        self.history_page_pending = False
+        self.history_generation = 0
+        # 切换时间范围或关闭窗口时设置，终止上一次仍在运行的 git log
+        self.history_cancel = threading.Event()
+        # 当前时间范围的起点和已显示的最后一个提交，浅克隆加深后从这里接着读取
+        self.history_since = None
+        self.history_last_id = None
+        self.history_deepening = False
 
         self.history_tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.history_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def show_avatar(self, thumbnail_path):
+        """显示缓存的头像缩略图（PNG 由 Tk 直接解码，无需 PIL）"""
+        try:
+            photo = tk.PhotoImage(file=thumbnail_path)
+        except tk.TclError:
+            self.show_avatar_error()
+            return
+        self.avatar_label.config(image=photo)
+        self.avatar_label.image = photo
+
+    def show_avatar_error(self):
+        """头像加载失败时显示默认的黑色背景标签"""
+        self.avatar_label.config(
+            image="",
+            text="未获取到图像路径 zyx.JPG",
+            width=16,  # 设置宽度
+            height=7,  # 设置高度
+            bg="black",  # 黑色背景
+            fg="white",  # 白色文字
+            font=("微软雅黑", 10)
+        )
 
     def show_status_message(self):
         """显示状态信息"""
+        if self.status_watcher:
+            # 交给监视线程异步刷新
+            self.status_watcher.trigger()
+            return
         status_msg = self.git_ops.check_repo_status()
         if status_msg:
             self.status_label.config(text=status_msg)
@@ -204,42 +335,249 @@ class GitGUI:
 
             if not is_repo:
                 if messagebox.askyesno("提示", "当前文件夹不是仓库，是否初始化为仓库？"):
-                    self.git_ops.init_repo(folder)
-                    messagebox.showinfo("成功", "Git仓库初始化成功！")
+                    self.run_write(self.git_ops.init_repo, folder, serial_key=folder,
+                                   on_success=lambda _: self.on_repo_loaded(folder, initialized=True),
+                                   error_message="初始化仓库失败")
                 else:
                     return
             else:
-                self.git_ops.load_repo(folder)
+                self.run_write(self.git_ops.load_repo, folder, serial_key=folder,
+                               on_success=lambda _: self.on_repo_loaded(folder),
+                               error_message="选择文件夹失败")
+
+    def show_clone_dialog(self):
+        """显示克隆仓库对话框"""
+        CloneDialog(self.root, on_clone=self.start_clone)
+
+    def start_clone(self, url, path, depth, filter_spec, sparse_dirs):
+        """在后台克隆，完成后加载克隆出的仓库"""
+        progress = self.create_progress("等待前面的操作完成...")
+        frame, label, bar, channel = progress
+
+        def on_start():
+            label.config(text="正在克隆仓库...")
+            channel.start()
+
+        self.run_write(self.git_ops.clone_repo, url, path, depth, filter_spec, sparse_dirs,
+                       progress_callback=channel.report, cancel_event=channel.cancel_event,
+                       serial_key=path, on_start=on_start,
+                       on_success=lambda _: self.on_clone_complete(path, progress),
+                       on_error=lambda error: self.on_clone_error(error, progress))
+
+    def on_clone_complete(self, path, progress):
+        """克隆完成后的处理"""
+        frame, label, bar, channel = progress
+        channel.close()
+        frame.pack_forget()
+        messagebox.showinfo("成功", f"已克隆到 {path}")
+        self.on_repo_loaded(path)
+
+    def on_clone_error(self, error, progress):
+        """克隆错误处理"""
+        from git import GitCommandError
+        frame, label, bar, channel = progress
+        channel.close()
+        frame.pack_forget()
+        if isinstance(error, OperationCancelled):
+            return
+        if isinstance(error, GitCommandError) and "Could not read from remote repository" in str(error):
+            self.show_ssh_error_dialog()
+        else:
+            messagebox.showerror("错误", f"克隆失败: {str(error)}")
 
-            self.path_label.config(text=f"当前仓库: {folder}")
-            self.update_remote_url()
-            self.update_history()
+    def open_workspace(self):
+        """打开多仓库工作区窗口"""
+        WorkspaceWindow(self.root, self.scheduler)
+
+    def on_repo_loaded(self, folder, initialized=False):
+        """仓库加载完成后刷新界面"""
+        if initialized:
+            messagebox.showinfo("成功", "Git仓库初始化成功！")
+        self.path_label.config(text=f"当前仓库: {folder}")
+        self.update_remote_url()
+        self.update_history()
+        self.start_status_watcher(folder)
+        # 打开仓库后稍等片刻先抓取一次，之后按间隔定时抓取
+        self.fetcher.start(delay=5)
+
+    def mark_activity(self, event=None):
+        self.last_activity = time.monotonic()
+
+    def check_idle_maintenance(self):
+        """用户空闲时检测当前仓库，需要时在写队列中静默执行维护任务"""
+        self.root.after(IDLE_CHECK_INTERVAL, self.check_idle_maintenance)
+
+        repo_path = self.git_ops.repo_path
+        if not self.git_ops.repo or time.monotonic() - self.last_activity < IDLE_THRESHOLD:
+            return
+        if self.scheduler.is_busy(repo_path):
+            return
+        if time.monotonic() - self.maintenance_checked.get(repo_path, float("-inf")) < MAINTENANCE_RECHECK:
+            return
+        self.maintenance_checked[repo_path] = time.monotonic()
+
+        def on_inspected(state):
+            # 检测期间用户可能切换了仓库或重新开始操作
+            if state["tasks"] and self.git_ops.repo_path == repo_path and not self.scheduler.is_busy(repo_path):
+                self.run_write(self.git_ops.run_maintenance, state["tasks"], cancellable=True,
+                               on_error=lambda e: None)
+
+        self.run_read(self.git_ops.inspect_maintenance, on_success=on_inspected, on_error=lambda e: None)
+
+    @require_repo
+    @handle_exception("仓库维护失败")
+    def run_maintenance(self):
+        """立即执行仓库维护，并显示历史和状态查询的前后耗时"""
+        self.maintenance_checked[self.git_ops.repo_path] = time.monotonic()
+        self.status_label.config(text="正在维护仓库（写入提交图、整理对象）...")
+
+        def on_maintenance_complete(report):
+            messagebox.showinfo("仓库维护", format_report(report))
+            self.show_status_message()
+
+        self.run_write(self.git_ops.run_maintenance, on_success=on_maintenance_complete, cancellable=True,
+                       error_message="仓库维护失败")
+
+    @require_repo
+    def show_acceleration(self):
+        """检测大工作区的状态加速，询问后开启或关闭，并显示状态查询和暂存扫描的前后耗时"""
+        self.run_read(self.git_ops.inspect_acceleration, on_success=self.confirm_acceleration,
+                      error_message="检测状态加速失败")
+
+    def confirm_acceleration(self, state):
+        features = [f for f in acceleration.FEATURE_NAMES if state[f] != "unsupported"]
+        text = acceleration.format_state(state)
+        if all(state[f] in ("ok", "watcher_stopped") for f in features):
+            if messagebox.askyesno("状态加速", f"{text}\n\n状态加速已开启，是否关闭？"):
+                self.apply_acceleration(self.git_ops.disable_acceleration, features)
+            return
+        hint = "工作区较大，建议开启。" if state["recommended"] else "工作区不大，开启后提升有限。"
+        if messagebox.askyesno("状态加速", f"{text}\n\n{hint}是否开启状态加速？"):
+            self.apply_acceleration(self.git_ops.enable_acceleration, features)
+
+    def apply_acceleration(self, action, features):
+        self.status_label.config(text="正在修改状态加速设置并测量耗时...")
+
+        def on_applied(report):
+            # fsmonitor 钩子设置变化后重启监视线程，让它开始（或停止）写变化日志
+            self.start_status_watcher(self.git_ops.repo_path)
+            self.run_read(self.git_ops.finish_acceleration_report, report, on_success=on_measured,
+                          error_message="测量状态加速失败")
+
+        def on_measured(report):
+            messagebox.showinfo("状态加速", acceleration.format_report(report))
             self.show_status_message()
 
+        self.run_write(action, features, on_success=on_applied, error_message="修改状态加速设置失败")
 
     @handle_exception("初始化仓库失败")
     def init_repo(self):
-        self.git_ops.init_repo(self.git_ops.repo_path)
-        self.update_remote_url()
-        messagebox.showinfo("成功", "Git仓库初始化成功！")
-        self.show_status_message()
+        self.run_write(self.git_ops.init_repo, self.git_ops.repo_path,
+                       on_success=lambda _: self.on_repo_loaded(self.git_ops.repo_path, initialized=True),
+                       error_message="初始化仓库失败")
 
     @require_repo
     @handle_exception("添加到暂存区失败")
     def add_to_stage(self):
-        self.git_ops.add_to_stage()
-        messagebox.showinfo("成功", "文件已添加到暂存区！")
+        self.stage_matching(None, None, None)
+
+    @require_repo
+    def show_stage_dialog(self):
+        """按目录和通配符选择要暂存的文件"""
+        StageDialog(self.root, self.scheduler, self.git_ops, on_stage=self.stage_matching)
+
+    def stage_matching(self, include, exclude, directories):
+        """先找出超过阈值的大文件，询问处理方式后再排队暂存"""
+        def on_found(large):
+            mode = LARGE_GIT
+            configure_filter = False
+            if large['files']:
+                mode = self.ask_large_files(large)
+                if mode is None:
+                    return
+                if mode == LARGE_LFS and not large['lfs_configured']:
+                    # 没有 git-lfs 时须经用户同意才把内置过滤器写入仓库配置
+                    if not messagebox.askyesno(
+                            "LFS 过滤器",
+                            "没有检测到 git-lfs。使用本工具内置的过滤器需要在仓库配置中写入 "
+                            "filter.lfs.clean/smudge，命令指向当前 Python 和本工具的路径，移动它们后需要重新设置。\n\n"
+                            "是否写入仓库配置？"):
+                        return
+                    configure_filter = True
+            self.run_write(self.git_ops.stage_matching, include, exclude, directories, mode, configure_filter,
+                           on_success=self.on_stage_complete, error_message="添加到暂存区失败")
+
+        self.run_read(self.git_ops.find_large_files, include, exclude, directories, on_success=on_found,
+                      error_message="添加到暂存区失败")
+
+    def ask_large_files(self, large):
+        """询问大文件的处理方式，返回 LARGE_LFS/LARGE_GIT/LARGE_SKIP，取消时返回 None"""
+        files = large['files']
+        listing = "\n".join(f"  {path}（{format_size(size)}）" for path, size in files[:10])
+        if len(files) > 10:
+            listing += f"\n  ……共 {len(files)} 个"
+        text = f"以下文件超过 {format_size(large['threshold'])}：\n{listing}\n\n"
+        if large['lfs']:
+            answer = messagebox.askyesnocancel(
+                "大文件", text + "是：用 LFS 指针保存（内容存放在本地 .git/lfs，提交和推送只包含指针；"
+                               "没有 LFS 服务器时内容不会上传，其他克隆只能得到指针文件）\n"
+                               "否：照常暂存（仓库和每次推送都会变大）\n取消：不暂存")
+            return None if answer is None else (LARGE_LFS if answer else LARGE_GIT)
+        answer = messagebox.askyesnocancel(
+            "大文件", text + "没有安装 git-lfs，无法用 LFS 指针保存。\n"
+                           "是：照常暂存（仓库和每次推送都会变大）\n否：跳过这些文件，只暂存其他更改\n取消：不暂存")
+        return None if answer is None else (LARGE_GIT if answer else LARGE_SKIP)
+
+    @require_repo
+    def show_diff_viewer(self):
+        """查看暂存区和工作区的更改"""
+        DiffViewer(self.root, self.scheduler, self.git_ops)
+
+    def on_stage_complete(self, counts):
+        """暂存完成后的处理"""
+        message = ("文件已添加到暂存区！\n"
+                   f"新增 {counts['added']} 个，修改 {counts['modified']} 个，"
+                   f"删除 {counts['deleted']} 个，重命名 {counts['renamed']} 个")
+        if counts['lfs']:
+            message += f"\n其中 {counts['lfs']} 个大文件以 LFS 指针保存"
+        if counts['skipped']:
+            message += f"\n跳过了 {counts['skipped']} 个大文件"
+        if counts['large']:
+            message += f"\n注意：{len(counts['large'])} 个超过大小阈值的文件照常暂存，仓库和推送会明显变大"
+        messagebox.showinfo("成功", message)
         self.show_status_message()
 
     @require_repo
     @handle_exception("提交失败")
     def commit_changes(self):
-        commit_message = simpledialog.askstring("提交", "请输入提交信息:")
+        # 先估算提交后的推送量，在输入提交信息时一并显示；估算失败不影响提交
+        def estimate():
+            try:
+                return self.git_ops.projected_push_size()
+            except Exception:
+                return None
+
+        self.run_read(estimate, on_success=self.ask_commit_message, error_message="提交失败")
+
+    def ask_commit_message(self, size):
+        prompt = "请输入提交信息:"
+        if size:
+            prompt += f"\n（提交后预计推送约 {format_size(size['total'])}"
+            if size['lfs']:
+                prompt += f"，另有 {format_size(size['lfs'])} 大文件内容只保存在本地 LFS 存储"
+            prompt += "）"
+            if size['total'] >= PUSH_WARNING:
+                prompt += "\n推送量较大，请确认没有误加大文件"
+        commit_message = simpledialog.askstring("提交", prompt)
         if commit_message:
-            self.git_ops.commit_changes(commit_message)
-            messagebox.showinfo("成功", "更改已提交！")
-            self.update_history()
-            self.show_status_message()
+            self.run_write(self.git_ops.commit_changes, commit_message,
+                           on_success=lambda _: self.on_commit_complete(), error_message="提交失败")
+
+    def on_commit_complete(self):
+        """提交完成后的处理"""
+        messagebox.showinfo("成功", "更改已提交！")
+        self.update_history()
+        self.show_status_message()
 
     @require_repo
     @handle_exception("添加远程仓库失败")
@@ -248,102 +586,189 @@ class GitGUI:
         if not github_url:
             messagebox.showerror("错误", "请输入GitHub仓库链接！")
             return
-        self.git_ops.add_remote(github_url)
+        name = self.remote_name.get().strip() or "origin"
+        self.run_write(self.git_ops.add_remote, github_url, name,
+                       on_success=lambda _: self.on_remote_added(), error_message="添加远程仓库失败")
+
+    def on_remote_added(self):
         messagebox.showinfo("成功", "远程仓库添加成功！")
+        self.update_remote_url()
         self.show_status_message()
 
     def update_remote_url(self):
-        """更新远程仓库链接显示"""
-        remote_url = self.git_ops.get_remote_url()
-        self.github_url.set(remote_url)
+        """更新远程名列表和当前远程的链接显示"""
+        def on_loaded(urls):
+            self.remote_urls = urls
+            self.remote_combo['values'] = list(urls)
+            name = self.remote_name.get()
+            if name not in urls:
+                name = "origin" if "origin" in urls or not urls else next(iter(urls))
+                self.remote_name.set(name)
+            self.github_url.set(urls.get(name, ""))
+
+        self.run_read(self.git_ops.get_remote_urls, on_success=on_loaded, error_message="获取远程仓库链接失败")
 
     @require_repo
     @handle_exception("更新历史记录")
     def update_history(self):
-        # 清空现有记录
-            for item in self.history_tree.get_children():
-                self.history_tree.delete(item)
-
-            # 获取时间范围
-            time_range = self.time_range.get()
-            now = datetime.now()
-
-            if time_range == "近三小时":
-                since = now - timedelta(hours=3)
-            elif time_range == "近12小时":
-                since = now - timedelta(hours=12)
-            elif time_range == "今天":
-                since = now.replace(hour=0, minute=0, second=0, microsecond=0)
-            elif time_range == "近七天":
-                since = now - timedelta(days=7)
-            else:  # 近一个月
-                since = now - timedelta(days=30)
-
-            # 获取提交历史
-            history = self.git_ops.get_commit_history(since=since)
-            for commit in history:
-                self.history_tree.insert("", 0, values=(
-                    commit['id'][:7],
-                    commit['date'].strftime("%Y-%m-%d %H:%M"),
-                    commit['message'],
-                    commit['author']
-                ))
+        # 清空现有记录，并在历史读取队列中关闭上一次未读完的历史
+        self.history_tree.delete(*self.history_tree.get_children())
+        if self.history_pages:
+            self.history_cancel.set()
+            self.scheduler.submit(self.history_pages.close, serial_key=("history", self.git_ops.repo_path))
+        self.history_cancel = threading.Event()
+
+        # 获取时间范围
+        time_range = self.time_range.get()
+        now = datetime.now()
+
+        if time_range == "近三小时":
+            since = now - timedelta(hours=3)
+        elif time_range == "近12小时":
+            since = now - timedelta(hours=12)
+        elif time_range == "今天":
+            since = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        elif time_range == "近七天":
+            since = now - timedelta(days=7)
+        else:  # 近一个月
+            since = now - timedelta(days=30)
+
+        # 只加载第一页，其余在滚动时按需加载
+        self.history_generation += 1
+        self.history_page_pending = False
+        self.history_since = since
+        self.history_last_id = None
+        self.history_pages = self.git_ops.iter_commit_history(since=since, cancel_event=self.history_cancel)
+        self.load_next_history_page()
+
+    def load_next_history_page(self):
+        """在后台读取下一页提交历史；同一仓库的历史读取按顺序执行"""
+        if not self.history_pages:
+            return
+        self.history_page_pending = True
+        generation = self.history_generation
+        report = self.error_reporter("更新历史记录")
+
+        def on_error(error):
+            # 切换时间范围时终止的旧读取不提示
+            if not isinstance(error, OperationCancelled):
+                report(error)
+
+        self.scheduler.submit(next, self.history_pages, None,
+                              serial_key=("history", self.git_ops.repo_path),
+                              on_success=lambda page: self.on_history_page(generation, page),
+                              on_error=on_error)
+
+    def on_history_page(self, generation, page):
+        """把一页提交历史追加到列表末尾（最新的在最上面）"""
+        if generation != self.history_generation:
+            # 时间范围已切换，丢弃旧结果
+            return
+        self.history_page_pending = False
+        if page is None:
+            self.history_pages = None
+            # 浅克隆读到截断处时，若时间范围内还可能有更早的提交，向远程加深历史
+            if not self.history_deepening:
+                self.run_read(self.git_ops.history_truncated, self.history_since,
+                              on_success=lambda truncated: truncated and self.deepen_history(generation),
+                              error_message="更新历史记录")
+            return
+        if page:
+            self.history_last_id = page[-1]['id']
+        for commit in page:
+            self.history_tree.insert("", tk.END, values=(
+                commit['id'][:7],
+                commit['date'].strftime("%Y-%m-%d %H:%M"),
+                commit['message'],
+                commit['author']
+            ))
+
+    def deepen_history(self, generation):
+        """加深浅克隆的历史，完成后从已显示的最后一个提交之后继续读取"""
+        if generation != self.history_generation or self.history_deepening:
+            return
+        self.history_deepening = True
+        progress = self.create_progress("正在下载更早的提交历史...")
+        frame, label, bar, channel = progress
+        channel.start()
+
+        def finish():
+            self.history_deepening = False
+            channel.close()
+            frame.pack_forget()
+
+        def on_deepened(_):
+            finish()
+            if generation != self.history_generation:
+                return
+            self.history_pages = self.git_ops.iter_commit_history(since=self.history_since,
+                                                                  after=self.history_last_id,
+                                                                  cancel_event=self.history_cancel)
+            self.load_next_history_page()
+
+        def on_error(error):
+            finish()
+            if not isinstance(error, OperationCancelled):
+                messagebox.showerror("错误", f"加载更早的历史失败: {str(error)}")
+
+        self.run_write(self.git_ops.deepen_history, progress_callback=channel.report,
+                       cancel_event=channel.cancel_event, on_success=on_deepened, on_error=on_error)
+
+    def on_history_scroll(self, first, last):
+        """历史记录滚动回调：接近底部时加载更多"""
+        self.history_scrollbar.set(first, last)
+        if self.history_pages and not self.history_page_pending and float(last) >= 0.9:
+            self.load_next_history_page()
 
     @require_repo
     @handle_exception("获取提交历史失败")
     def show_rollback_dialog(self):
-        """显示版本回退选择框"""
-        # 创建选择框窗口
-        dialog = tk.Toplevel(self.root)
-        dialog.title("选择回退版本")
-        dialog.geometry("600x400")
-        dialog.transient(self.root)
-        dialog.grab_set()
+        """显示版本回退选择框（提交记录在后台流式加载）"""
+        CommitPicker(self.root, self.scheduler, self.git_ops, on_confirm=self.do_rollback)
 
-        # 创建框架
-        frame = ttk.Frame(dialog, padding="10")
-        frame.pack(fill=tk.BOTH, expand=True)
-
-        # 创建单选框变量
-        selected_commit = tk.StringVar()
-
-        # 获取提交记录
-        commits = []
-
-        for commit in self.git_ops.repo.iter_commits():
-            commit_date = datetime.fromtimestamp(commit.committed_date)
-            commits.append((commit.hexsha, commit_date, commit.message))
-
-            # 创建单选按钮
-            radio = ttk.Radiobutton(
-                frame,
-                text=f"{commit_date.strftime('%Y-%m-%d %H:%M')} - {commit.message}",
-                value=commit.hexsha,
-                variable=selected_commit
-            )
-            radio.pack(anchor=tk.W, pady=2)
-
-        def do_rollback():
-            commit_id = selected_commit.get()
-            if not commit_id:
-                messagebox.showerror("错误", "请选择要回退的版本！")
-                return
+    def do_rollback(self, commit_id, picker):
+        """回退到选择框中选中的提交"""
+        if not messagebox.askyesno("确认", "回退前会自动保存当前的更改，可通过'撤销回退'恢复，是否继续？",
+                                   parent=picker.dialog):
+            return
+
+        def on_rollback_complete(entry):
+            message = f"已成功回退到提交 {commit_id[:7]}"
+            if entry.get('skipped'):
+                message += (f"\n\n{len(entry['skipped'])} 个未跟踪的大文件没有写入快照，仍保留在工作区：\n"
+                            + "\n".join(entry['skipped'][:10]))
+            messagebox.showinfo("成功", message)
+            self.update_history()
+            self.show_status_message()
+            picker.close()
 
-            if messagebox.askyesno("确认", "回退后将丢失该版本之后的所有更改，是否继续？"):
-                try:
-                    self.git_ops.repo.git.reset('--hard', commit_id)
-                    messagebox.showinfo("成功", f"已成功回退到提交 {commit_id[:7]}")
-                    self.update_history()
-                    self.show_status_message()
-                    dialog.destroy()
-                except Exception as e:
-                    messagebox.showerror("错误", f"回退失败: {str(e)}")
-
-        # 添加按钮
-        btn_frame = ttk.Frame(dialog)
-        btn_frame.pack(fill=tk.X, pady=10)
-        ttk.Button(btn_frame, text="回退", command=do_rollback).pack(side=tk.RIGHT, padx=5)
-        ttk.Button(btn_frame, text="取消", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
+        self.run_write(self.git_ops.rollback_to_commit, commit_id,
+                       on_success=on_rollback_complete, error_message="回退失败")
+
+    @require_repo
+    @handle_exception("撤销回退失败")
+    def undo_rollback(self):
+        """撤销最近一次回退，恢复回退前的提交、暂存区和工作区"""
+        self.run_read(self.git_ops.get_rollback_snapshots, on_success=self.confirm_undo_rollback,
+                      error_message="读取回退记录失败")
+
+    def confirm_undo_rollback(self, snapshots):
+        if not snapshots:
+            messagebox.showinfo("提示", "没有可撤销的回退记录")
+            return
+        latest = snapshots[-1]
+        saved_at = datetime.fromtimestamp(latest['time']).strftime('%Y-%m-%d %H:%M:%S')
+        if not messagebox.askyesno("确认", f"将恢复到 {saved_at} 保存的状态（{latest['description']}），"
+                                         f"当前状态也会被保存，是否继续？"):
+            return
+
+        def on_undo_complete(entry):
+            messagebox.showinfo("成功", f"已恢复到提交 {entry['head'][:7]}")
+            self.update_history()
+            self.show_status_message()
+
+        self.run_write(self.git_ops.undo_rollback, latest['id'], on_success=on_undo_complete,
+                       error_message="撤销回退失败")
 
     def show_ssh_error_dialog(self):
         """显示SSH错误对话框"""
@@ -374,80 +799,83 @@ class GitGUI:
         ttk.Button(button_frame, text="查看配置教程", command=open_tutorial).pack(side=tk.LEFT, padx=5)
         ttk.Button(button_frame, text="确定", command=dialog.destroy).pack(side=tk.RIGHT, padx=5)
 
+    def create_progress(self, text, prefix=""):
+        """在主界面创建带取消按钮的进度条，返回 (frame, label, bar, channel)
+
+        prefix 显示在进度文字之前，多个进度条同时显示时用于区分（例如远程名）。
+        """
+        frame = ttk.Frame(self.main_frame)
+        frame.pack(fill=tk.X, pady=5)
+        label = ttk.Label(frame, text=prefix + text)
+        label.pack(side=tk.LEFT, padx=5)
+        bar = ttk.Progressbar(frame, mode='determinate')
+        bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        def render(update):
+            bar['value'] = update.percent
+            label.config(text=prefix + format_progress(update))
+
+        channel = ProgressChannel(self.root, render)
+        ttk.Button(frame, text="取消", command=channel.cancel).pack(side=tk.LEFT, padx=5)
+        return frame, label, bar, channel
+
     @require_repo
     def push_to_remote(self):
         """推送到远程仓库"""
-        if self.is_pushing or self.is_pulling:
-            messagebox.showwarning("提示", "有正在进行的操作，请等待完成...")
+        # 检查Git配置
+        self.run_read(self.git_ops.check_git_config, on_success=self.start_push, error_message="推送失败")
+
+    def ensure_git_config(self, git_config):
+        """未配置用户信息时询问并排队写入，返回是否可以继续推送"""
+        if git_config:
+            return True
+        if messagebox.askyesno("提示", "未配置Git用户信息，是否现在配置？"):
+            name = simpledialog.askstring("配置", "请输入您的用户名:")
+            email = simpledialog.askstring("配置", "请输入您的邮箱:")
+            if name and email:
+                self.run_write(self.git_ops.set_git_config, name, email, error_message="推送失败")
+                return True
+        return False
+
+    def start_push(self, git_config):
+        """确认用户信息后排队执行推送"""
+        if not self.ensure_git_config(git_config):
             return
 
-        try:
-            # 检查Git配置
-            git_config = self.git_ops.check_git_config()
-            if not git_config:
-                if messagebox.askyesno("提示", "未配置Git用户信息，是否现在配置？"):
-                    name = simpledialog.askstring("配置", "请输入您的用户名:")
-                    email = simpledialog.askstring("配置", "请输入您的邮箱:")
-                    if name and email:
-                        self.git_ops.set_git_config(name, email)
-                    else:
-                        return
-                else:
-                    return
+        # 显示进度条；前面有操作时先排队等待
+        progress = self.create_progress("等待前面的操作完成...")
+        frame, label, bar, channel = progress
 
-            # 显示进度条
-            self.progress_frame = ttk.Frame(self.main_frame)
-            self.progress_frame.pack(fill=tk.X, pady=5)
-            self.progress_label = ttk.Label(self.progress_frame, text="正在推送到远程...")
-            self.progress_label.pack(side=tk.LEFT, padx=5)
-            self.progress_bar = ttk.Progressbar(self.progress_frame, mode='determinate')
-            self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            self.root.update()
-
-            def update_progress(progress, message):
-                if not self.is_pushing:  # 如果操作被取消，不更新进度
-                    return
-                self.progress_bar['value'] = progress
-                if message:
-                    self.progress_label.config(text=f"正在推送: {message}")
-                self.root.update()
-
-            def push_thread():
-                error = None
-                try:
-                    self.is_pushing = True
-                    # 执行推送
-                    self.git_ops.push_to_remote(progress_callback=update_progress)
-                    # 在主线程中更新UI
-                    self.root.after(0, self.on_push_complete)
-                except Exception as e:
-                    error = e
-                    # 在主线程中显示错误
-                    self.root.after(0, lambda: self.on_push_error(error))
-                finally:
-                    self.is_pushing = False
-
-            # 启动推送线程
-            threading.Thread(target=push_thread, daemon=True).start()
-
-        except Exception as e:
-            self.is_pushing = False
-            self.progress_frame.pack_forget()
-            messagebox.showerror("错误", f"推送失败: {str(e)}")
-
-    def on_push_complete(self):
+        def on_start():
+            label.config(text="正在推送到远程...")
+            channel.start()
+
+        # 推送到远程名输入框中选择的远程
+        remote = self.remote_name.get().strip() or "origin"
+        self.run_write(self.git_ops.push_to_remote, progress_callback=channel.report,
+                       cancel_event=channel.cancel_event, remote=remote, on_start=on_start,
+                       on_success=lambda _: self.on_push_complete(progress),
+                       on_error=lambda error: self.on_push_error(error, progress))
+
+    def on_push_complete(self, progress):
         """推送完成后的处理"""
-        self.progress_bar['value'] = 100
-        self.progress_label.config(text="推送完成！")
-        self.root.update()
+        frame, label, bar, channel = progress
+        channel.close()
+        bar['value'] = 100
+        label.config(text="推送完成！")
         messagebox.showinfo("成功", "已成功推送到远程仓库！")
         self.show_status_message()
-        self.progress_frame.pack_forget()
+        frame.pack_forget()
 
-    def on_push_error(self, error):
+    def on_push_error(self, error, progress):
         """推送错误处理"""
-        self.progress_frame.pack_forget()
-        if isinstance(error, GitCommandError):
+        from git import GitCommandError
+        frame, label, bar, channel = progress
+        channel.close()
+        frame.pack_forget()
+        if isinstance(error, OperationCancelled):
+            self.show_status_message()
+        elif isinstance(error, GitCommandError):
             error_msg = str(error)
             if "Could not read from remote repository" in error_msg:
                 self.show_ssh_error_dialog()
@@ -456,72 +884,109 @@ class GitGUI:
         else:
             messagebox.showerror("错误", f"推送失败: {str(error)}")
 
+    @require_repo
+    def push_to_all_remotes(self):
+        """同时推送到所有远程仓库"""
+        self.run_read(self.git_ops.check_git_config, on_success=self.start_push_all, error_message="推送失败")
+
+    def start_push_all(self, git_config):
+        """每个远程一个进度条，排队后由 push_to_all 并发推送，各自显示结果"""
+        if not self.ensure_git_config(git_config):
+            return
+        remotes = self.git_ops.get_remotes()
+        if not remotes:
+            messagebox.showerror("错误", "未配置远程仓库，请先添加远程仓库！")
+            return
+        progresses = {name: self.create_progress("等待前面的操作完成...", prefix=f"{name}: ") for name in remotes}
+
+        def on_start():
+            for name, (frame, label, bar, channel) in progresses.items():
+                label.config(text=f"{name}: 正在推送...")
+                channel.start()
+
+        def on_remote_done(name, error):
+            # 在工作线程中调用：经调度器的结果队列转到主线程更新这个远程的进度条，不等其他远程
+            self.scheduler.post(finish_remote, name, error)
+
+        def finish_remote(name, error):
+            frame, label, bar, channel = progresses[name]
+            channel.close()
+            if error is None:
+                bar['value'] = 100
+                label.config(text=f"{name}: 推送完成")
+            elif isinstance(error, OperationCancelled):
+                label.config(text=f"{name}: 已取消")
+            else:
+                label.config(text=f"{name}: 推送失败")
+
+        def on_complete(results):
+            for frame, label, bar, channel in progresses.values():
+                channel.close()
+                frame.pack_forget()
+            failed = {name: error for name, error in results.items()
+                      if error is not None and not isinstance(error, OperationCancelled)}
+            if any("Could not read from remote repository" in str(error) for error in failed.values()):
+                self.show_ssh_error_dialog()
+            if failed:
+                lines = [f"{name}: {error}" for name, error in failed.items()]
+                messagebox.showerror("错误", f"{len(failed)}/{len(results)} 个远程推送失败：\n\n" + "\n\n".join(lines))
+            elif not any(results.values()):
+                messagebox.showinfo("成功", f"已成功推送到全部 {len(results)} 个远程仓库！")
+            self.show_status_message()
+
+        def on_error(error):
+            for frame, label, bar, channel in progresses.values():
+                channel.close()
+                frame.pack_forget()
+            messagebox.showerror("错误", f"推送失败: {error}")
+
+        self.run_write(self.git_ops.push_to_all,
+                       progress_callbacks={name: p[3].report for name, p in progresses.items()},
+                       cancel_events={name: p[3].cancel_event for name, p in progresses.items()},
+                       on_remote_done=on_remote_done, on_start=on_start, on_success=on_complete,
+                       on_error=on_error)
+
     @require_repo
     def pull_from_remote(self):
         """从远程仓库拉取更新"""
-        if self.is_pushing or self.is_pulling:
-            messagebox.showwarning("提示", "有正在进行的操作，请等待完成...")
+        # 检查是否配置了远程仓库
+        if 'origin' not in self.git_ops.get_remotes():
+            messagebox.showerror("错误", "未配置远程仓库，请先添加远程仓库！")
             return
 
-        try:
-            # 检查是否配置了远程仓库
-            if 'origin' not in self.git_ops.get_remotes():
-                messagebox.showerror("错误", "未配置远程仓库，请先添加远程仓库！")
-                return
+        # 显示进度条；前面有操作时先排队等待
+        progress = self.create_progress("等待前面的操作完成...")
+        frame, label, bar, channel = progress
 
-            # 显示进度条
-            self.progress_frame = ttk.Frame(self.main_frame)
-            self.progress_frame.pack(fill=tk.X, pady=5)
-            self.progress_label = ttk.Label(self.progress_frame, text="正在拉取更新...")
-            self.progress_label.pack(side=tk.LEFT, padx=5)
-            self.progress_bar = ttk.Progressbar(self.progress_frame, mode='determinate')
-            self.progress_bar.pack(side=tk.LEFT, fill=tk.X, expand=True)
-            self.root.update()
-
-            def update_progress(progress, message):
-                if not self.is_pulling:  # 如果操作被取消，不更新进度
-                    return
-                self.progress_bar['value'] = progress
-                if message:
-                    self.progress_label.config(text=f"正在拉取: {message}")
-                self.root.update()
-
-            def pull_thread():
-                try:
-                    self.is_pulling = True
-                    # 执行拉取
-                    self.git_ops.pull_from_remote(progress_callback=update_progress)
-                    # 在主线程中更新UI
-                    self.root.after(0, self.on_pull_complete)
-                except Exception as e:
-                    error = e
-                    # 在主线程中显示错误
-                    self.root.after(0, lambda: self.on_pull_error(error))
-                finally:
-                    self.is_pulling = False
-
-            # 启动拉取线程
-            threading.Thread(target=pull_thread, daemon=True).start()
-
-        except Exception as e:
-            self.is_pulling = False
-            self.progress_frame.pack_forget()
-            messagebox.showerror("错误", f"拉取失败: {str(e)}")
-
-    def on_pull_complete(self):
+        def on_start():
+            label.config(text="正在拉取更新...")
+            channel.start()
+
+        self.run_write(self.git_ops.pull_from_remote, progress_callback=channel.report,
+                       cancel_event=channel.cancel_event, on_start=on_start,
+                       on_success=lambda _: self.on_pull_complete(progress),
+                       on_error=lambda error: self.on_pull_error(error, progress))
+
+    def on_pull_complete(self, progress):
         """拉取完成后的处理"""
-        self.progress_bar['value'] = 100
-        self.progress_label.config(text="拉取完成！")
-        self.root.update()
+        frame, label, bar, channel = progress
+        channel.close()
+        bar['value'] = 100
+        label.config(text="拉取完成！")
         messagebox.showinfo("成功", "已成功从远程仓库拉取更新！")
         self.update_history()
         self.show_status_message()
-        self.progress_frame.pack_forget()
+        frame.pack_forget()
 
-    def on_pull_error(self, error):
+    def on_pull_error(self, error, progress):
         """拉取错误处理"""
-        self.progress_frame.pack_forget()
-        if isinstance(error, GitCommandError):
+        from git import GitCommandError
+        frame, label, bar, channel = progress
+        channel.close()
+        frame.pack_forget()
+        if isinstance(error, OperationCancelled):
+            self.show_status_message()
+        elif isinstance(error, GitCommandError):
             error_msg = str(error)
             if "Could not read from remote repository" in error_msg:
                 self.show_ssh_error_dialog()
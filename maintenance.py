@@ -0,0 +1,257 @@
+import os
+import glob
+import time
+import struct
+import subprocess
+
+from git_resolver import git_supports
+
+# 与 git maintenance 的任务名一致
+TASK_COMMIT_GRAPH = "commit-graph"
+TASK_INCREMENTAL_REPACK = "incremental-repack"
+TASK_LOOSE_OBJECTS = "loose-objects"
+
+TASK_NAMES = {
+    TASK_COMMIT_GRAPH: "写入提交图",
+    TASK_INCREMENTAL_REPACK: "增量重新打包",
+    TASK_LOOSE_OBJECTS: "整理松散对象",
+}
+
+# 不支持 git maintenance（< 2.30）时的等价命令
+FALLBACK_COMMANDS = {
+    TASK_COMMIT_GRAPH: [["commit-graph", "write", "--reachable", "--split"]],
+    TASK_INCREMENTAL_REPACK: [["multi-pack-index", "write"], ["multi-pack-index", "expire"]],
+    TASK_LOOSE_OBJECTS: [["prune-packed", "--quiet"], ["repack", "-d", "-l", "-q"]],
+}
+
+
+def _read_header(path, size):
+    try:
+        with open(path, "rb") as f:
+            return f.read(size)
+    except OSError:
+        return b""
+
+
+def _pack_object_count(idx_path):
+    """读取 .idx（第 2 版）记录的对象数（扇出表的最后一项）"""
+    header = _read_header(idx_path, 8 + 256 * 4)
+    if len(header) < 8 + 256 * 4 or header[:4] != b"\377tOc":
+        return 0
+    return struct.unpack(">I", header[-4:])[0]
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return 0.0
+
+
+def _graph_commit_count(path):
+    """读取 commit-graph 文件记录的提交数（OIDF 扇出表的最后一项）"""
+    with open(path, "rb") as f:
+        header = f.read(8)
+        if len(header) < 8 or header[:4] != b"CGPH":
+            return 0
+        chunk_count = header[6]
+        table = f.read(12 * (chunk_count + 1))
+        for i in range(chunk_count):
+            chunk_id, offset = struct.unpack(">4sQ", table[i * 12:(i + 1) * 12])
+            if chunk_id == b"OIDF":
+                f.seek(offset + 255 * 4)
+                return struct.unpack(">I", f.read(4))[0]
+    return 0
+
+
+class RepoMaintenance:
+    """检测并执行仓库维护任务：提交图、多包索引和松散对象
+
+    历史查询、领先/落后计算在没有提交图时需要逐个解析提交对象，
+    包和松散对象过多时每次对象查找都要多次打开文件，仓库越大越明显。
+    """
+
+    def __init__(self, repo_path, git_executable="git", stale_objects=1000, loose_limit=6700, pack_limit=10):
+        self.repo_path = repo_path
+        self.git_executable = git_executable
+        self.git_dir = os.path.join(repo_path, ".git")
+        self.objects_dir = os.path.join(self.git_dir, "objects")
+        # 提交图写入后引用有更新、且新增的对象（松散对象和之后生成的包）超过该数量时视为过期
+        self.stale_objects = stale_objects
+        # 与 gc.auto 默认值相同的松散对象阈值
+        self.loose_limit = loose_limit
+        self.pack_limit = pack_limit
+
+    def _git(self, *args, check=True):
+        result = subprocess.run([self.git_executable, *args], cwd=self.repo_path,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if check and result.returncode != 0:
+            raise Exception(f"git {args[0]} 失败: {result.stderr.decode(errors='replace').strip()}")
+        return result
+
+    # ---- 检测 ----
+
+    def _graph_paths(self):
+        """提交图文件：单个 commit-graph，或拆分提交图链中的各层；没有时返回 None"""
+        info_dir = os.path.join(self.objects_dir, "info")
+        single = os.path.join(info_dir, "commit-graph")
+        if os.path.exists(single):
+            return [single]
+        chain = os.path.join(info_dir, "commit-graphs", "commit-graph-chain")
+        try:
+            with open(chain, "r") as f:
+                hashes = f.read().split()
+        except OSError:
+            return None
+        return [chain] + [os.path.join(info_dir, "commit-graphs", f"graph-{h}.graph") for h in hashes]
+
+    def commit_graph_commits(self):
+        """提交图中的提交数；没有提交图时返回 None"""
+        paths = self._graph_paths()
+        if paths is None:
+            return None
+        return sum(_graph_commit_count(path) for path in paths if path.endswith("graph"))
+
+    def commit_graph_time(self):
+        """提交图最近一次写入的时间；没有提交图时返回 None"""
+        paths = self._graph_paths()
+        return max(_mtime(path) for path in paths) if paths else None
+
+    def refs_time(self):
+        """HEAD 和引用最近一次更新的时间（只 stat 引用文件，不读取任何对象）"""
+        latest = max(_mtime(os.path.join(self.git_dir, name)) for name in ("HEAD", "packed-refs"))
+        for dirpath, _, filenames in os.walk(os.path.join(self.git_dir, "refs")):
+            for name in filenames:
+                latest = max(latest, _mtime(os.path.join(dirpath, name)))
+        return latest
+
+    def count_objects(self):
+        """git count-objects -v 的结果：count（松散对象数）、in-pack、packs 等，只统计目录和包索引"""
+        output = self._git("count-objects", "-v").stdout.decode(errors="replace")
+        counts = {}
+        for line in output.splitlines():
+            key, _, value = line.partition(":")
+            if value.strip().isdigit():
+                counts[key.strip()] = int(value)
+        return counts
+
+    def objects_since(self, since):
+        """估算某个时间之后生成的包中的对象数（按 .idx 的时间，git 写入已有对象时会刷新 .pack 的时间）"""
+        indexes = (path[:-5] + ".idx" for path in self.pack_files())
+        return sum(_pack_object_count(path) for path in indexes if _mtime(path) > since)
+
+    def pack_files(self):
+        return glob.glob(os.path.join(self.objects_dir, "pack", "*.pack"))
+
+    def multi_pack_index_packs(self):
+        """多包索引覆盖的包数量；没有多包索引时返回 None"""
+        header = _read_header(os.path.join(self.objects_dir, "pack", "multi-pack-index"), 12)
+        if len(header) < 12 or header[:4] != b"MIDX":
+            return None
+        return struct.unpack(">I", header[8:12])[0]
+
+    def inspect(self):
+        """检查仓库状态，返回检测结果和建议执行的任务
+
+        不遍历提交历史：对象数量来自 git count-objects -v，提交图是否过期按它与引用的更新时间
+        以及之后新增的对象数判断。
+        """
+        counts = self.count_objects()
+        loose = counts.get("count", 0)
+        objects = loose + counts.get("in-pack", 0)
+        packs = counts.get("packs", 0)
+        graph_commits = self.commit_graph_commits()
+        midx_packs = self.multi_pack_index_packs()
+
+        graph_time = self.commit_graph_time()
+        if graph_time is None:
+            commit_graph = "missing"
+        elif self.refs_time() > graph_time and loose + self.objects_since(graph_time) > self.stale_objects:
+            commit_graph = "stale"
+        else:
+            commit_graph = "ok"
+        if packs < 2:
+            multi_pack_index = "ok"
+        elif midx_packs is None:
+            multi_pack_index = "missing"
+        else:
+            multi_pack_index = "stale" if midx_packs != packs else "ok"
+
+        tasks = []
+        if objects and commit_graph != "ok" and git_supports('commit_graph'):
+            tasks.append(TASK_COMMIT_GRAPH)
+        # 与 git maintenance 的顺序一致：先把松散对象打包，再整理包
+        if loose > self.loose_limit:
+            tasks.append(TASK_LOOSE_OBJECTS)
+        if multi_pack_index != "ok" or packs > self.pack_limit:
+            tasks.append(TASK_INCREMENTAL_REPACK)
+
+        return {
+            "objects": objects,
+            "commit_graph": commit_graph,
+            "commit_graph_commits": graph_commits,
+            "packs": packs,
+            "multi_pack_index": multi_pack_index,
+            "loose_objects": loose,
+            "tasks": tasks,
+        }
+
+    # ---- 计时 ----
+
+    def measure(self):
+        """测量历史查询、领先/落后计算和状态查询的耗时（秒）"""
+        probes = {
+            "history": ["log", "--format=%H", "-n", "1000"],
+            "history_count": ["rev-list", "--count", "HEAD"],
+            "status": ["--no-optional-locks", "status", "--porcelain", "--untracked-files=all"],
+        }
+        if self._git("rev-parse", "--verify", "-q", "@{upstream}", check=False).returncode == 0:
+            probes["ahead_behind"] = ["rev-list", "--left-right", "--count", "HEAD...@{upstream}"]
+        timings = {}
+        for name, args in probes.items():
+            start = time.perf_counter()
+            self._git(*args, check=False)
+            timings[name] = time.perf_counter() - start
+        return timings
+
+    # ---- 执行 ----
+
+    def run_task(self, task):
+        if git_supports('maintenance'):
+            self._git("maintenance", "run", f"--task={task}", "--quiet")
+        else:
+            for args in FALLBACK_COMMANDS[task]:
+                self._git(*args)
+
+    def run(self, tasks=None, cancel_event=None):
+        """执行维护任务（默认执行 inspect 建议的任务），返回包含前后耗时对比的报告"""
+        before_state = self.inspect()
+        tasks = before_state["tasks"] if tasks is None else list(tasks)
+        report = {"before": before_state, "timings_before": self.measure(), "tasks": {}}
+        for task in tasks:
+            # 任务之间检查取消，正在运行的 git 命令不中断，避免留下不完整的包
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            start = time.perf_counter()
+            self.run_task(task)
+            report["tasks"][task] = time.perf_counter() - start
+        report["after"] = self.inspect()
+        report["timings_after"] = self.measure()
+        return report
+
+
+def format_report(report):
+    """把维护报告格式化为界面文字"""
+    lines = []
+    if report["tasks"]:
+        for task, elapsed in report["tasks"].items():
+            lines.append(f"{TASK_NAMES.get(task, task)}: {elapsed:.2f} 秒")
+    else:
+        lines.append("仓库状态良好，无需维护")
+    labels = {"history": "历史查询", "history_count": "提交计数", "ahead_behind": "领先/落后", "status": "状态查询"}
+    for name, label in labels.items():
+        if name in report["timings_before"]:
+            before = report["timings_before"][name] * 1000
+            after = report["timings_after"][name] * 1000
+            lines.append(f"{label}: {before:.0f} ms → {after:.0f} ms")
+    return "\n".join(lines)
@@ -0,0 +1,136 @@
+import re
+import time
+import threading
+import collections
+from typing import NamedTuple, Optional
+
+# 与 git.RemoteProgress 的 op_code 取值一致（这里不导入 GitPython，以免拖慢启动）
+BEGIN, END, COUNTING, COMPRESSING, WRITING, RECEIVING, RESOLVING, FINDING_SOURCES, CHECKING_OUT = \
+    [1 << x for x in range(9)]
+STAGE_MASK = BEGIN | END
+
+# 各阶段在界面上的名称
+STAGE_NAMES = {
+    COUNTING: "计数对象",
+    COMPRESSING: "压缩对象",
+    WRITING: "写入对象",
+    RECEIVING: "接收对象",
+    RESOLVING: "处理差异",
+    FINDING_SOURCES: "查找源",
+    CHECKING_OUT: "检出文件",
+}
+
+_UNITS = {"bytes": 1, "KiB": 1024, "MiB": 1024 ** 2, "GiB": 1024 ** 3}
+_RATE_RE = re.compile(r"([\d.]+) (bytes|KiB|MiB|GiB)(?: \| ([\d.]+) (bytes|KiB|MiB|GiB)/s)?")
+
+
+class ProgressUpdate(NamedTuple):
+    """某一阶段的进度快照"""
+    stage: str
+    percent: float
+    cur_count: float
+    max_count: Optional[float]
+    message: str
+    transferred: Optional[int]  # 已传输字节数
+    rate: Optional[float]  # 字节/秒
+    eta: Optional[float]  # 预计剩余秒数
+
+
+class ProgressChannel:
+    """工作线程与界面之间的进度通道
+
+    工作线程只往无锁队列（deque）里追加原始进度，主线程以固定帧率取出，
+    同一帧内的多条更新合并为最新的一条后再刷新界面。
+    """
+
+    def __init__(self, root, on_update, fps=15):
+        self.root = root
+        self.on_update = on_update
+        self.interval = max(1, int(1000 / fps))
+        self.cancel_event = threading.Event()
+        self._queue = collections.deque()
+        self._stage_started = {}
+        self._running = False
+
+    def report(self, op_code, cur_count, max_count=None, message=''):
+        """进度回调（签名与 RemoteProgress.update 一致），可在任意线程中调用"""
+        self._queue.append((time.monotonic(), op_code, cur_count, max_count, message))
+
+    def cancel(self):
+        """请求终止正在运行的 git 进程"""
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        return self.cancel_event.is_set()
+
+    def start(self):
+        """开始按帧率刷新界面"""
+        if not self._running:
+            self._running = True
+            self.root.after(self.interval, self._tick)
+
+    def close(self):
+        """停止刷新，并把最后的进度推送到界面"""
+        self._running = False
+        self._drain()
+
+    def _tick(self):
+        if not self._running:
+            return
+        self._drain()
+        self.root.after(self.interval, self._tick)
+
+    def _drain(self):
+        latest = None
+        while True:
+            try:
+                latest = self._queue.popleft()
+            except IndexError:
+                break
+        if latest is not None:
+            self.on_update(self._build_update(*latest))
+
+    def _build_update(self, timestamp, op_code, cur_count, max_count, message):
+        stage_code = op_code & ~STAGE_MASK
+        stage = STAGE_NAMES.get(stage_code, "")
+        cur_count = cur_count or 0
+        percent = (cur_count / max_count * 100) if max_count else 0
+
+        # 以阶段开始时刻为基准估算剩余时间
+        started = self._stage_started.setdefault(stage_code, (timestamp, cur_count))
+        eta = None
+        elapsed = timestamp - started[0]
+        done = cur_count - started[1]
+        if max_count and elapsed > 0 and done > 0:
+            eta = (max_count - cur_count) / (done / elapsed)
+
+        transferred = rate = None
+        match = _RATE_RE.search(message or "")
+        if match:
+            transferred = int(float(match.group(1)) * _UNITS[match.group(2)])
+            if match.group(3):
+                rate = float(match.group(3)) * _UNITS[match.group(4)]
+
+        return ProgressUpdate(stage, percent, cur_count, max_count, message or "", transferred, rate, eta)
+
+
+def format_progress(update):
+    """把进度快照格式化为界面文字"""
+    parts = [update.stage or "处理中"]
+    if update.max_count:
+        parts.append(f"{update.percent:.0f}% ({int(update.cur_count)}/{int(update.max_count)})")
+    if update.rate:
+        parts.append(f"{format_size(update.rate)}/s")
+    elif update.transferred:
+        parts.append(format_size(update.transferred))
+    if update.eta is not None and update.percent < 100:
+        parts.append(f"剩余约 {int(update.eta)} 秒")
+    return "  ".join(parts)
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size:.1f} {unit}" if unit != "B" else f"{int(size)} B"
+        size /= 1024
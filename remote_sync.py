@@ -0,0 +1,177 @@
+import subprocess
+import threading
+import configparser
+
+from git_resolver import CONFIG_FILE
+
+# 默认每 5 分钟在后台抓取一次；连续失败时间隔翻倍，最长 1 小时
+DEFAULT_FETCH_INTERVAL = 300
+MAX_FETCH_BACKOFF = 3600
+
+
+def configured_fetch_interval():
+    """读取配置文件 config.ini 中 [fetch] interval（秒），0 表示关闭后台抓取"""
+    parser = configparser.ConfigParser()
+    try:
+        parser.read(CONFIG_FILE, encoding="utf-8")
+        return max(0, parser.getint("fetch", "interval", fallback=DEFAULT_FETCH_INTERVAL))
+    except (configparser.Error, ValueError):
+        return DEFAULT_FETCH_INTERVAL
+
+
+class AheadBehindTracker:
+    """按 (HEAD, 上游) 两端提交缓存领先/落后的提交数，并在两端前进时增量更新
+
+    完整计算需要遍历两端到合并基点之间的全部提交；某一端只是向前移动（提交、抓取）时，
+    只需遍历新增的提交：
+        上游 U 前进到 U'：behind += |U' - U - H|，ahead -= |U' - U| - |U' - U - H|
+        HEAD H 前进到 H'：ahead += |H' - H - U|，behind -= |H' - H| - |H' - H - U|
+    某一端被改写（回退、强制推送）时重新完整计算。
+    """
+
+    def __init__(self, repo_path, git_executable="git"):
+        self.repo_path = repo_path
+        self.git_executable = git_executable
+        self._lock = threading.Lock()
+        self._cached = None  # (head, upstream, ahead, behind)
+        # 完整计算的次数，用于测试和基准
+        self.full_counts = 0
+
+    def _git(self, *args):
+        return subprocess.run([self.git_executable, *args], cwd=self.repo_path,
+                              stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+
+    def _count(self, *revisions):
+        result = self._git("rev-list", "--count", *revisions, "--")
+        if result.returncode != 0:
+            raise Exception(f"git rev-list 失败: {result.stderr.decode(errors='replace').strip()}")
+        return int(result.stdout)
+
+    def _is_ancestor(self, old, new):
+        return self._git("merge-base", "--is-ancestor", old, new).returncode == 0
+
+    def _full(self, head, upstream):
+        self.full_counts += 1
+        result = self._git("rev-list", "--left-right", "--count", f"{head}...{upstream}", "--")
+        if result.returncode != 0:
+            raise Exception(f"git rev-list 失败: {result.stderr.decode(errors='replace').strip()}")
+        ahead, behind = result.stdout.split()
+        return int(ahead), int(behind)
+
+    def _advance(self, old, new, other):
+        """一端从 old 前进到 new 时，返回 (新增且不在另一端的提交数, 新增的提交数)"""
+        return self._count(new, f"^{old}", f"^{other}"), self._count(new, f"^{old}")
+
+    def counts(self, head, upstream):
+        """返回 (ahead, behind)；head 和 upstream 为提交 sha"""
+        if head == upstream:
+            return 0, 0
+        with self._lock:
+            cached = self._cached
+            if cached and cached[:2] == (head, upstream):
+                return cached[2], cached[3]
+
+            if cached is None:
+                ahead, behind = self._full(head, upstream)
+            else:
+                old_head, old_upstream, ahead, behind = cached
+                if old_upstream != upstream:
+                    if self._is_ancestor(old_upstream, upstream):
+                        outside, total = self._advance(old_upstream, upstream, old_head)
+                        behind += outside
+                        ahead -= total - outside
+                    else:
+                        ahead, behind = self._full(old_head, upstream)
+                if old_head != head:
+                    if self._is_ancestor(old_head, head):
+                        outside, total = self._advance(old_head, head, upstream)
+                        ahead += outside
+                        behind -= total - outside
+                    else:
+                        ahead, behind = self._full(head, upstream)
+
+            self._cached = (head, upstream, ahead, behind)
+            return ahead, behind
+
+    def reset(self):
+        with self._lock:
+            self._cached = None
+
+
+class BackgroundFetcher:
+    """定时在后台抓取远程（只更新远程跟踪分支，不修改工作区），失败时按指数退避延长间隔
+
+    抓取使用仓库自己的 "<仓库路径>#fetch" 串行队列：只更新远程跟踪分支，网络慢或远程无响应时
+    也不会挡住用户的提交、暂存等写操作，同一时间最多只有一次后台抓取。仓库的写队列中有任务时跳过这一轮，
+    不与用户的推送、拉取同时访问远程。
+    """
+
+    def __init__(self, root, scheduler, git_ops, on_fetched=None, interval=None, max_backoff=MAX_FETCH_BACKOFF):
+        self.root = root
+        self.scheduler = scheduler
+        self.git_ops = git_ops
+        self.on_fetched = on_fetched
+        self.interval = configured_fetch_interval() if interval is None else interval
+        self.max_backoff = max_backoff
+        self.failures = 0
+        self.last_error = None
+        self._after = None
+        self._job = None
+        self._running = False
+
+    def start(self, delay=None):
+        """开始定时抓取；interval 为 0 时不做任何事"""
+        self.stop()
+        if not self.interval:
+            return
+        self._running = True
+        self.failures = 0
+        self._schedule(self.interval if delay is None else delay)
+
+    def stop(self):
+        """停止定时抓取，并终止正在运行的抓取"""
+        self._running = False
+        if self._after:
+            self.root.after_cancel(self._after)
+            self._after = None
+        if self._job:
+            self._job.cancel()
+            self._job = None
+
+    def next_delay(self):
+        return min(self.interval * 2 ** self.failures, max(self.interval, self.max_backoff))
+
+    def _schedule(self, seconds):
+        self._after = self.root.after(int(seconds * 1000), self._tick)
+
+    def _tick(self):
+        self._after = None
+        if not self._running:
+            return
+        if not self.git_ops.repo:
+            self._schedule(self.interval)
+            return
+        if self.scheduler.is_busy(self.git_ops.repo_path):
+            # 用户的写操作（可能正是推送或拉取）排队或执行中，这一轮不抓取
+            self._schedule(self.interval)
+            return
+        repo = self.git_ops.repo
+        self._job = self.scheduler.submit(self.git_ops.background_fetch,
+                                          serial_key=f"{self.git_ops.repo_path}#fetch", cancellable=True,
+                                          on_success=lambda fetched: self._on_success(repo, fetched),
+                                          on_error=self._on_error)
+
+    def _on_success(self, repo, fetched):
+        self.failures = 0
+        self.last_error = None
+        if self._running:
+            self._schedule(self.interval)
+        if fetched and self.on_fetched and repo is self.git_ops.repo:
+            self.on_fetched()
+
+    def _on_error(self, error):
+        # 网络不通或认证失败时不弹窗，只延长下一次抓取的间隔
+        self.failures += 1
+        self.last_error = error
+        if self._running:
+            self._schedule(self.next_delay())
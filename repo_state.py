@@ -0,0 +1,96 @@
+import os
+import threading
+from typing import Dict, NamedTuple, Optional
+
+from status_watcher import git_state_signature
+
+
+def config_files(repo_path):
+    """影响仓库配置的文件：仓库配置、全局配置和 XDG 配置"""
+    home = os.path.expanduser("~")
+    xdg = os.environ.get("XDG_CONFIG_HOME") or os.path.join(home, ".config")
+    return (
+        os.path.join(repo_path, ".git", "config"),
+        os.path.join(home, ".gitconfig"),
+        os.path.join(xdg, "git", "config"),
+    )
+
+
+def _stat(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size
+    except OSError:
+        return None
+
+
+class RepoState(NamedTuple):
+    """推送/拉取前需要检查的仓库状态快照"""
+    head_valid: bool  # HEAD 是否指向已存在的提交（空仓库为 False）
+    head_sha: Optional[str]
+    branch: Optional[str]  # 分离 HEAD 时为 None
+    upstream: Optional[str]  # 例如 origin/main，未设置时为 None
+    remotes: Dict[str, str]  # 远程名 -> URL
+    user_name: Optional[str]
+    user_email: Optional[str]
+    fsmonitor: Optional[str] = None  # core.fsmonitor（钩子路径或 true）
+
+
+class RepoStateCache:
+    """缓存 RepoState，只在 HEAD、引用或配置文件的 stat 签名变化时重新读取
+
+    读取全部在进程内完成（GitPython 直接解析引用和配置文件），不启动 git 子进程。
+    """
+
+    def __init__(self, repo):
+        self.repo = repo
+        self.repo_path = repo.working_tree_dir
+        self._lock = threading.Lock()
+        self._cached = None
+
+    def signature(self):
+        return git_state_signature(self.repo_path), tuple(_stat(path) for path in config_files(self.repo_path))
+
+    def invalidate(self):
+        with self._lock:
+            self._cached = None
+
+    def get(self):
+        signature = self.signature()
+        with self._lock:
+            if self._cached and self._cached[0] == signature:
+                return self._cached[1]
+            state = self._read()
+            self._cached = (signature, state)
+            return state
+
+    def _read(self):
+        from git.refs.symbolic import SymbolicReference
+
+        head = self.repo.head
+        # 只解析引用文件得到 sha，不创建提交对象（那会访问对象库）
+        try:
+            head_sha = SymbolicReference.dereference_recursive(self.repo, "HEAD")
+        except ValueError:
+            head_sha = None
+        head_valid = head_sha is not None
+        branch = None if head.is_detached else head.reference.name
+
+        reader = self.repo.config_reader()
+        remotes = {}
+        for section in reader.sections():
+            if section.startswith('remote "') and section.endswith('"'):
+                remotes[section[8:-1]] = str(reader.get_value(section, "url", ""))
+
+        upstream = None
+        section = f'branch "{branch}"'
+        if branch and reader.has_section(section):
+            remote = str(reader.get_value(section, "remote", ""))
+            merge = str(reader.get_value(section, "merge", ""))
+            if remote and merge:
+                upstream = f"{remote}/{merge[len('refs/heads/'):] if merge.startswith('refs/heads/') else merge}"
+
+        user_name = str(reader.get_value("user", "name", "")) or None
+        user_email = str(reader.get_value("user", "email", "")) or None
+        fsmonitor = str(reader.get_value("core", "fsmonitor", "")) or None
+        return RepoState(head_valid, head_sha, branch, upstream, remotes, user_name, user_email, fsmonitor)
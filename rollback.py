@@ -0,0 +1,221 @@
+import os
+import json
+import time
+import shutil
+import tempfile
+import subprocess
+
+from git_resolver import git_supports
+from large_files import configured_threshold
+
+SNAPSHOT_REF_PREFIX = "refs/gitgui/snapshots/"
+
+# 快照提交不属于用户历史，固定使用这个身份，避免未配置 user.name 时失败
+SNAPSHOT_IDENTITY = {
+    "GIT_AUTHOR_NAME": "GitGUI",
+    "GIT_AUTHOR_EMAIL": "gitgui@localhost",
+    "GIT_COMMITTER_NAME": "GitGUI",
+    "GIT_COMMITTER_EMAIL": "gitgui@localhost",
+}
+
+
+class RollbackEngine:
+    """带自动快照的版本回退
+
+    回退前把暂存区和工作区（含未跟踪文件）分别写成树对象，不做任何检出；
+    两棵树包装成提交并用 refs/gitgui/snapshots/ 下的引用保活，防止被 gc 回收。
+    快照记录组成有上限的撤销栈，保存在 .git/gitgui-undo.json 中。
+    不小于大文件阈值的未跟踪文件不写入快照（计算哈希和写入对象都要读完整个文件），
+    它们留在工作区，列在快照记录的 skipped 中。
+    """
+
+    def __init__(self, repo_path, git_executable="git", limit=20, large_threshold=None):
+        self.repo_path = repo_path
+        self.git_executable = git_executable
+        self.limit = limit
+        # 与暂存时的大文件阈值相同，0 表示不跳过
+        self.large_threshold = configured_threshold() if large_threshold is None else large_threshold
+        self.git_dir = os.path.join(repo_path, ".git")
+        self.stack_path = os.path.join(self.git_dir, "gitgui-undo.json")
+
+    def _git(self, *args, env=None):
+        command = [self.git_executable, *args]
+        result = subprocess.run(command, cwd=self.repo_path, env=dict(os.environ, **(env or {})),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(f"{' '.join(args[:2])} 失败: {result.stderr.decode(errors='replace').strip()}")
+        return result.stdout.decode().strip()
+
+    def _git_paths(self, *args):
+        """运行输出以 NUL 分隔路径的命令（-z），返回路径列表"""
+        result = subprocess.run([self.git_executable, *args], cwd=self.repo_path,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(f"{' '.join(args[:2])} 失败: {result.stderr.decode(errors='replace').strip()}")
+        return [os.fsdecode(path) for path in result.stdout.split(b"\0") if path]
+
+    # ---- 撤销栈 ----
+
+    def load_stack(self):
+        """读取撤销栈，最新的快照在最后"""
+        try:
+            with open(self.stack_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return []
+
+    def _save_stack(self, stack):
+        temp_path = self.stack_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(stack, f, ensure_ascii=False, indent=2)
+        os.replace(temp_path, self.stack_path)
+
+    def get(self, snapshot_id=None):
+        """按 id 查找快照，不指定时返回最新的一个"""
+        stack = self.load_stack()
+        if snapshot_id is None:
+            return stack[-1] if stack else None
+        return next((entry for entry in stack if entry["id"] == snapshot_id), None)
+
+    # ---- 快照 ----
+
+    def large_untracked(self):
+        """不小于阈值的未跟踪文件（遵守 .gitignore）"""
+        if not self.large_threshold:
+            return []
+        large = []
+        for path in self._git_paths("ls-files", "-z", "--others", "--exclude-standard"):
+            try:
+                if os.lstat(os.path.join(self.repo_path, path)).st_size >= self.large_threshold:
+                    large.append(path)
+            except OSError:
+                continue
+        return large
+
+    def _check_overwrite(self, skipped, revision):
+        """没有写入快照的文件会被检出覆盖时拒绝操作，否则这些文件无法恢复"""
+        if not skipped:
+            return
+        conflicts = self._git_paths("--literal-pathspecs", "ls-tree", "-r", "--name-only", "-z", revision,
+                                    "--", *skipped)
+        if conflicts:
+            raise Exception("以下未跟踪的大文件没有写入快照，且会被覆盖，请先移走：\n" + "\n".join(conflicts))
+
+    def _worktree_tree(self, skipped):
+        """用暂存区的副本执行 add -A 得到工作区树；副本保留了 stat 信息，只有改动的文件需要重新计算哈希
+
+        skipped 中的未跟踪文件不加入。
+        """
+        fd, temp_index = tempfile.mkstemp(prefix="gitgui-index-", dir=self.git_dir)
+        os.close(fd)
+        try:
+            index_path = os.path.join(self.git_dir, "index")
+            if os.path.exists(index_path):
+                shutil.copyfile(index_path, temp_index)
+            else:
+                os.remove(temp_index)
+            env = {"GIT_INDEX_FILE": temp_index}
+            pathspecs = ["."] + [f":(exclude,literal){path}" for path in skipped]
+            if skipped and git_supports('pathspec_from_file'):
+                self._add_pathspecs_from_stdin(pathspecs, env)
+            else:
+                self._git("add", "-A", "--", *pathspecs, env=env)
+            return self._git("write-tree", env=env)
+        finally:
+            if os.path.exists(temp_index):
+                os.remove(temp_index)
+
+    def _add_pathspecs_from_stdin(self, pathspecs, env):
+        # 跳过的文件较多时路径从标准输入传入，避免命令行过长
+        data = b"".join(os.fsencode(spec) + b"\0" for spec in pathspecs)
+        result = subprocess.run([self.git_executable, "add", "-A", "--pathspec-from-file=-", "--pathspec-file-nul"],
+                                cwd=self.repo_path, input=data, env=dict(os.environ, **env),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        if result.returncode != 0:
+            raise Exception(f"add -A 失败: {result.stderr.decode(errors='replace').strip()}")
+
+    def snapshot(self, description, target=None, keep=None, skipped=None):
+        """保存当前 HEAD、暂存区和工作区，压入撤销栈并返回快照记录；keep 指定的快照不会因超出上限被丢弃
+
+        skipped 为不写入快照的未跟踪文件，默认为 large_untracked() 找到的大文件。
+        """
+        try:
+            index_tree = self._git("write-tree")
+        except Exception:
+            raise Exception("存在未解决的冲突，请先处理冲突后再回退")
+        skipped = self.large_untracked() if skipped is None else skipped
+        worktree_tree = self._worktree_tree(skipped)
+        head = self._git("rev-parse", "--verify", "HEAD")
+        try:
+            branch = self._git("symbolic-ref", "--short", "-q", "HEAD")
+        except Exception:
+            branch = None
+
+        # 与 git stash 相同的结构：工作区提交的第二个父提交记录暂存区
+        index_commit = self._git("commit-tree", index_tree, "-p", head, "-m", "gitgui index snapshot",
+                                 env=SNAPSHOT_IDENTITY)
+        snapshot_commit = self._git("commit-tree", worktree_tree, "-p", head, "-p", index_commit,
+                                    "-m", f"gitgui snapshot: {description}", env=SNAPSHOT_IDENTITY)
+
+        stack = self.load_stack()
+        snapshot_id = max((entry["id"] for entry in stack), default=0) + 1
+        ref = f"{SNAPSHOT_REF_PREFIX}{snapshot_id}"
+        self._git("update-ref", ref, snapshot_commit)
+        entry = {
+            "id": snapshot_id,
+            "ref": ref,
+            "time": time.time(),
+            "description": description,
+            "head": head,
+            "branch": branch,
+            "target": target,
+            "index_tree": index_tree,
+            "worktree_tree": worktree_tree,
+            "skipped": skipped,
+        }
+        stack.append(entry)
+        # 超出上限时丢弃最旧的快照及其引用
+        while len(stack) > self.limit:
+            dropped = stack.pop(1 if stack[0]["id"] == keep else 0)
+            self._git("update-ref", "-d", dropped["ref"])
+        self._save_stack(stack)
+        return entry
+
+    # ---- 回退与撤销 ----
+
+    def rollback(self, commit_id):
+        """先快照再 reset --hard 到指定提交，返回快照记录"""
+        skipped = self.large_untracked()
+        self._check_overwrite(skipped, commit_id)
+        entry = self.snapshot(f"回退到 {commit_id[:7]} 之前", target=commit_id, skipped=skipped)
+        self._git("reset", "--hard", commit_id)
+        return entry
+
+    def restore(self, snapshot_id=None):
+        """恢复快照（默认最新的一个）
+
+        恢复前当前状态也会被快照，因此撤销本身也可以再撤销。
+        read-tree 借助暂存区的 stat 信息只改写有差异的文件。
+        """
+        entry = self.get(snapshot_id)
+        if not entry:
+            raise Exception("没有可撤销的回退记录")
+
+        skipped = self.large_untracked()
+        self._check_overwrite(skipped, entry["worktree_tree"])
+        current = self.snapshot(f"撤销快照 {entry['id']} 之前", target=entry["head"], keep=entry["id"],
+                                skipped=skipped)
+        message = f"gitgui: 恢复快照 {entry['id']}"
+        if entry["branch"]:
+            self._git("update-ref", "-m", message, f"refs/heads/{entry['branch']}", entry["head"])
+            self._git("symbolic-ref", "HEAD", f"refs/heads/{entry['branch']}")
+        else:
+            self._git("update-ref", "--no-deref", "-m", message, "HEAD", entry["head"])
+        # 先让暂存区和工作区都变成快照时的工作区内容，再把暂存区换回快照时的暂存内容（保留 stat 信息）
+        self._git("read-tree", "--reset", "-u", entry["worktree_tree"])
+        self._git("read-tree", "-m", entry["index_tree"])
+
+        stack = [item for item in self.load_stack() if item["id"] != entry["id"]]
+        self._git("update-ref", "-d", entry["ref"])
+        self._save_stack(stack)
+        return entry, current
@@ -0,0 +1,116 @@
+import os
+import re
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+
+def split_patterns(text):
+    """把输入框中以逗号、分号或空白分隔的通配符拆成列表"""
+    return [part for part in re.split(r"[,;\s]+", text) if part]
+
+
+class StageDialog:
+    """选择性暂存：按目录和包含/排除通配符筛选未暂存的更改"""
+
+    PREVIEW_LIMIT = 500
+
+    def __init__(self, root, scheduler, git_ops, on_stage):
+        self.root = root
+        self.scheduler = scheduler
+        self.git_ops = git_ops
+        self.on_stage = on_stage
+        self.preview_generation = 0
+        self.preview_after = None
+
+        self.dialog = tk.Toplevel(root)
+        self.dialog.title("选择性暂存")
+        self.dialog.geometry("640x520")
+        self.dialog.transient(root)
+
+        form = ttk.Frame(self.dialog, padding=10)
+        form.pack(fill=tk.X)
+        form.columnconfigure(1, weight=1)
+        ttk.Label(form, text="包含:").grid(row=0, column=0, sticky=tk.W)
+        self.include_var = tk.StringVar()
+        ttk.Entry(form, textvariable=self.include_var).grid(row=0, column=1, sticky=tk.EW, pady=2)
+        ttk.Label(form, text="排除:").grid(row=1, column=0, sticky=tk.W)
+        self.exclude_var = tk.StringVar()
+        ttk.Entry(form, textvariable=self.exclude_var).grid(row=1, column=1, sticky=tk.EW, pady=2)
+        ttk.Label(form, text="例如 *.py, docs/*.md；不含 / 的模式匹配文件名，多个模式用逗号分隔",
+                  foreground="#666666").grid(row=2, column=1, sticky=tk.W)
+
+        dir_frame = ttk.LabelFrame(self.dialog, text="目录（不选则为整个仓库）", padding=10)
+        dir_frame.pack(fill=tk.X, padx=10)
+        self.dir_list = tk.Listbox(dir_frame, height=4)
+        self.dir_list.pack(side=tk.LEFT, fill=tk.X, expand=True)
+        dir_buttons = ttk.Frame(dir_frame)
+        dir_buttons.pack(side=tk.LEFT, padx=5)
+        ttk.Button(dir_buttons, text="添加目录", command=self.add_directory).pack(fill=tk.X, pady=2)
+        ttk.Button(dir_buttons, text="移除", command=self.remove_directory).pack(fill=tk.X, pady=2)
+
+        preview_frame = ttk.LabelFrame(self.dialog, text="将要暂存的文件", padding=10)
+        preview_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+        self.count_label = ttk.Label(preview_frame, text="")
+        self.count_label.pack(anchor=tk.W)
+        self.preview_list = tk.Listbox(preview_frame)
+        scrollbar = ttk.Scrollbar(preview_frame, orient=tk.VERTICAL, command=self.preview_list.yview)
+        self.preview_list.configure(yscrollcommand=scrollbar.set)
+        self.preview_list.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+        btn_frame = ttk.Frame(self.dialog)
+        btn_frame.pack(fill=tk.X, pady=10)
+        ttk.Button(btn_frame, text="暂存", command=self.stage).pack(side=tk.RIGHT, padx=5)
+        ttk.Button(btn_frame, text="取消", command=self.dialog.destroy).pack(side=tk.RIGHT, padx=5)
+
+        self.include_var.trace_add("write", lambda *_: self.schedule_preview())
+        self.exclude_var.trace_add("write", lambda *_: self.schedule_preview())
+        self.refresh_preview()
+
+    def criteria(self):
+        return (split_patterns(self.include_var.get()), split_patterns(self.exclude_var.get()),
+                list(self.dir_list.get(0, tk.END)))
+
+    def add_directory(self):
+        folder = filedialog.askdirectory(parent=self.dialog, initialdir=self.git_ops.repo_path)
+        if not folder:
+            return
+        relative = os.path.relpath(folder, self.git_ops.repo_path)
+        if relative.startswith(".."):
+            messagebox.showerror("错误", "请选择当前仓库内的目录！", parent=self.dialog)
+            return
+        self.dir_list.insert(tk.END, relative.replace(os.sep, "/"))
+        self.refresh_preview()
+
+    def remove_directory(self):
+        for index in reversed(self.dir_list.curselection()):
+            self.dir_list.delete(index)
+        self.refresh_preview()
+
+    def schedule_preview(self):
+        """输入停顿后再刷新预览"""
+        if self.preview_after:
+            self.dialog.after_cancel(self.preview_after)
+        self.preview_after = self.dialog.after(300, self.refresh_preview)
+
+    def refresh_preview(self):
+        self.preview_after = None
+        self.preview_generation += 1
+        generation = self.preview_generation
+        self.count_label.config(text="正在匹配...")
+        self.scheduler.submit(self.git_ops.match_unstaged, *self.criteria(),
+                              on_success=lambda paths: self.show_preview(generation, paths),
+                              on_error=lambda e: self.count_label.config(text=f"匹配失败: {str(e)}"))
+
+    def show_preview(self, generation, paths):
+        if generation != self.preview_generation or not self.dialog.winfo_exists():
+            return
+        self.preview_list.delete(0, tk.END)
+        for path in paths[:self.PREVIEW_LIMIT]:
+            self.preview_list.insert(tk.END, path)
+        more = f"（只列出前 {self.PREVIEW_LIMIT} 个）" if len(paths) > self.PREVIEW_LIMIT else ""
+        self.count_label.config(text=f"共 {len(paths)} 个文件{more}")
+
+    def stage(self):
+        self.on_stage(*self.criteria())
+        self.dialog.destroy()
@@ -0,0 +1,185 @@
+import re
+import fnmatch
+from typing import List, NamedTuple, Optional
+
+
+class FileStatus(NamedTuple):
+    """单个文件的状态记录，index/worktree 对应 porcelain 的 X/Y（'.' 表示未变化）"""
+    kind: str  # changed / renamed / unmerged / untracked / ignored
+    index: str
+    worktree: str
+    path: str
+    orig_path: Optional[str] = None
+
+
+class RepoStatus(NamedTuple):
+    """一次 `git status --porcelain=v2 --branch` 的解析结果"""
+    oid: Optional[str]
+    head: Optional[str]
+    upstream: Optional[str]
+    ahead: Optional[int]  # 使用 --no-ahead-behind 且两端不同时为 None，由调用方另行计算
+    behind: Optional[int]
+    entries: List[FileStatus]
+
+    @property
+    def untracked(self):
+        return [e for e in self.entries if e.kind == "untracked"]
+
+    @property
+    def has_staged(self):
+        return any(e.index not in (".", "?", "!") for e in self.entries if e.kind != "untracked")
+
+    @property
+    def has_unstaged(self):
+        return any(e.kind == "untracked" or e.worktree != "." for e in self.entries)
+
+    @property
+    def detached(self):
+        return self.head is None
+
+
+def parse_porcelain_v2(data):
+    """解析 `git status --porcelain=v2 -z --branch` 的原始输出（bytes）"""
+    oid = head = upstream = None
+    ahead = behind = 0
+    entries = []
+
+    fields = data.split(b"\0")
+    i = 0
+    while i < len(fields):
+        raw = fields[i]
+        i += 1
+        if not raw:
+            continue
+        line = raw.decode("utf-8", "surrogateescape")
+        tag = line[0]
+
+        if tag == "#":
+            key, _, value = line[2:].partition(" ")
+            if key == "branch.oid":
+                oid = None if value == "(initial)" else value
+            elif key == "branch.head":
+                head = None if value == "(detached)" else value
+            elif key == "branch.upstream":
+                upstream = value
+            elif key == "branch.ab":
+                a, b = value.split()
+                if a == "+?":
+                    # --no-ahead-behind：只知道两端不同
+                    ahead = behind = None
+                else:
+                    ahead, behind = int(a), abs(int(b))
+        elif tag == "1":
+            parts = line.split(" ", 8)
+            entries.append(FileStatus("changed", parts[1][0], parts[1][1], parts[8]))
+        elif tag == "2":
+            parts = line.split(" ", 9)
+            # 重命名记录后面紧跟一个以 NUL 分隔的原路径
+            orig_path = fields[i].decode("utf-8", "surrogateescape")
+            i += 1
+            entries.append(FileStatus("renamed", parts[1][0], parts[1][1], parts[9], orig_path))
+        elif tag == "u":
+            parts = line.split(" ", 10)
+            entries.append(FileStatus("unmerged", parts[1][0], parts[1][1], parts[10]))
+        elif tag == "?":
+            entries.append(FileStatus("untracked", "?", "?", line[2:]))
+        elif tag == "!":
+            entries.append(FileStatus("ignored", "!", "!", line[2:]))
+
+    return RepoStatus(oid, head, upstream, ahead, behind, entries)
+
+
+_BRANCH_V1_RE = re.compile(r"^(?:No commits yet on |Initial commit on )?(.+?)(?:\.\.\.(\S+))?(?: \[(.*)\])?$")
+
+
+def parse_porcelain_v1(data):
+    """解析旧版 git（不支持 v2）的 `git status --porcelain -z --branch` 输出"""
+    head = upstream = None
+    ahead = behind = 0
+    entries = []
+
+    fields = data.split(b"\0")
+    i = 0
+    while i < len(fields):
+        raw = fields[i]
+        i += 1
+        if not raw:
+            continue
+        line = raw.decode("utf-8", "surrogateescape")
+        if line.startswith("## "):
+            match = _BRANCH_V1_RE.match(line[3:])
+            name, upstream, counts = match.groups()
+            head = None if name == "HEAD (no branch)" else name
+            for part in (counts or "").split(", "):
+                if part.startswith("ahead "):
+                    ahead = int(part[6:])
+                elif part.startswith("behind "):
+                    behind = int(part[7:])
+            continue
+
+        x, y, path = line[0], line[1], line[3:]
+        if x == "?":
+            entries.append(FileStatus("untracked", "?", "?", path))
+        elif x == "!":
+            entries.append(FileStatus("ignored", "!", "!", path))
+        elif x in ("R", "C"):
+            orig_path = fields[i].decode("utf-8", "surrogateescape")
+            i += 1
+            entries.append(FileStatus("renamed", x, y.replace(" ", "."), path, orig_path))
+        elif "U" in (x, y) or (x, y) in (("A", "A"), ("D", "D")):
+            entries.append(FileStatus("unmerged", x, y, path))
+        else:
+            entries.append(FileStatus("changed", x.replace(" ", "."), y.replace(" ", "."), path))
+
+    # v1 输出不包含 HEAD 提交，需要时由调用方另行读取
+    return RepoStatus(None, head, upstream, ahead, behind, entries)
+
+
+def _compile_patterns(patterns):
+    """把一组通配符合并成一个正则；不含 / 的模式匹配文件名，含 / 的匹配完整路径（* 可跨目录）"""
+    name_parts, path_parts = [], []
+    for pattern in patterns or ():
+        pattern = pattern.strip().replace("\\", "/").lstrip("/")
+        if not pattern:
+            continue
+        (path_parts if "/" in pattern else name_parts).append(fnmatch.translate(pattern))
+    name_re = re.compile("|".join(name_parts)) if name_parts else None
+    path_re = re.compile("|".join(path_parts)) if path_parts else None
+    if not name_re and not path_re:
+        return None
+
+    def match(path):
+        return bool((path_re and path_re.match(path)) or
+                    (name_re and name_re.match(path.rsplit("/", 1)[-1])))
+    return match
+
+
+def normalize_directory(directory):
+    """统一目录写法：使用 /，去掉开头的 ./ 和结尾的 /；仓库根目录为空字符串"""
+    directory = directory.replace("\\", "/").strip("/")
+    while directory.startswith("./"):
+        directory = directory[2:]
+    return "" if directory == "." else directory
+
+
+def select_paths(entries, include=None, exclude=None, directories=None):
+    """一次遍历状态记录，返回位于所选目录内、匹配 include 且不匹配 exclude 的路径
+
+    三个条件都为空时返回全部路径。
+    """
+    include_match = _compile_patterns(include)
+    exclude_match = _compile_patterns(exclude)
+    prefixes = tuple(d + "/" for d in map(normalize_directory, directories or ()) if d)
+    whole_tree = not directories or any(not normalize_directory(d) for d in directories)
+
+    selected = []
+    for entry in entries:
+        path = entry.path
+        if not whole_tree and not path.startswith(prefixes):
+            continue
+        if include_match and not include_match(path):
+            continue
+        if exclude_match and exclude_match(path):
+            continue
+        selected.append(path)
+    return selected
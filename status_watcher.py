@@ -0,0 +1,404 @@
+import os
+import sys
+import time
+import errno
+import select
+import struct
+import hashlib
+import logging
+import threading
+
+# inotify 事件掩码（见 <sys/inotify.h>）
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+# .git 目录下真正影响状态的文件，其余（objects、logs、*.lock 等）的变化忽略
+GIT_STATE_FILES = ("index", "HEAD", "packed-refs")
+
+# 轮询时遍历工作区所占的时间不超过总时间的 1/TREE_POLL_RATIO
+TREE_POLL_RATIO = 20
+# 工作区一直没有变化时，遍历间隔逐次加倍，最长这么多秒
+MAX_TREE_POLL_INTERVAL = 10.0
+
+_logger = logging.getLogger("gitgui.watcher")
+
+
+def git_state_signature(repo_path):
+    """返回 .git 中 index/HEAD/refs 的 stat 签名"""
+    git_dir = os.path.join(repo_path, ".git")
+    parts = []
+    for name in GIT_STATE_FILES:
+        parts.append(_stat_key(os.path.join(git_dir, name)))
+    for dirpath, dirnames, filenames in os.walk(os.path.join(git_dir, "refs")):
+        dirnames.sort()
+        for name in sorted(filenames):
+            parts.append((name, _stat_key(os.path.join(dirpath, name))))
+    return tuple(parts)
+
+
+def tree_signature(repo_path):
+    """遍历工作区，返回所有文件 stat 信息的摘要（不启动任何子进程）"""
+    digest = hashlib.blake2b(digest_size=16)
+    stack = [repo_path]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = sorted(os.scandir(current), key=lambda e: e.name)
+        except OSError:
+            continue
+        for entry in entries:
+            if entry.name == ".git" and current == repo_path:
+                continue
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            if entry.is_dir(follow_symlinks=False):
+                stack.append(entry.path)
+            digest.update(entry.path.encode("utf-8", "surrogateescape"))
+            digest.update(struct.pack("qqq", st.st_mtime_ns, st.st_size, st.st_ino))
+    return digest.digest()
+
+
+def _stat_key(path):
+    try:
+        st = os.stat(path)
+        return st.st_mtime_ns, st.st_size, st.st_ino
+    except OSError:
+        return None
+
+
+class _PollingBackend:
+    """轮询后备方案：定期比较 stat 签名，只有签名变化才认为仓库发生了变化
+
+    .git 中 index/HEAD/refs 的签名每个间隔都检查（只 stat 几个文件）；遍历工作区的代价与文件数成正比，
+    遍历间隔按上一次遍历的耗时放大，工作区一直没有变化时再逐次加倍（最长 MAX_TREE_POLL_INTERVAL 秒），
+    发现变化后恢复为 interval。
+    """
+
+    def __init__(self, repo_path, interval):
+        self.repo_path = repo_path
+        self.interval = interval
+        self._wake_event = threading.Event()
+        self._git_signature = git_state_signature(repo_path)
+        self._tree_signature = None
+        self._tree_interval = interval
+        self._tree_due = 0.0
+        self._poll_tree()
+
+    def _poll_tree(self):
+        """遍历工作区并安排下一次遍历的时间，返回签名是否变化"""
+        started = time.monotonic()
+        signature = tree_signature(self.repo_path)
+        elapsed = time.monotonic() - started
+        changed = signature != self._tree_signature
+        self._tree_signature = signature
+        if changed:
+            self._tree_interval = self.interval
+        else:
+            self._tree_interval = min(self._tree_interval * 2, max(self.interval, MAX_TREE_POLL_INTERVAL))
+        self._tree_due = time.monotonic() + max(self._tree_interval, elapsed * TREE_POLL_RATIO)
+        return changed
+
+    def wait(self, timeout, stop_event):
+        """等待变化，返回 True 表示检测到变化"""
+        self._wake_event.wait(self.interval if timeout is None else timeout)
+        self._wake_event.clear()
+        if stop_event.is_set():
+            return False
+        changed = False
+        signature = git_state_signature(self.repo_path)
+        if signature != self._git_signature:
+            self._git_signature = signature
+            changed = True
+        if time.monotonic() >= self._tree_due:
+            changed = self._poll_tree() or changed
+        return changed
+
+    def wake(self):
+        self._wake_event.set()
+
+    def close(self):
+        pass
+
+
+class _InotifyBackend:
+    """Linux inotify 后端：监听工作区所有目录以及 .git/index、.git/HEAD、refs
+
+    给出 journal（fsmonitor_hook.FsmonitorJournal）时，另起线程持续读取事件，把工作区中
+    每个变化的路径写入日志，供 fsmonitor 钩子查询；查询方创建的同步文件也在这个线程中确认，
+    因此即使监视线程正在计算状态（状态查询本身会调用钩子），钩子也不会等待。
+    """
+
+    def __init__(self, repo_path, journal=None):
+        import ctypes
+        import ctypes.util
+
+        self.repo_path = repo_path
+        self.git_dir = os.path.join(repo_path, ".git")
+        self.journal = journal
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or None, use_errno=True)
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 失败")
+        self._wake_r, self._wake_w = os.pipe()
+        self._watches = {}
+        self._closed = False
+        self._changed = threading.Event()
+        self._pump = None
+        # 日志线程遇到的错误（例如新建目录时超出监听数量限制），由 wait 交给调用方
+        self._error = None
+        try:
+            self._add_tree(repo_path)
+            self._add_watch(self.git_dir)
+            self._add_tree(os.path.join(self.git_dir, "refs"))
+            if journal is not None:
+                # 监听建立之后才开始新一轮日志，之前的变化由钩子以“全部变化”回答
+                journal.open()
+                self._add_watch(journal.cookie_dir)
+                self._pump = threading.Thread(target=self._pump_events, name="fsmonitor-journal", daemon=True)
+                self._pump.start()
+        except Exception:
+            self.close()
+            raise
+
+    def _add_watch(self, path):
+        import ctypes
+
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                # 超出 max_user_watches，交给调用方回退到轮询
+                raise OSError(err, "inotify 监听数量超出系统限制")
+            return
+        self._watches[wd] = path
+
+    def _add_tree(self, root, record=False):
+        for dirpath, dirnames, filenames in os.walk(root):
+            if dirpath == self.repo_path and ".git" in dirnames:
+                dirnames.remove(".git")
+            self._add_watch(dirpath)
+            if record:
+                # 新目录在建立监听之前写入的文件不会产生事件，逐个记入日志
+                for name in dirnames + filenames:
+                    self._record(os.path.join(dirpath, name))
+
+    def _in_worktree(self, path):
+        return path != self.git_dir and not path.startswith(self.git_dir + os.sep)
+
+    def _record(self, full_path):
+        self.journal.record(os.fsencode(os.path.relpath(full_path, self.repo_path).replace(os.sep, "/")))
+
+    def _is_relevant(self, path, name, mask):
+        if mask & IN_Q_OVERFLOW:
+            return True
+        if path == self.git_dir:
+            return name in GIT_STATE_FILES
+        if name.endswith(".lock"):
+            return False
+        return True
+
+    def wait(self, timeout, stop_event):
+        """等待 inotify 事件，返回 True 表示有相关变化；监听失败时抛出 OSError"""
+        if self._pump is None:
+            return self._read_events(timeout)
+        changed = self._changed.wait(timeout)
+        self._changed.clear()
+        if self._error is not None:
+            raise self._error
+        return changed
+
+    def _pump_events(self):
+        """日志线程：持续读取事件并写入日志，有相关变化时通知 wait"""
+        while not self._closed:
+            try:
+                changed = self._read_events(1.0)
+            except OSError as e:
+                # 不再维护日志（删除心跳后钩子回答“全部变化”），由 wait 通知调用方回退到轮询
+                self.journal.close()
+                self._error = e
+                self._changed.set()
+                return
+            if changed:
+                self._changed.set()
+            self.journal.beat()
+
+    def _read_events(self, timeout):
+        readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+        if self._wake_r in readable:
+            os.read(self._wake_r, 64)
+        if self._fd not in readable:
+            return False
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        changed = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b"\0"))
+            offset += length
+
+            if mask & IN_IGNORED:
+                self._watches.pop(wd, None)
+                continue
+            if self.journal is not None and mask & IN_Q_OVERFLOW:
+                # 丢失了事件，下一次查询回答“全部变化”
+                self.journal.reset()
+            path = self._watches.get(wd)
+            if path is None:
+                continue
+            if self.journal is not None and path == self.journal.cookie_dir:
+                if mask & IN_CREATE:
+                    self.journal.ack(name)
+                continue
+            if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO) and path != self.git_dir:
+                # 新建目录需要补充监听
+                self._add_tree(os.path.join(path, name), record=self.journal is not None and self._in_worktree(path))
+            if self.journal is not None and self._in_worktree(path) and name:
+                if mask & IN_ISDIR and mask & IN_MOVED_FROM:
+                    # 移走的目录下有哪些文件已无从得知（删除目录前其中的文件会先各自产生事件）
+                    self.journal.reset()
+                else:
+                    self._record(os.path.join(path, name))
+            if self._is_relevant(path, name, mask):
+                changed = True
+        if self.journal is not None:
+            self.journal.flush()
+        return changed
+
+    def wake(self):
+        self._changed.set()
+        try:
+            os.write(self._wake_w, b"x")
+        except OSError:
+            pass
+
+    def close(self):
+        self._closed = True
+        if self._pump is not None:
+            self.wake()
+            self._pump.join(timeout=2)
+            self.journal.close()
+        for fd in (self._fd, self._wake_r, self._wake_w):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+class StatusWatcher:
+    """后台仓库状态监视器：文件变化合并后才重新计算状态，并通过回调异步推送结果"""
+
+    def __init__(self, repo_path, on_change, debounce=0.3, max_delay=2.0, poll_interval=2.0,
+                 force_polling=False, journal=None):
+        self.repo_path = repo_path
+        # fsmonitor 钩子使用的变化日志，只有 inotify 后端会写入
+        self.journal = journal
+        self.on_change = on_change
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.poll_interval = poll_interval
+        self.force_polling = force_polling
+        self.backend_name = None
+        self._backend = None
+        self._stop_event = threading.Event()
+        self._trigger_event = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """启动监视线程，并立即计算一次状态"""
+        self._trigger_event.set()
+        self._thread = threading.Thread(target=self._run, name="status-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """停止监视线程"""
+        self._stop_event.set()
+        self._wake()
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+
+    def trigger(self):
+        """请求立即重新计算状态（例如执行完Git操作之后）"""
+        self._trigger_event.set()
+        self._wake()
+
+    def _wake(self):
+        backend = self._backend
+        if backend is not None:
+            backend.wake()
+
+    def _create_backend(self):
+        if sys.platform.startswith("linux") and not self.force_polling:
+            try:
+                self.backend_name = "inotify"
+                return _InotifyBackend(self.repo_path, self.journal)
+            except OSError as e:
+                _logger.warning("无法使用 inotify，改用轮询: %s", e)
+        self.backend_name = "polling"
+        return _PollingBackend(self.repo_path, self.poll_interval)
+
+    def _wait(self, timeout):
+        """等待后端报告变化；inotify 运行中出错（如超出监听数量限制）时改用轮询，并视为有变化"""
+        try:
+            return self._backend.wait(timeout, self._stop_event)
+        except OSError as e:
+            _logger.warning("inotify 监听失败，改用轮询: %s", e)
+            self._backend.close()
+            self.backend_name = "polling"
+            self._backend = _PollingBackend(self.repo_path, self.poll_interval)
+            return True
+
+    def _run(self):
+        self._backend = self._create_backend()
+        try:
+            while not self._stop_event.is_set():
+                if self._trigger_event.is_set():
+                    changed = True
+                else:
+                    # inotify 阻塞等待事件，每秒醒来一次检查停止标志
+                    changed = self._wait(1.0 if self.backend_name == "inotify" else None)
+                if self._stop_event.is_set():
+                    break
+                if not changed and not self._trigger_event.is_set():
+                    continue
+
+                # 合并突发事件：直到安静 debounce 秒（最多等待 max_delay 秒）；轮询间隔本身已起到合并作用
+                started = time.monotonic()
+                while (self.backend_name == "inotify" and not self._trigger_event.is_set()
+                       and time.monotonic() - started < self.max_delay):
+                    if not self._wait(self.debounce):
+                        break
+                self._trigger_event.clear()
+                if self._stop_event.is_set():
+                    break
+                try:
+                    self.on_change()
+                except Exception:
+                    # 回调失败不能结束监视线程，但要留下记录
+                    _logger.exception("状态监视回调失败")
+        finally:
+            self._backend.close()
@@ -0,0 +1,54 @@
+import os
+import sys
+import subprocess
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+IDENTITY = {
+    "GIT_AUTHOR_NAME": "Test",
+    "GIT_AUTHOR_EMAIL": "test@localhost",
+    "GIT_COMMITTER_NAME": "Test",
+    "GIT_COMMITTER_EMAIL": "test@localhost",
+}
+
+
+class TempRepo:
+    """临时仓库：在 pytest 的临时目录中运行 git 命令"""
+
+    def __init__(self, path):
+        self.path = str(path)
+
+    def git(self, *args, env=None):
+        result = subprocess.run(["git", *args], cwd=self.path, env=dict(os.environ, **IDENTITY, **(env or {})),
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True)
+        return result.stdout.decode().strip()
+
+    def write(self, path, content):
+        full_path = os.path.join(self.path, path)
+        os.makedirs(os.path.dirname(full_path), exist_ok=True)
+        with open(full_path, "wb" if isinstance(content, bytes) else "w") as f:
+            f.write(content)
+
+    def read(self, path):
+        with open(os.path.join(self.path, path)) as f:
+            return f.read()
+
+    def commit(self, message, **files):
+        for path, content in files.items():
+            self.write(path, content)
+        self.git("add", "-A")
+        self.git("commit", "-q", "--allow-empty", "-m", message)
+        return self.git("rev-parse", "HEAD")
+
+
+@pytest.fixture
+def repo(tmp_path):
+    path = tmp_path / "repo"
+    subprocess.run(["git", "init", "-q", "-b", "main", str(path)], check=True)
+    repo = TempRepo(path)
+    # 被测代码自己运行的 git 命令不带 IDENTITY 环境变量
+    repo.git("config", "user.name", IDENTITY["GIT_AUTHOR_NAME"])
+    repo.git("config", "user.email", IDENTITY["GIT_AUTHOR_EMAIL"])
+    return repo
@@ -0,0 +1,47 @@
+import subprocess
+
+import pytest
+
+from acceleration import FEATURE_INDEX_V4, FEATURE_SPLIT_INDEX, FEATURE_UNTRACKED_CACHE, WorktreeAcceleration
+from git_operations import GitOperations
+
+
+@pytest.mark.parametrize("feature", [FEATURE_UNTRACKED_CACHE, FEATURE_INDEX_V4, FEATURE_SPLIT_INDEX])
+def test_commit_after_enabling_feature(repo, feature):
+    repo.commit("first", **{"a.txt": "one\n", "dir/b.txt": "two\n"})
+    git_ops = GitOperations()
+    git_ops.load_repo(repo.path)
+    try:
+        git_ops.enable_acceleration([feature])
+        repo.write("dir/c.txt", "three\n")
+        repo.write("a.txt", "changed\n")
+        git_ops.stage_matching()
+        commit = git_ops.commit_changes("second")
+        assert commit.hexsha == repo.git("rev-parse", "HEAD")
+        repo.git("fsck", "--strict", "--no-progress")
+        assert repo.git("log", "--format=%s", "--name-only", "-1").split() == ["second", "a.txt", "dir/c.txt"]
+        assert repo.git("ls-tree", "-r", "--name-only", "HEAD").split() == ["a.txt", "dir/b.txt", "dir/c.txt"]
+    finally:
+        git_ops.close()
+
+
+def test_untracked_cache_restores_show_untracked_files(repo):
+    repo.commit("first")
+    acceleration = WorktreeAcceleration(repo.path)
+    repo.git("config", "status.showUntrackedFiles", "no")
+    assert acceleration.apply({FEATURE_UNTRACKED_CACHE: True}) == ["status.showUntrackedFiles: no → all"]
+    assert repo.git("config", "status.showUntrackedFiles") == "all"
+    acceleration.apply({FEATURE_UNTRACKED_CACHE: False})
+    assert repo.git("config", "status.showUntrackedFiles") == "no"
+
+    # 原来没有设置时关闭后恢复为未设置
+    repo.git("config", "--unset", "status.showUntrackedFiles")
+    acceleration.apply({FEATURE_UNTRACKED_CACHE: True})
+    acceleration.apply({FEATURE_UNTRACKED_CACHE: False})
+    assert subprocess.run(["git", "config", "--get-regexp", "^(status|gitgui)\\."], cwd=repo.path).returncode == 1
+
+    # 用户自己设置的 all 不会在关闭时被删除
+    repo.git("config", "status.showUntrackedFiles", "all")
+    assert acceleration.apply({FEATURE_UNTRACKED_CACHE: True}) == []
+    acceleration.apply({FEATURE_UNTRACKED_CACHE: False})
+    assert repo.git("config", "status.showUntrackedFiles") == "all"
@@ -0,0 +1,108 @@
+import os
+import threading
+
+import pytest
+
+from commit_index import CommitIndex, ReadCancelled
+
+# 所有提交使用同一秒的时间，只能按拓扑顺序排列
+SAME_SECOND = {"GIT_AUTHOR_DATE": "2020-01-01T00:00:00", "GIT_COMMITTER_DATE": "2020-01-01T00:00:00"}
+
+
+def _commit(repo, message):
+    repo.git("commit", "-q", "--allow-empty", "-m", message, env=SAME_SECOND)
+    return repo.git("rev-parse", "HEAD")
+
+
+def _log(repo):
+    return repo.git("log", "--topo-order", "--format=%H").split()
+
+
+def _indexed(index, **kwargs):
+    return [row[0] for page in index.iter_pages(page_size=2, **kwargs) for row in page]
+
+
+def test_refresh_full_and_incremental(repo):
+    for i in range(5):
+        _commit(repo, f"c{i}")
+    index = CommitIndex(repo.path)
+    try:
+        assert index.refresh(repo.git("rev-parse", "HEAD")) == 5
+        assert _indexed(index) == _log(repo)
+        # HEAD 未变化时不做任何事
+        assert index.refresh(repo.git("rev-parse", "HEAD")) == 0
+
+        for i in range(3):
+            _commit(repo, f"n{i}")
+        assert index.refresh(repo.git("rev-parse", "HEAD")) == 3
+        assert _indexed(index) == _log(repo)
+        log = _log(repo)
+        assert _indexed(index, after=log[1]) == log[2:]
+    finally:
+        index.close()
+
+
+def test_refresh_after_history_rewrite(repo):
+    for i in range(4):
+        _commit(repo, f"c{i}")
+    index = CommitIndex(repo.path)
+    try:
+        index.refresh(repo.git("rev-parse", "HEAD"))
+        repo.git("reset", "-q", "--hard", "HEAD~2")
+        tip = _commit(repo, "rewritten")
+        assert index.refresh(tip) == 1
+        assert _indexed(index) == _log(repo)
+    finally:
+        index.close()
+
+
+def test_old_schema_is_rebuilt(repo):
+    import sqlite3
+
+    tip = _commit(repo, "c0")
+    conn = sqlite3.connect(os.path.join(repo.path, ".git", "gitgui-commits.sqlite"))
+    conn.executescript("CREATE TABLE commits (sha TEXT PRIMARY KEY, ctime INTEGER NOT NULL);"
+                       f"CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT); INSERT INTO meta VALUES ('tip', '{tip}');")
+    conn.close()
+    index = CommitIndex(repo.path)
+    try:
+        assert index.refresh(tip) == 1
+        assert _indexed(index) == [tip]
+    finally:
+        index.close()
+
+
+def test_since_stops_at_first_older_commit(repo):
+    from datetime import datetime
+
+    for day in range(1, 6):
+        date = f"2020-01-0{day}T00:00:00"
+        repo.git("commit", "-q", "--allow-empty", "-m", f"d{day}",
+                 env={"GIT_AUTHOR_DATE": date, "GIT_COMMITTER_DATE": date})
+    index = CommitIndex(repo.path)
+    try:
+        index.refresh(repo.git("rev-parse", "HEAD"))
+        since = datetime(2020, 1, 3)
+        expected = repo.git("log", "--topo-order", "--format=%H", f"--since={since.isoformat()}").split()
+        assert len(expected) == 3
+        assert _indexed(index, since=since) == expected
+    finally:
+        index.close()
+
+
+def test_cancelled_refresh_keeps_index(repo):
+    _commit(repo, "c0")
+    index = CommitIndex(repo.path)
+    try:
+        old_tip = repo.git("rev-parse", "HEAD")
+        index.refresh(old_tip)
+        tip = _commit(repo, "c1")
+        cancel_event = threading.Event()
+        cancel_event.set()
+        with pytest.raises(ReadCancelled):
+            index.refresh(tip, cancel_event)
+        # 事务回滚，下一次刷新仍从旧 HEAD 增量写入
+        assert _indexed(index) == [old_tip]
+        assert index.refresh(tip) == 1
+    finally:
+        index.close()
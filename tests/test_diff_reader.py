@@ -0,0 +1,30 @@
+import diff_reader
+from diff_reader import DiffReader, HUGE_LINES
+from git_pool import GitProcessPool
+
+
+def test_huge_files_skip_numstat(repo, monkeypatch):
+    monkeypatch.setattr(diff_reader, "HUGE_BYTES", 1000)
+    repo.commit("first", **{"small.txt": "one\n", "big.txt": "x\n", "old name.txt": "rename me\n" * 20})
+    repo.write("small.txt", "two\n")
+    repo.write("big.txt", "y\n" * 1000)
+    repo.git("mv", "old name.txt", "new name.txt")
+    pool = GitProcessPool(repo.path)
+    reader = DiffReader(repo.path, process_pool=pool)
+    commands = []
+    original = reader._git
+    monkeypatch.setattr(reader, "_git", lambda *args: commands.append(args) or original(*args))
+    try:
+        stats = reader.stats(staged=False)
+        assert stats["big.txt"].added == HUGE_LINES + 1
+        assert (stats["small.txt"].added, stats["small.txt"].deleted) == (1, 1)
+        # 超大文件不交给 numstat 计算差异
+        numstat = [args for args in commands if "--numstat" in args][0]
+        assert ":(exclude,literal)big.txt" in numstat
+
+        repo.git("add", "big.txt")
+        stats = reader.stats(staged=True)
+        assert stats["big.txt"].huge
+        assert stats["new name.txt"] == (0, 0)
+    finally:
+        pool.close()
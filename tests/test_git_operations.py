@@ -0,0 +1,43 @@
+import os
+
+from git_operations import GitOperations
+
+
+def test_status_cache_follows_watcher(repo):
+    repo.commit("first", **{"a.txt": "one\n"})
+    git_ops = GitOperations()
+    git_ops.load_repo(repo.path)
+    try:
+        assert not git_ops.get_status().has_unstaged
+        git_ops.watch_worktree(True)
+        first = git_ops.get_status()
+        # 监视期间不再遍历工作区，只有监视器报告变化后才重新运行 git status
+        repo.write("a.txt", "changed\n")
+        assert git_ops.get_status() is first
+        git_ops.worktree_changed()
+        assert git_ops.get_status().has_unstaged
+        # index 变化不依赖监视器
+        repo.git("add", "a.txt")
+        assert git_ops.get_status().has_staged
+        git_ops.watch_worktree(False)
+        repo.write("b.txt", "new\n")
+        assert [e.path for e in git_ops.get_status().untracked] == ["b.txt"]
+    finally:
+        git_ops.close()
+
+
+def test_stage_matching_counts(repo):
+    repo.commit("first", **{"keep.txt": "keep\n", "old name.txt": "rename me\n" * 20, "gone.txt": "x\n"})
+    repo.write("keep.txt", "changed\n")
+    repo.write("new.txt", "new\n")
+    repo.write("already.txt", "staged earlier\n")
+    repo.git("add", "already.txt")
+    os.rename(os.path.join(repo.path, "old name.txt"), os.path.join(repo.path, "new name.txt"))
+    os.remove(os.path.join(repo.path, "gone.txt"))
+    git_ops = GitOperations()
+    git_ops.load_repo(repo.path)
+    try:
+        counts = git_ops.stage_matching(exclude=["already.txt"])
+        assert (counts['added'], counts['modified'], counts['deleted'], counts['renamed']) == (1, 1, 1, 1)
+    finally:
+        git_ops.close()
@@ -0,0 +1,60 @@
+import time
+import threading
+
+from job_scheduler import JobScheduler
+
+
+class FakeRoot:
+    """代替 Tk 根窗口：after 只记录回调，由测试在“主线程”中执行"""
+
+    def __init__(self):
+        self.pending = []
+
+    def after(self, ms, callback, *args):
+        self.pending.append((callback, args))
+
+    def report_callback_exception(self, *exc_info):
+        raise exc_info[1]
+
+    def run_until(self, condition, timeout=5):
+        deadline = time.monotonic() + timeout
+        while not condition():
+            assert time.monotonic() < deadline
+            pending, self.pending = self.pending, []
+            for callback, args in pending:
+                callback(*args)
+            time.sleep(0.005)
+
+
+def test_post_runs_before_completion():
+    root = FakeRoot()
+    scheduler = JobScheduler(root, poll_interval=1)
+    events = []
+
+    def work():
+        scheduler.post(events.append, "remote a")
+        scheduler.post(events.append, "remote b")
+        return "done"
+
+    scheduler.submit(work, on_success=events.append)
+    root.run_until(lambda: "done" in events)
+    assert events == ["remote a", "remote b", "done"]
+    scheduler.shutdown()
+
+
+def test_shutdown_cancels_running_job():
+    root = FakeRoot()
+    scheduler = JobScheduler(root, poll_interval=1)
+    started = threading.Event()
+    seen = []
+
+    def work(cancel_event=None):
+        started.set()
+        seen.append(cancel_event.wait(5))
+
+    job = scheduler.submit(work, cancellable=True, on_success=seen.append)
+    assert started.wait(5)
+    scheduler.shutdown()
+    root.run_until(lambda: job.done)
+    # fn 收到任务自己的取消事件；被取消的任务不再执行完成回调
+    assert seen == [True]
@@ -0,0 +1,68 @@
+import io
+import os
+
+import pytest
+
+from large_files import LargeFileRouter
+from lfs_filter import LfsStore, clean, make_pointer, parse_pointer, smudge
+
+OID = "a" * 64
+
+
+def test_parse_pointer_roundtrip():
+    assert parse_pointer(make_pointer(OID, 123)) == (OID, 123)
+
+
+def test_parse_pointer_rejects_non_pointers():
+    assert parse_pointer(b"hello") is None
+    assert parse_pointer(make_pointer(OID, 1).replace(b"size 1", b"size x")) is None
+    assert parse_pointer(make_pointer("a" * 63, 1)) is None
+    assert parse_pointer(make_pointer(OID, 1).replace(b"sha256:", b"md5:")) is None
+    assert parse_pointer(make_pointer(OID, 1) + b"x" * 2048) is None
+
+
+def test_clean_and_smudge_roundtrip(tmp_path):
+    store = LfsStore(str(tmp_path))
+    content = b"large file content\n" * 1000
+    pointer = io.BytesIO()
+    clean(io.BytesIO(content), pointer, store)
+    oid, size = parse_pointer(pointer.getvalue())
+    assert size == len(content)
+    assert store.contains(oid, size)
+
+    restored = io.BytesIO()
+    smudge(io.BytesIO(pointer.getvalue()), restored, store)
+    assert restored.getvalue() == content
+
+    # 已经是指针的内容原样保留；本地没有内容时检出指针本身
+    again = io.BytesIO()
+    clean(io.BytesIO(pointer.getvalue()), again, store)
+    assert again.getvalue() == pointer.getvalue()
+    missing = make_pointer(OID, 5)
+    out = io.BytesIO()
+    smudge(io.BytesIO(missing), out, store)
+    assert out.getvalue() == missing
+
+
+@pytest.mark.skipif(os.name == "nt", reason="用 shell 脚本模拟 git-lfs")
+def test_builtin_filter_is_replaced_by_git_lfs(repo, tmp_path, monkeypatch):
+    router = LargeFileRouter(repo.path, threshold=1)
+    router.track(["big.bin"], configure_filter=True)
+    assert router.builtin_filter_configured()
+    assert repo.git("config", "--local", "filter.lfs.required") == "true"
+
+    # 模拟之后安装的 git-lfs：git lfs install --local 写入它自己的过滤器
+    bin_dir = tmp_path / "bin"
+    bin_dir.mkdir()
+    fake = bin_dir / "git-lfs"
+    fake.write_text("#!/bin/sh\n"
+                    "if [ \"$1\" = install ]; then\n"
+                    "  git config --local filter.lfs.clean 'git-lfs clean -- %f'\n"
+                    "  git config --local filter.lfs.required true\n"
+                    "fi\n")
+    fake.chmod(0o755)
+    monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+    router.track(["other.bin"])
+    assert not router.builtin_filter_configured()
+    assert repo.git("config", "--local", "filter.lfs.clean") == "git-lfs clean -- %f"
@@ -0,0 +1,34 @@
+import os
+import time
+
+from maintenance import TASK_COMMIT_GRAPH, RepoMaintenance
+
+
+def test_inspect_commit_graph_freshness(repo):
+    for i in range(3):
+        repo.commit(f"c{i}", **{f"f{i}.txt": f"{i}\n"})
+    maintenance = RepoMaintenance(repo.path, stale_objects=5)
+    state = maintenance.inspect()
+    assert state["commit_graph"] == "missing"
+    assert state["objects"] == state["loose_objects"] == 9
+    assert TASK_COMMIT_GRAPH in state["tasks"]
+
+    repo.git("repack", "-adq")
+    repo.git("commit-graph", "write", "--reachable")
+    state = maintenance.inspect()
+    assert state["commit_graph"] == "ok"
+    assert state["commit_graph_commits"] == 3
+    assert state["loose_objects"] == 0 and state["packs"] == 1
+
+    # 引用更新但新增对象不多时仍视为有效
+    past = time.time() - 60
+    for dirpath, _, filenames in os.walk(os.path.join(repo.path, ".git", "objects")):
+        for name in filenames:
+            os.utime(os.path.join(dirpath, name), (past, past))
+    repo.commit("small", **{"small.txt": "s\n"})
+    assert maintenance.inspect()["commit_graph"] == "ok"
+    for i in range(3):
+        repo.commit(f"more {i}", **{f"m{i}.txt": f"{i}\n"})
+    state = maintenance.inspect()
+    assert state["commit_graph"] == "stale"
+    assert TASK_COMMIT_GRAPH in state["tasks"]
@@ -0,0 +1,108 @@
+from remote_sync import AheadBehindTracker
+
+
+def _rev(repo, revision):
+    return repo.git("rev-parse", revision)
+
+
+def test_ahead_behind_incremental(repo):
+    repo.commit("base")
+    repo.git("branch", "upstream")
+    repo.commit("local 1")
+    repo.commit("local 2")
+    repo.git("checkout", "-q", "upstream")
+    repo.commit("remote 1")
+    repo.git("checkout", "-q", "main")
+
+    tracker = AheadBehindTracker(repo.path)
+    assert tracker.counts(_rev(repo, "main"), _rev(repo, "upstream")) == (2, 1)
+    assert tracker.full_counts == 1
+
+    # 两端只是向前移动时增量计算，不再完整遍历
+    repo.commit("local 3")
+    assert tracker.counts(_rev(repo, "main"), _rev(repo, "upstream")) == (3, 1)
+    repo.git("checkout", "-q", "upstream")
+    repo.commit("remote 2")
+    repo.git("checkout", "-q", "main")
+    assert tracker.counts(_rev(repo, "main"), _rev(repo, "upstream")) == (3, 2)
+    # 上游合入了本地的一个提交
+    repo.git("checkout", "-q", "upstream")
+    repo.git("merge", "-q", "--no-edit", "main~2")
+    repo.git("checkout", "-q", "main")
+    assert tracker.counts(_rev(repo, "main"), _rev(repo, "upstream")) == (2, 3)
+    assert tracker.full_counts == 1
+
+
+def test_ahead_behind_rewrite_falls_back_to_full(repo):
+    repo.commit("base")
+    repo.git("branch", "upstream")
+    repo.commit("local 1")
+    tracker = AheadBehindTracker(repo.path)
+    assert tracker.counts(_rev(repo, "main"), _rev(repo, "upstream")) == (1, 0)
+    repo.git("reset", "-q", "--hard", "HEAD~1")
+    repo.commit("local 1 again")
+    repo.commit("local 2")
+    assert tracker.counts(_rev(repo, "main"), _rev(repo, "upstream")) == (2, 0)
+    assert tracker.full_counts == 2
+    assert tracker.counts(_rev(repo, "upstream"), _rev(repo, "upstream")) == (0, 0)
+
+
+class _FakeRoot:
+    def __init__(self):
+        self.scheduled = []
+
+    def after(self, ms, callback, *args):
+        self.scheduled.append(ms)
+        return len(self.scheduled)
+
+    def after_cancel(self, after_id):
+        pass
+
+
+class _FakeScheduler:
+    def __init__(self, busy):
+        self.busy = busy
+        self.submitted = []
+
+    def is_busy(self, key):
+        return key in self.busy
+
+    def submit(self, fn, *args, **kwargs):
+        self.submitted.append(fn)
+
+
+def test_background_fetch_skips_busy_repo(repo):
+    from git_operations import GitOperations
+    from remote_sync import BackgroundFetcher
+
+    git_ops = GitOperations()
+    git_ops.load_repo(repo.path)
+    try:
+        scheduler = _FakeScheduler({repo.path})
+        fetcher = BackgroundFetcher(_FakeRoot(), scheduler, git_ops, interval=60)
+        fetcher.start()
+        fetcher._tick()
+        assert scheduler.submitted == []
+        scheduler.busy.clear()
+        fetcher._tick()
+        assert scheduler.submitted == [git_ops.background_fetch]
+    finally:
+        git_ops.close()
+
+
+def test_non_interactive_env_keeps_custom_ssh(repo, monkeypatch):
+    from git_operations import GitOperations
+
+    monkeypatch.delenv("GIT_SSH_COMMAND", raising=False)
+    monkeypatch.delenv("GIT_SSH", raising=False)
+    git_ops = GitOperations()
+    git_ops.load_repo(repo.path)
+    try:
+        assert git_ops.non_interactive_env()["GIT_SSH_COMMAND"] == "ssh -o BatchMode=yes"
+        monkeypatch.setenv("GIT_SSH", "plink")
+        assert "GIT_SSH_COMMAND" not in git_ops.non_interactive_env()
+        monkeypatch.delenv("GIT_SSH")
+        repo.git("config", "core.sshCommand", "ssh -i key")
+        assert "GIT_SSH_COMMAND" not in git_ops.non_interactive_env()
+    finally:
+        git_ops.close()
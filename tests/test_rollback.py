@@ -0,0 +1,63 @@
+import pytest
+
+from rollback import RollbackEngine
+
+
+def test_rollback_and_restore(repo):
+    first = repo.commit("first", **{"a.txt": "one\n"})
+    repo.commit("second", **{"a.txt": "two\n"})
+    repo.write("a.txt", "staged\n")
+    repo.git("add", "a.txt")
+    repo.write("a.txt", "worktree\n")
+    repo.write("new.txt", "untracked\n")
+
+    engine = RollbackEngine(repo.path)
+    entry = engine.rollback(first)
+    assert repo.git("rev-parse", "HEAD") == first
+    assert repo.read("a.txt") == "one\n"
+    assert engine.get()["id"] == entry["id"]
+
+    restored, current = engine.restore()
+    assert restored["id"] == entry["id"]
+    assert repo.git("symbolic-ref", "--short", "HEAD") == "main"
+    assert repo.read("a.txt") == "worktree\n"
+    assert repo.read("new.txt") == "untracked\n"
+    assert repo.git("show", ":a.txt") == "staged"
+    # 撤销本身也留下了快照，可以再撤销
+    assert [item["id"] for item in engine.load_stack()] == [current["id"]]
+
+
+def test_snapshot_stack_limit(repo):
+    repo.commit("first", **{"a.txt": "one\n"})
+    engine = RollbackEngine(repo.path, limit=2)
+    for i in range(3):
+        engine.snapshot(f"s{i}")
+    stack = engine.load_stack()
+    assert [item["id"] for item in stack] == [2, 3]
+    refs = repo.git("for-each-ref", "--format=%(refname)", "refs/gitgui/snapshots/").split()
+    assert sorted(refs) == ["refs/gitgui/snapshots/2", "refs/gitgui/snapshots/3"]
+
+
+def test_snapshot_skips_large_untracked(repo):
+    first = repo.commit("first", **{"a.txt": "one\n"})
+    repo.commit("second", **{"a.txt": "two\n"})
+    repo.write("big.bin", b"x" * 2048)
+    repo.write("small.txt", "small\n")
+    engine = RollbackEngine(repo.path, large_threshold=1024)
+    entry = engine.rollback(first)
+    assert entry["skipped"] == ["big.bin"]
+    names = repo.git("ls-tree", "-r", "--name-only", entry["worktree_tree"]).split()
+    assert "small.txt" in names and "big.bin" not in names
+    # 没有写入快照的文件留在工作区
+    assert repo.read("big.bin") == "x" * 2048
+
+
+def test_rollback_refuses_to_overwrite_skipped_file(repo):
+    first = repo.commit("first", **{"big.bin": "tracked\n"})
+    repo.git("rm", "-q", "big.bin")
+    repo.commit("second")
+    repo.write("big.bin", b"x" * 2048)
+    engine = RollbackEngine(repo.path, large_threshold=1024)
+    with pytest.raises(Exception, match="big.bin"):
+        engine.rollback(first)
+    assert engine.load_stack() == []
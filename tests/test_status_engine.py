@@ -0,0 +1,84 @@
+from status_engine import FileStatus, parse_porcelain_v1, parse_porcelain_v2, select_paths
+
+
+def test_parse_porcelain_v2_branch_and_entries():
+    data = b"\0".join([
+        b"# branch.oid 1234567890abcdef1234567890abcdef12345678",
+        b"# branch.head main",
+        b"# branch.upstream origin/main",
+        b"# branch.ab +2 -3",
+        b"1 .M N... 100644 100644 100644 aaaa bbbb src/a b.py",
+        b"2 R. N... 100644 100644 100644 aaaa bbbb R100 new.txt",
+        b"old.txt",
+        b"u UU N... 100644 100644 100644 100644 aaaa bbbb cccc conflict.txt",
+        b"? untracked.txt",
+        b"! ignored.log",
+        b"",
+    ])
+    status = parse_porcelain_v2(data)
+    assert status.oid == "1234567890abcdef1234567890abcdef12345678"
+    assert status.head == "main"
+    assert status.upstream == "origin/main"
+    assert (status.ahead, status.behind) == (2, 3)
+    assert status.entries == [
+        FileStatus("changed", ".", "M", "src/a b.py"),
+        FileStatus("renamed", "R", ".", "new.txt", "old.txt"),
+        FileStatus("unmerged", "U", "U", "conflict.txt"),
+        FileStatus("untracked", "?", "?", "untracked.txt"),
+        FileStatus("ignored", "!", "!", "ignored.log"),
+    ]
+    assert status.has_staged and status.has_unstaged
+
+
+def test_parse_porcelain_v2_initial_detached_and_no_ahead_behind():
+    status = parse_porcelain_v2(b"# branch.oid (initial)\0# branch.head (detached)\0# branch.ab +? -?\0")
+    assert status.oid is None
+    assert status.detached
+    assert (status.ahead, status.behind) == (None, None)
+    assert not status.has_staged and not status.has_unstaged
+
+
+def test_parse_porcelain_v1():
+    data = b"\0".join([
+        b"## main...origin/main [ahead 1, behind 4]",
+        b"M  staged.txt",
+        b" M unstaged.txt",
+        b"R  new.txt",
+        b"old.txt",
+        b"UU conflict.txt",
+        b"AA both.txt",
+        b"?? untracked.txt",
+        b"",
+    ])
+    status = parse_porcelain_v1(data)
+    assert status.head == "main"
+    assert status.upstream == "origin/main"
+    assert (status.ahead, status.behind) == (1, 4)
+    assert status.entries == [
+        FileStatus("changed", "M", ".", "staged.txt"),
+        FileStatus("changed", ".", "M", "unstaged.txt"),
+        FileStatus("renamed", "R", ".", "new.txt", "old.txt"),
+        FileStatus("unmerged", "U", "U", "conflict.txt"),
+        FileStatus("unmerged", "A", "A", "both.txt"),
+        FileStatus("untracked", "?", "?", "untracked.txt"),
+    ]
+
+
+def test_parse_porcelain_v1_no_commits_and_detached():
+    assert parse_porcelain_v1(b"## No commits yet on main\0").head == "main"
+    assert parse_porcelain_v1(b"## HEAD (no branch)\0").detached
+
+
+def _entries(*paths):
+    return [FileStatus("changed", ".", "M", path) for path in paths]
+
+
+def test_select_paths_filters():
+    entries = _entries("README.md", "src/app.py", "src/app.pyc", "docs/guide.md", "src/sub/util.py")
+    assert select_paths(entries) == [e.path for e in entries]
+    assert select_paths(entries, include=["*.py"]) == ["src/app.py", "src/sub/util.py"]
+    assert select_paths(entries, exclude=["*.pyc", "docs/*"]) == ["README.md", "src/app.py", "src/sub/util.py"]
+    assert select_paths(entries, directories=["./src/"]) == ["src/app.py", "src/app.pyc", "src/sub/util.py"]
+    assert select_paths(entries, include=["src/*.py"], directories=["src"]) == ["src/app.py", "src/sub/util.py"]
+    # 选择仓库根目录等于不限制目录
+    assert select_paths(entries, directories=["src", "."]) == [e.path for e in entries]
@@ -0,0 +1,62 @@
+import time
+
+import status_watcher
+from status_watcher import StatusWatcher, _PollingBackend
+
+
+class _Stop:
+    def is_set(self):
+        return False
+
+
+def test_polling_backs_off_tree_walks(repo, monkeypatch):
+    repo.commit("first", **{"a.txt": "one\n"})
+    walks = []
+    original = status_watcher.tree_signature
+    monkeypatch.setattr(status_watcher, "tree_signature", lambda path: walks.append(path) or original(path))
+    backend = _PollingBackend(repo.path, 0.01)
+    for _ in range(20):
+        assert not backend.wait(None, _Stop())
+    # 工作区没有变化时遍历间隔逐次加倍，远少于轮询次数
+    assert len(walks) < 10
+    # index/HEAD/refs 每次轮询都检查
+    repo.git("add", "-A")
+    repo.git("commit", "-q", "--allow-empty", "-m", "second")
+    assert backend.wait(None, _Stop())
+
+
+def test_inotify_error_falls_back_to_polling(repo, monkeypatch):
+    watcher = StatusWatcher(repo.path, lambda: None, poll_interval=0.01)
+    watcher._backend = watcher._create_backend()
+
+    def fail(timeout, stop_event):
+        raise OSError(28, "inotify 监听数量超出系统限制")
+
+    monkeypatch.setattr(watcher._backend, "wait", fail)
+    try:
+        assert watcher._wait(0.01)
+        assert watcher.backend_name == "polling"
+        assert isinstance(watcher._backend, _PollingBackend)
+    finally:
+        watcher._backend.close()
+
+
+def test_callback_error_is_logged(repo, caplog):
+    calls = []
+
+    def on_change():
+        calls.append(1)
+        raise RuntimeError("boom")
+
+    watcher = StatusWatcher(repo.path, on_change, poll_interval=0.01, force_polling=True)
+    with caplog.at_level("ERROR", logger="gitgui.watcher"):
+        watcher.start()
+        try:
+            watcher.trigger()
+            for _ in range(200):
+                if calls and caplog.records:
+                    break
+                time.sleep(0.01)
+        finally:
+            watcher.stop()
+    assert "boom" in caplog.text
@@ -0,0 +1,39 @@
+import os
+import subprocess
+
+from git_operations import GitOperations
+from workspace import Workspace
+
+
+def test_run_status_and_close(tmp_path):
+    for name in ("a", "b"):
+        subprocess.run(["git", "init", "-q", str(tmp_path / name)], check=True)
+    (tmp_path / "b" / "new.txt").write_text("new\n")
+    workspace = Workspace(str(tmp_path), max_workers=2)
+    assert len(workspace.load()) == 2
+    results = {result['name']: result for result in workspace.run("status")}
+    assert results["a"]['dirty'] is False and results["b"]['dirty'] is True
+    # 只查询状态时不打开提交索引等服务
+    assert all(git_ops._opened("commit_index") is None for git_ops in workspace.repos.values())
+    assert not (tmp_path / "a" / ".git" / "gitgui-commits.sqlite").exists()
+    pools = [git_ops.process_pool for git_ops in workspace.repos.values()]
+    workspace.close()
+    assert all(pool._closed for pool in pools)
+    assert all(git_ops is None for git_ops in workspace.repos.values())
+
+
+def test_batch_push_does_not_prompt(tmp_path, monkeypatch):
+    repo = tmp_path / "a"
+    subprocess.run(["git", "init", "-q", str(repo)], check=True)
+    subprocess.run(["git", "-C", str(repo), "remote", "add", "origin", "https://127.0.0.1:9/none.git"], check=True)
+    subprocess.run(["git", "-C", str(repo), "commit", "-q", "--allow-empty", "-m", "c"], check=True,
+                   env=dict(os.environ, GIT_AUTHOR_NAME="t", GIT_AUTHOR_EMAIL="t@t", GIT_COMMITTER_NAME="t",
+                            GIT_COMMITTER_EMAIL="t@t"))
+    workspace = Workspace(str(tmp_path))
+    workspace.load()
+    envs = []
+    monkeypatch.setattr(GitOperations, "_run_remote_command",
+                        lambda self, *args, env=None, **kwargs: envs.append(env))
+    workspace.run("push")
+    workspace.close()
+    assert envs and envs[0]["GIT_TERMINAL_PROMPT"] == "0"
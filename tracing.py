@@ -0,0 +1,248 @@
+"""操作追踪：记录操作耗时、git 子进程和主线程卡顿
+
+设置环境变量 GITGUI_TRACE=1 开启（或设为一个目录，追踪文件写到该目录），默认关闭；
+入口程序调用 enable_from_env() 读取该变量。
+关闭时每个被追踪的调用只多一次布尔判断。
+开启后事件逐条写入滚动日志 trace.log，程序退出时导出 Chrome 追踪文件
+（在 chrome://tracing 或 https://ui.perfetto.dev 中打开）。
+"""
+import os
+import sys
+import json
+import time
+import atexit
+import logging
+import threading
+import subprocess
+import collections
+import logging.handlers
+
+_enabled = False
+_trace_dir = None
+_events = collections.deque(maxlen=200000)
+_local = threading.local()
+_logger = logging.getLogger("gitgui.trace")
+_pid = os.getpid()
+
+
+def enabled():
+    return _enabled
+
+
+def _now_us():
+    return time.perf_counter_ns() // 1000
+
+
+def _emit(name, category, start_us, duration_us, args=None):
+    event = {
+        "name": name,
+        "cat": category,
+        "ph": "X",
+        "ts": start_us,
+        "dur": duration_us,
+        "pid": _pid,
+        "tid": threading.get_ident(),
+    }
+    if args:
+        event["args"] = args
+    _events.append(event)
+    _logger.debug(json.dumps({
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "cat": category,
+        "name": name,
+        "ms": round(duration_us / 1000, 3),
+        "thread": threading.current_thread().name,
+        "args": args or {},
+    }, ensure_ascii=False, default=str))
+
+
+class _Span:
+    __slots__ = ("name", "category", "args", "start")
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        stack = getattr(_local, "stack", None)
+        if stack is None:
+            stack = _local.stack = []
+        stack.append(self.name)
+        self.start = _now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        duration = _now_us() - self.start
+        _local.stack.pop()
+        args = self.args
+        if exc_type is not None:
+            args = dict(args or {}, error=f"{exc_type.__name__}: {exc}")
+        _emit(self.name, self.category, self.start, duration, args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name, category="op", **args):
+    """计时上下文：with span("加载仓库"): ..."""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, category, args or None)
+
+
+def call(func, args, kwargs):
+    """以函数的限定名为名称追踪一次调用（供 utils 中的装饰器使用）
+
+    同一函数同时带有 handle_exception 和 require_repo 时只记录一层。
+    """
+    if not _enabled:
+        return func(*args, **kwargs)
+    name = func.__qualname__
+    stack = getattr(_local, "stack", None)
+    if stack and stack[-1] == name:
+        return func(*args, **kwargs)
+    with _Span(name, name.split(".", 1)[0], None):
+        return func(*args, **kwargs)
+
+
+# ---- 子进程 ----
+
+_original_popen_init = subprocess.Popen.__init__
+_original_popen_wait = subprocess.Popen.wait
+
+
+def _traced_popen_init(self, *args, **kwargs):
+    self._trace_start = _now_us()
+    self._trace_recorded = False
+    _original_popen_init(self, *args, **kwargs)
+
+
+def _traced_popen_wait(self, *args, **kwargs):
+    returncode = _original_popen_wait(self, *args, **kwargs)
+    # 进程结束后第一次 wait 返回时记录（subprocess.run、communicate 都会经过这里）
+    if _enabled and not getattr(self, "_trace_recorded", True):
+        self._trace_recorded = True
+        argv = self.args if isinstance(self.args, (list, tuple)) else [self.args]
+        argv = [str(arg) for arg in argv[:20]]
+        name = " ".join(os.path.basename(arg) if i == 0 else arg for i, arg in enumerate(argv[:3]))
+        _emit(name, "subprocess", self._trace_start, _now_us() - self._trace_start,
+              {"argv": argv, "returncode": returncode})
+    return returncode
+
+
+# ---- 主线程卡顿 ----
+
+class StallDetector:
+    """检测 Tk 主线程卡顿
+
+    主线程每 interval 毫秒打一次心跳；看门狗线程发现心跳间隔超过阈值时，
+    记录主线程当时正在执行的函数，心跳恢复后记录整个卡顿时长。
+    """
+
+    def __init__(self, root, interval=50, threshold=100):
+        self.root = root
+        self.interval = interval
+        self.threshold = threshold
+        self.last_beat = time.perf_counter()
+        self.stalled_in = None
+        self.running = True
+        self.main_ident = threading.get_ident()
+        self.root.after(self.interval, self._beat)
+        threading.Thread(target=self._watch, name="stall-watchdog", daemon=True).start()
+
+    def _beat(self):
+        if not self.running:
+            return
+        now = time.perf_counter()
+        lag = (now - self.last_beat) * 1000 - self.interval
+        if lag > self.threshold:
+            start_us = _now_us() - int(lag * 1000)
+            _emit("主线程卡顿", "stall", start_us, int(lag * 1000), {"where": self.stalled_in})
+        self.last_beat = now
+        self.stalled_in = None
+        self.root.after(self.interval, self._beat)
+
+    def _watch(self):
+        while self.running:
+            time.sleep(self.threshold / 1000)
+            if (time.perf_counter() - self.last_beat) * 1000 > self.interval + self.threshold and not self.stalled_in:
+                frame = sys._current_frames().get(self.main_ident)
+                if frame is not None:
+                    self.stalled_in = f"{frame.f_code.co_filename}:{frame.f_lineno} {frame.f_code.co_name}"
+
+    def stop(self):
+        self.running = False
+
+
+def install_stall_detector(root):
+    """在 Tk 主循环中启动卡顿检测；追踪关闭时什么也不做"""
+    if not _enabled:
+        return None
+    return StallDetector(root)
+
+
+# ---- 开关与导出 ----
+
+def enable(trace_dir=None):
+    """开启追踪：安装子进程钩子并打开滚动日志"""
+    global _enabled, _trace_dir
+    if _enabled:
+        return
+    if not trace_dir:
+        from utils import cache_dir
+        trace_dir = os.path.join(cache_dir(), "traces")
+    os.makedirs(trace_dir, exist_ok=True)
+    _trace_dir = trace_dir
+
+    handler = logging.handlers.RotatingFileHandler(os.path.join(trace_dir, "trace.log"),
+                                                   maxBytes=5 * 1024 * 1024, backupCount=3, encoding="utf-8")
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    _logger.addHandler(handler)
+    _logger.setLevel(logging.DEBUG)
+    _logger.propagate = False
+
+    subprocess.Popen.__init__ = _traced_popen_init
+    subprocess.Popen.wait = _traced_popen_wait
+    _enabled = True
+    atexit.register(export_chrome_trace)
+
+
+def disable():
+    global _enabled
+    _enabled = False
+    subprocess.Popen.__init__ = _original_popen_init
+    subprocess.Popen.wait = _original_popen_wait
+
+
+def export_chrome_trace(path=None):
+    """把已记录的事件导出为 Chrome 追踪格式，返回文件路径"""
+    if not _events:
+        return None
+    if path is None:
+        path = os.path.join(_trace_dir or ".", time.strftime("trace-%Y%m%d-%H%M%S.json"))
+    events = list(_events)
+    thread_names = {thread.ident: thread.name for thread in threading.enumerate()}
+    metadata = [{"name": "thread_name", "ph": "M", "pid": _pid, "tid": tid, "args": {"name": name}}
+                for tid, name in thread_names.items()]
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f, ensure_ascii=False, default=str)
+    return path
+
+
+def enable_from_env():
+    """按环境变量 GITGUI_TRACE 开启追踪，应在程序入口处尽早调用"""
+    setting = os.environ.get("GITGUI_TRACE", "")
+    if setting and setting != "0":
+        enable(None if setting == "1" else setting)
@@ -1,9 +1,37 @@
-
-
 import functools
-from tkinter import messagebox
+import threading
+import json
 import os
-import winreg
+
+import tracing
+
+# 无界面模式（命令行/脚本）下不弹出任何对话框，错误以异常形式交给调用方
+_headless = False
+
+
+def set_headless(headless=True):
+    """切换无界面模式，须在导入 git_operations 之前调用"""
+    global _headless
+    _headless = headless
+
+
+def is_headless():
+    return _headless
+
+
+def show_error(message):
+    """弹出错误提示；后台线程和无界面模式中不弹窗，由调用方处理异常"""
+    if _headless or threading.current_thread() is not threading.main_thread():
+        return
+    from tkinter import messagebox
+    messagebox.showerror("错误", message)
+
+
+def _missing_repo():
+    if _headless:
+        raise Exception("请先选择仓库！")
+    show_error("请先选择仓库！")
+    return None
 
 def handle_exception(error_message):
     """异常处理装饰器"""
@@ -12,9 +40,9 @@ def handle_exception(error_message):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             try:
-                return func(*args, **kwargs)
+                return tracing.call(func, args, kwargs)
             except Exception as e:
-                messagebox.showerror("错误", f"{error_message}: {str(e)}")
+                show_error(f"{error_message}: {str(e)}")
                 raise e
 
         return wrapper
@@ -28,56 +56,96 @@ def require_repo(func):
         # 检查是否有仓库对象
         if hasattr(self, 'repo'):
             if not self.repo:
-                messagebox.showerror("错误", "请先选择仓库！")
-                return None
+                return _missing_repo()
         elif hasattr(self, 'git_ops'):
             if not self.git_ops.repo:
-                messagebox.showerror("错误", "请先选择仓库！")
-                return None
+                return _missing_repo()
         else:
-            messagebox.showerror("错误", "请先选择仓库！")
-            return None
+            return _missing_repo()
 
-        return func(self, *args, **kwargs)
+        return tracing.call(func, (self,) + args, kwargs)
     return wrapper
 
 def repo_not_exit(self):
     if hasattr(self, 'repo') and not self.repo:
-        messagebox.showerror("错误", "请先选择仓库！")
+        show_error("请先选择仓库！")
         return True
     elif hasattr(self, 'git_ops') and not self.git_ops.repo:
-        messagebox.showerror("错误", "请先选择仓库！")
+        show_error("请先选择仓库！")
         return True
     return False
 
 
 def find_git_executable():
-    """自动查找 git.exe 的位置"""
-    # 常见的 Git 安装路径
-    common_paths = [
-        r"C:\Program Files\Git\bin\git.exe",
-        r"C:\Program Files (x86)\Git\bin\git.exe",
-    ]
-    
-    # 从注册表查找 Git 安装路径
-    try:
-        with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\GitForWindows", 0, winreg.KEY_READ | winreg.KEY_WOW64_64KEY) as key:
-            git_path = winreg.QueryValueEx(key, "InstallPath")[0]
-            exe_path = os.path.join(git_path, "bin", "git.exe")
-            if os.path.exists(exe_path):
-                return exe_path
-    except WindowsError:
-        pass
+    """自动查找 git 可执行文件的位置（Windows 查注册表和常见路径，其他系统查 PATH）"""
+    exe_name = "git.exe" if os.name == "nt" else "git"
 
-    # 检查常见路径
-    for path in common_paths:
-        if os.path.exists(path):
-            return path
+    if os.name == "nt":
+        import winreg
+
+        # 常见的 Git 安装路径
+        common_paths = [
+            r"C:\Program Files\Git\bin\git.exe",
+            r"C:\Program Files (x86)\Git\bin\git.exe",
+        ]
+
+        # 从注册表查找 Git 安装路径
+        try:
+            with winreg.OpenKey(winreg.HKEY_LOCAL_MACHINE, r"SOFTWARE\GitForWindows", 0, winreg.KEY_READ | winreg.KEY_WOW64_64KEY) as key:
+                git_path = winreg.QueryValueEx(key, "InstallPath")[0]
+                exe_path = os.path.join(git_path, "bin", "git.exe")
+                if os.path.exists(exe_path):
+                    return exe_path
+        except OSError:
+            pass
+
+        # 检查常见路径
+        for path in common_paths:
+            if os.path.exists(path):
+                return path
 
     # 检查环境变量 PATH
-    for path in os.environ["PATH"].split(os.pathsep):
-        exe_path = os.path.join(path, "git.exe")
-        if os.path.exists(exe_path):
+    for path in os.environ.get("PATH", "").split(os.pathsep):
+        exe_path = os.path.join(path, exe_name)
+        if os.path.isfile(exe_path) and os.access(exe_path, os.X_OK):
             return exe_path
 
-    return None
\ No newline at end of file
+    return None
+
+
+def cache_dir():
+    """本工具的本地缓存目录"""
+    base = (os.environ.get("LOCALAPPDATA") or os.environ.get("XDG_CACHE_HOME")
+            or os.path.join(os.path.expanduser("~"), ".cache"))
+    path = os.path.join(base, "GitGUI")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def load_cache(name):
+    """读取缓存文件（JSON），不存在或损坏时返回 None"""
+    try:
+        with open(os.path.join(cache_dir(), name), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def save_cache(name, data):
+    try:
+        with open(os.path.join(cache_dir(), name), "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+    except OSError:
+        pass
+
+
+def avatar_thumbnail(source, size=120):
+    """返回缩放好的头像 PNG 缓存路径，只在原图变化后才重新缩放"""
+    st = os.stat(source)
+    target = os.path.join(cache_dir(), f"avatar_{size}_{st.st_size}_{st.st_mtime_ns}.png")
+    if not os.path.exists(target):
+        from PIL import Image
+        image = Image.open(source)
+        image = image.resize((size, size), Image.Resampling.LANCZOS)
+        image.save(target, format="PNG")
+    return target
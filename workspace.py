@@ -0,0 +1,116 @@
+import os
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from git_operations import GitOperations, OperationCancelled
+
+# 工作区支持的批量操作
+OPERATIONS = ("status", "fetch", "pull", "push")
+
+
+def discover_repos(root_dir, max_depth=3):
+    """查找目录树中的所有 Git 仓库（找到仓库后不再深入其子目录）"""
+    repos = []
+    root_depth = root_dir.rstrip(os.sep).count(os.sep)
+    for dirpath, dirnames, _ in os.walk(root_dir):
+        if os.path.exists(os.path.join(dirpath, ".git")):
+            repos.append(dirpath)
+            dirnames[:] = []
+            continue
+        if dirpath.count(os.sep) - root_depth >= max_depth:
+            dirnames[:] = []
+            continue
+        dirnames[:] = sorted(d for d in dirnames if not d.startswith("."))
+    return repos
+
+
+class Workspace:
+    """多仓库工作区：对每个仓库复用 GitOperations，并发执行状态查询、抓取、拉取和推送"""
+
+    def __init__(self, root_dir, max_workers=8):
+        self.root_dir = root_dir
+        self.max_workers = max_workers
+        self.repos = {}
+        self.cancel_event = threading.Event()
+
+    def load(self, max_depth=3):
+        """扫描工作区目录，返回找到的仓库路径"""
+        self.close()
+        self.repos = {path: None for path in discover_repos(self.root_dir, max_depth)}
+        return list(self.repos)
+
+    def close(self):
+        """结束各仓库的常驻 cat-file 进程并关闭提交索引"""
+        for path, git_ops in list(self.repos.items()):
+            if git_ops is not None:
+                git_ops.close()
+                self.repos[path] = None
+
+    def _git_ops(self, path):
+        """打开仓库；提交索引、回退引擎等服务在 GitOperations 中按需创建，只查询状态时不会打开"""
+        git_ops = self.repos.get(path)
+        if git_ops is None:
+            git_ops = GitOperations()
+            git_ops.load_repo(path)
+            self.repos[path] = git_ops
+        return git_ops
+
+    def run(self, operation, on_result=None):
+        """对所有仓库并发执行操作，最多同时运行 max_workers 个
+
+        on_result 在工作线程中被调用，每完成一个仓库调用一次；返回全部结果列表。
+        """
+        if operation not in OPERATIONS:
+            raise ValueError(f"不支持的操作: {operation}")
+        self.cancel_event.clear()
+
+        def run_one(path):
+            result = self._run_one(operation, path)
+            if on_result:
+                on_result(result)
+            return result
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="workspace") as executor:
+            return list(executor.map(run_one, list(self.repos)))
+
+    def cancel(self):
+        """取消尚未开始的仓库，并终止正在运行的远程操作"""
+        self.cancel_event.set()
+
+    def _run_one(self, operation, path):
+        result = {
+            'path': path,
+            'name': os.path.relpath(path, self.root_dir),
+            'operation': operation,
+            'branch': None,
+            'dirty': None,
+            'ahead': None,
+            'behind': None,
+            'elapsed': 0.0,
+            'error': None
+        }
+        started = time.perf_counter()
+        try:
+            if self.cancel_event.is_set():
+                raise OperationCancelled()
+            git_ops = self._git_ops(path)
+            # 批量操作无人值守：需要认证输入的仓库直接失败，不会卡住或弹出一串提示
+            if operation == "fetch":
+                git_ops.fetch_from_remote(cancel_event=self.cancel_event, env=git_ops.non_interactive_env())
+            elif operation == "pull":
+                git_ops.pull_from_remote(cancel_event=self.cancel_event, env=git_ops.non_interactive_env())
+            elif operation == "push":
+                git_ops.push_to_remote(cancel_event=self.cancel_event, env=git_ops.non_interactive_env())
+
+            status = git_ops.get_status()
+            result['branch'] = status.head or "(detached)"
+            result['dirty'] = any(e.kind != "ignored" for e in status.entries)
+            result['ahead'] = status.ahead
+            result['behind'] = status.behind
+        except OperationCancelled:
+            result['error'] = "已取消"
+        except Exception as e:
+            result['error'] = str(e).strip() or type(e).__name__
+        result['elapsed'] = time.perf_counter() - started
+        return result
@@ -0,0 +1,151 @@
+import collections
+import tkinter as tk
+from tkinter import ttk, filedialog, messagebox
+
+from workspace import Workspace
+
+
+class WorkspaceWindow:
+    """工作区窗口：以表格显示多个仓库的分支、改动和领先/落后情况，并支持批量操作"""
+
+    COLUMNS = ("仓库", "分支", "状态", "领先/落后", "耗时", "信息")
+
+    def __init__(self, root, scheduler):
+        self.root = root
+        self.scheduler = scheduler
+        self.workspace = None
+        self.running = False
+        self.pending_results = collections.deque()
+
+        self.window = tk.Toplevel(root)
+        self.window.title("工作区")
+        self.window.geometry("900x500")
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+
+        top_frame = ttk.Frame(self.window, padding=10)
+        top_frame.pack(fill=tk.X)
+        ttk.Button(top_frame, text="选择工作区目录", command=self.select_root).pack(side=tk.LEFT, padx=5)
+        self.root_label = ttk.Label(top_frame, text="未选择工作区")
+        self.root_label.pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(top_frame, text="并发数:").pack(side=tk.LEFT, padx=(20, 0))
+        self.concurrency = tk.IntVar(value=8)
+        ttk.Spinbox(top_frame, from_=1, to=64, width=5, textvariable=self.concurrency).pack(side=tk.LEFT)
+
+        action_frame = ttk.Frame(self.window, padding=(10, 0))
+        action_frame.pack(fill=tk.X)
+        for text, operation in (("刷新状态", "status"), ("全部抓取", "fetch"),
+                                ("全部拉取", "pull"), ("全部推送", "push")):
+            ttk.Button(action_frame, text=text,
+                       command=lambda op=operation: self.run(op)).pack(side=tk.LEFT, padx=5)
+        ttk.Button(action_frame, text="取消", command=self.cancel).pack(side=tk.LEFT, padx=5)
+        self.summary_label = ttk.Label(action_frame, text="")
+        self.summary_label.pack(side=tk.LEFT, padx=10)
+
+        tree_frame = ttk.Frame(self.window, padding=10)
+        tree_frame.pack(fill=tk.BOTH, expand=True)
+        self.tree = ttk.Treeview(tree_frame, columns=self.COLUMNS, show="headings")
+        for column, width in zip(self.COLUMNS, (220, 100, 60, 80, 70, 300)):
+            self.tree.heading(column, text=column, anchor=tk.W)
+            self.tree.column(column, width=width)
+        scrollbar = ttk.Scrollbar(tree_frame, orient=tk.VERTICAL, command=self.tree.yview)
+        self.tree.configure(yscrollcommand=scrollbar.set)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+
+    def select_root(self):
+        folder = filedialog.askdirectory(parent=self.window)
+        if not folder:
+            return
+        if self.workspace:
+            self.workspace.cancel()
+            self._submit(self.workspace.close)
+        self.workspace = Workspace(folder)
+        self.root_label.config(text=f"工作区: {folder}")
+        self._submit(self.workspace.load, on_success=self.on_loaded, on_error=self.on_load_failed)
+
+    def _submit(self, fn, *args, **kwargs):
+        """同一工作区的扫描、批量操作和关闭按提交顺序执行，关闭时不会结束仍在使用的进程"""
+        self.scheduler.submit(fn, *args, serial_key=f"workspace-{id(self.workspace)}", **kwargs)
+
+    def on_load_failed(self, error):
+        if self.window.winfo_exists():
+            messagebox.showerror("错误", f"扫描工作区失败: {str(error)}", parent=self.window)
+
+    def on_loaded(self, repos):
+        if not self.window.winfo_exists():
+            return
+        self.tree.delete(*self.tree.get_children())
+        for path in repos:
+            self.tree.insert("", tk.END, iid=path, values=(path, "", "", "", "", ""))
+        self.summary_label.config(text=f"共 {len(repos)} 个仓库")
+        self.run("status")
+
+    def run(self, operation):
+        """在后台对所有仓库并发执行操作，每完成一个仓库就更新一行"""
+        if not self.workspace or not self.workspace.repos:
+            messagebox.showerror("错误", "请先选择包含仓库的工作区目录！", parent=self.window)
+            return
+        if self.running:
+            messagebox.showwarning("提示", "工作区操作正在进行，请等待完成或取消", parent=self.window)
+            return
+        try:
+            concurrency = self.concurrency.get()
+        except tk.TclError:
+            # 并发数输入框中不是整数
+            messagebox.showerror("错误", "并发数必须是正整数！", parent=self.window)
+            return
+        self.running = True
+        self.workspace.max_workers = max(1, concurrency)
+        self.summary_label.config(text=f"正在执行 {operation}...")
+        self._submit(self.workspace.run, operation, on_result=self.pending_results.append,
+                     on_success=self.on_finished, on_error=lambda e: self.on_finished(None, e))
+        self.root.after(100, self.drain_results)
+
+    def drain_results(self):
+        if not self.window.winfo_exists():
+            return
+        while self.pending_results:
+            self.show_result(self.pending_results.popleft())
+        if self.running:
+            self.root.after(100, self.drain_results)
+
+    def show_result(self, result):
+        if not self.tree.exists(result['path']):
+            return
+        if result['dirty'] is None:
+            state = ""
+        else:
+            state = "有改动" if result['dirty'] else "干净"
+        ahead_behind = "" if result['ahead'] is None else f"+{result['ahead']} / -{result['behind']}"
+        self.tree.item(result['path'], values=(
+            result['name'],
+            result['branch'] or "",
+            state,
+            ahead_behind,
+            f"{result['elapsed']:.2f}s",
+            result['error'] or "完成"
+        ))
+
+    def on_finished(self, results, error=None):
+        self.running = False
+        if not self.window.winfo_exists():
+            return
+        self.drain_results()
+        if error:
+            messagebox.showerror("错误", f"工作区操作失败: {str(error)}", parent=self.window)
+            return
+        failed = sum(1 for result in results if result['error'])
+        total = sum(result['elapsed'] for result in results)
+        self.summary_label.config(text=f"完成 {len(results)} 个仓库，失败 {failed} 个，累计耗时 {total:.2f}s")
+
+    def cancel(self):
+        if self.workspace:
+            self.workspace.cancel()
+
+    def close(self):
+        self.cancel()
+        if self.workspace:
+            # 正在运行的批量操作会在取消后尽快结束，之后再结束各仓库的常驻进程
+            self._submit(self.workspace.close)
+        self.window.destroy()